@@ -23,21 +23,38 @@ Author: Claude Code Assistant
 """
 
 import os
+import asyncio
 import logging
+import copy
 import json
 import random
+import re
 import time
 import uuid
 import hashlib
+import hmac
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from urllib.parse import quote_plus
 
+import click
 import requests
-from flask import Flask, request, jsonify, send_from_directory, render_template_string
+from flask import Flask, Response, request, jsonify, send_from_directory, render_template_string, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from result_store import create_result_store, ExpirySweeper, export_ndjson, import_ndjson
+from ttl_cache import TTLCache
+from image_cache import ImageSearchCache, SQLiteImageCache
+from gift_parsing import IncrementalGiftParser, extract_gift_json
+from single_flight import SingleFlight, SQLiteFlightCoordinator
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience, call_with_resilience_async
+from rate_limit import ConcurrencyLimiter, KeyedRateLimiter, SQLiteRateLimiter
+from http_client import HTTPClient
+from async_pipeline import AsyncPipelineRunner, HTTPX_AVAILABLE, REQUEST_ERRORS, TRANSIENT_ERRORS, httpx
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -68,6 +85,35 @@ class Config:
     OPENAI_MAX_TOKENS = 1500
     OPENAI_TEMPERATURE = 0.7
     
+    # Upstream base URLs (point these at mock_upstreams.py for offline load testing)
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+    BING_BASE_URL = os.getenv('BING_BASE_URL', 'https://www.bing.com').rstrip('/')
+    DUCKDUCKGO_BASE_URL = os.getenv('DUCKDUCKGO_BASE_URL', 'https://duckduckgo.com').rstrip('/')
+    DUCKDUCKGO_HTML_BASE_URL = os.getenv('DUCKDUCKGO_HTML_BASE_URL', 'https://html.duckduckgo.com').rstrip('/')
+    DUCKDUCKGO_API_BASE_URL = os.getenv('DUCKDUCKGO_API_BASE_URL', 'https://api.duckduckgo.com').rstrip('/')
+    PEXELS_BASE_URL = os.getenv('PEXELS_BASE_URL', 'https://api.pexels.com/v1').rstrip('/')
+    PIXABAY_BASE_URL = os.getenv('PIXABAY_BASE_URL', 'https://pixabay.com').rstrip('/')
+    
+    # OpenAI retries and circuit breaker
+    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+    OPENAI_RETRY_BASE_DELAY = float(os.getenv('OPENAI_RETRY_BASE_DELAY', 0.5))  # Seconds, doubled per attempt (with jitter)
+    OPENAI_RETRY_MAX_DELAY = float(os.getenv('OPENAI_RETRY_MAX_DELAY', 8))
+    OPENAI_RETRY_BUDGET = float(os.getenv('OPENAI_RETRY_BUDGET', 40))  # Total seconds spent on one call, retries included
+    OPENAI_BREAKER_THRESHOLD = int(os.getenv('OPENAI_BREAKER_THRESHOLD', 5))  # Consecutive failures before failing fast
+    OPENAI_BREAKER_RECOVERY = float(os.getenv('OPENAI_BREAKER_RECOVERY', 30))  # Seconds before a half-open probe
+    
+    # Pooled keep-alive connections for outbound HTTP calls (see http_client.py)
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))  # Keep-alive connections per upstream host
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))  # Seconds to establish a connection
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 15))  # Seconds between bytes, unless the call sets its own
+    
+    # Request budgets for the scraped search sites, shared by all threads (0 = unlimited)
+    BING_REQUESTS_PER_SECOND = float(os.getenv('BING_REQUESTS_PER_SECOND', 2))
+    BING_REQUEST_BURST = float(os.getenv('BING_REQUEST_BURST', 4))
+    DUCKDUCKGO_REQUESTS_PER_SECOND = float(os.getenv('DUCKDUCKGO_REQUESTS_PER_SECOND', 2))
+    DUCKDUCKGO_REQUEST_BURST = float(os.getenv('DUCKDUCKGO_REQUEST_BURST', 4))
+    UPSTREAM_MAX_THROTTLE_WAIT = float(os.getenv('UPSTREAM_MAX_THROTTLE_WAIT', 10))  # Longer waits skip the request
+    
     # Amazon Affiliate Configuration
     AMAZON_AFFILIATE_TAG = os.getenv('AMAZON_AFFILIATE_TAG', 'kamazon01-21')
     
@@ -86,6 +132,75 @@ class Config:
     USE_PEXELS = True
     USE_PLACEHOLDER_FALLBACK = True
     
+    # Result storage configuration ('memory', 'sqlite' or 'log')
+    RESULT_STORE_BACKEND = os.getenv('RESULT_STORE_BACKEND', 'memory')
+    RESULT_STORE_PATH = os.getenv('RESULT_STORE_PATH', '/tmp/rubysgifts_results.db')
+    RESULT_STORE_LOG_DIR = os.getenv('RESULT_STORE_LOG_DIR', '/tmp/rubysgifts_results')
+    RESULT_STORE_SEGMENT_BYTES = int(os.getenv('RESULT_STORE_SEGMENT_BYTES', 64 * 1024 * 1024))  # Log backend segment roll size
+    RESULT_STORE_FSYNC = os.getenv('RESULT_STORE_FSYNC', 'false').lower() == 'true'  # fsync every log append
+    RESULT_TTL_DAYS = int(os.getenv('RESULT_TTL_DAYS', 30))
+    RESULT_STORE_MAX_BYTES = int(os.getenv('RESULT_STORE_MAX_BYTES', 256 * 1024 * 1024))  # Memory backend cap, 0 = unbounded
+    RESULT_COMPRESSION_LEVEL = int(os.getenv('RESULT_COMPRESSION_LEVEL', 6))  # zlib level 1-9, 0 = store uncompressed
+    RESULT_STORE_STRIPES = int(os.getenv('RESULT_STORE_STRIPES', 16))  # Lock stripes for the memory backend
+    RESULT_SWEEP_INTERVAL = float(os.getenv('RESULT_SWEEP_INTERVAL', 300))  # Seconds between expiry sweeps, 0 = disabled
+    RESULT_SWEEP_JITTER = float(os.getenv('RESULT_SWEEP_JITTER', 0.1))  # +/- fraction of the interval
+    RESULT_IMPORT_BATCH_SIZE = int(os.getenv('RESULT_IMPORT_BATCH_SIZE', 500))
+
+    # Cache of AI gift ideas keyed on the canonicalized questionnaire
+    GIFT_CACHE_TTL = float(os.getenv('GIFT_CACHE_TTL', 3600))  # Seconds, 0 = disabled
+    GIFT_CACHE_MAX_ENTRIES = int(os.getenv('GIFT_CACHE_MAX_ENTRIES', 1024))
+
+    # Coalescing of identical in-flight generations; shared mode also spans worker processes
+    SINGLE_FLIGHT_SHARED = os.getenv('SINGLE_FLIGHT_SHARED', 'false').lower() == 'true'
+    SINGLE_FLIGHT_PATH = os.getenv('SINGLE_FLIGHT_PATH', RESULT_STORE_PATH)
+    SINGLE_FLIGHT_LEASE_SECONDS = float(os.getenv('SINGLE_FLIGHT_LEASE_SECONDS', 60))
+
+    # Async generation pipeline (requires httpx); the sync pipeline is used otherwise
+    ASYNC_PIPELINE = os.getenv('ASYNC_PIPELINE', 'false').lower() == 'true'
+    ASYNC_PIPELINE_TIMEOUT = float(os.getenv('ASYNC_PIPELINE_TIMEOUT', 90))  # Seconds per generation
+    ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', 100))  # Shared by all in-flight generations
+    ASYNC_MAX_KEEPALIVE = int(os.getenv('ASYNC_MAX_KEEPALIVE', 20))
+
+    # Re-prompt for just the missing gifts when the AI reply is short or truncated
+    GIFT_REPROMPT_MISSING = os.getenv('GIFT_REPROMPT_MISSING', 'true').lower() == 'true'
+
+    # Start each gift's image search while the model is still streaming the others
+    OVERLAP_IMAGE_SEARCH = os.getenv('OVERLAP_IMAGE_SEARCH', 'true').lower() == 'true'
+    GIFT_ENRICHMENT_WORKERS = int(os.getenv('GIFT_ENRICHMENT_WORKERS', 8))  # Threads shared by all requests
+    GIFT_ENRICHMENT_TIMEOUT = float(os.getenv('GIFT_ENRICHMENT_TIMEOUT', 45))  # Seconds per request before gifts fall back to no images
+
+    # Query the network image providers concurrently instead of one after another
+    IMAGE_PROVIDER_FANOUT = os.getenv('IMAGE_PROVIDER_FANOUT', 'false').lower() == 'true'
+    IMAGE_FANOUT_WORKERS = int(os.getenv('IMAGE_FANOUT_WORKERS', 16))  # Threads shared by all image searches
+    IMAGE_FANOUT_TIMEOUT = float(os.getenv('IMAGE_FANOUT_TIMEOUT', 20))  # Seconds before slow providers are ignored
+    
+    # Cache of image search results per cleaned search terms; TTL depends on where the images came from
+    IMAGE_CACHE_MAX_ENTRIES = int(os.getenv('IMAGE_CACHE_MAX_ENTRIES', 2048))  # 0 = disabled
+    IMAGE_CACHE_CURATED_TTL = float(os.getenv('IMAGE_CACHE_CURATED_TTL', 604800))  # Curated collections
+    IMAGE_CACHE_API_TTL = float(os.getenv('IMAGE_CACHE_API_TTL', 86400))  # Pixabay, Pexels, Unsplash, Google
+    IMAGE_CACHE_SCRAPED_TTL = float(os.getenv('IMAGE_CACHE_SCRAPED_TTL', 21600))  # Bing and DuckDuckGo
+    IMAGE_CACHE_PLACEHOLDER_TTL = float(os.getenv('IMAGE_CACHE_PLACEHOLDER_TTL', 300))  # Searches that fell back to placeholders
+    IMAGE_CACHE_DISK = os.getenv('IMAGE_CACHE_DISK', 'false').lower() == 'true'  # Also keep results in SQLite across restarts
+    IMAGE_CACHE_PATH = os.getenv('IMAGE_CACHE_PATH', RESULT_STORE_PATH)
+
+    # Admission control for the generation endpoints (rejected with 429 + Retry-After)
+    RATE_LIMIT_PER_MINUTE = float(os.getenv('RATE_LIMIT_PER_MINUTE', 20))  # Per client IP or API key, 0 = unlimited
+    RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 10))
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'memory' (per process) or 'sqlite' (shared)
+    RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH', RESULT_STORE_PATH)
+    TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', 'false').lower() == 'true'  # Use X-Forwarded-For for the client IP
+    MAX_CONCURRENT_GENERATIONS = int(os.getenv('MAX_CONCURRENT_GENERATIONS', 32))  # Per worker process, 0 = unlimited
+    BUSY_RETRY_AFTER = int(os.getenv('BUSY_RETRY_AFTER', 5))  # Retry-After seconds when at the concurrency cap
+
+    # /generate_gifts/batch limits (requests may ask for less, never more)
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 50))
+    BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))  # Default generations in flight per batch
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 8))
+    BATCH_ITEM_TIMEOUT = float(os.getenv('BATCH_ITEM_TIMEOUT', 120))  # Seconds per questionnaire once started
+
+    # Admin endpoints (/admin/*) are disabled unless a token is configured
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
     @staticmethod
     def is_production():
         """Check if running in production environment."""
@@ -108,8 +223,115 @@ if os.getenv('PRODUCTION_URL'):
 CORS(app, origins=cors_origins, supports_credentials=True)
 
 # Results storage system for URL routing
-# In production, this should be moved to a database like Redis or PostgreSQL
-results_store = {}
+# Backend is selected with RESULT_STORE_BACKEND (see result_store.py)
+results_store = create_result_store(app.config)
+
+# Background sweeper that removes expired results (started lazily per worker process)
+result_sweeper = ExpirySweeper(
+    results_store,
+    interval=app.config['RESULT_SWEEP_INTERVAL'],
+    jitter=app.config['RESULT_SWEEP_JITTER']
+)
+
+# Pooled HTTP client for every synchronous outbound call (provider headers are registered below)
+http_client = HTTPClient(
+    pool_maxsize=app.config['HTTP_POOL_MAXSIZE'],
+    connect_timeout=app.config['HTTP_CONNECT_TIMEOUT'],
+    read_timeout=app.config['HTTP_READ_TIMEOUT'],
+    max_throttle_wait=app.config['UPSTREAM_MAX_THROTTLE_WAIT']
+)
+if app.config['BING_REQUESTS_PER_SECOND'] > 0:
+    http_client.limit_rate(
+        [app.config['BING_BASE_URL']],
+        rate=app.config['BING_REQUESTS_PER_SECOND'],
+        burst=app.config['BING_REQUEST_BURST']
+    )
+if app.config['DUCKDUCKGO_REQUESTS_PER_SECOND'] > 0:
+    http_client.limit_rate(
+        [app.config['DUCKDUCKGO_BASE_URL'], app.config['DUCKDUCKGO_HTML_BASE_URL'], app.config['DUCKDUCKGO_API_BASE_URL']],
+        rate=app.config['DUCKDUCKGO_REQUESTS_PER_SECOND'],
+        burst=app.config['DUCKDUCKGO_REQUEST_BURST']
+    )
+
+# Retry policy and per-process circuit breaker for OpenAI calls
+openai_retry_policy = RetryPolicy(
+    max_retries=app.config['OPENAI_MAX_RETRIES'],
+    base_delay=app.config['OPENAI_RETRY_BASE_DELAY'],
+    max_delay=app.config['OPENAI_RETRY_MAX_DELAY'],
+    budget=app.config['OPENAI_RETRY_BUDGET']
+)
+openai_breaker = CircuitBreaker(
+    'openai',
+    failure_threshold=app.config['OPENAI_BREAKER_THRESHOLD'],
+    recovery_timeout=app.config['OPENAI_BREAKER_RECOVERY']
+)
+
+# Concurrent identical questionnaires share one generation (optionally across workers)
+gift_flights = SingleFlight(
+    SQLiteFlightCoordinator(
+        app.config['SINGLE_FLIGHT_PATH'],
+        lease_seconds=app.config['SINGLE_FLIGHT_LEASE_SECONDS']
+    ) if app.config['SINGLE_FLIGHT_SHARED'] else None
+)
+
+# Recently generated gift ideas, so identical questionnaires skip the OpenAI round-trip
+gift_ideas_cache = TTLCache(
+    max_entries=app.config['GIFT_CACHE_MAX_ENTRIES'],
+    ttl=app.config['GIFT_CACHE_TTL']
+)
+
+# Recent image search results, so repeated product terms skip the provider cascade
+IMAGE_CACHE_TIER_TTLS = {
+    'curated': app.config['IMAGE_CACHE_CURATED_TTL'],
+    'api': app.config['IMAGE_CACHE_API_TTL'],
+    'scraped': app.config['IMAGE_CACHE_SCRAPED_TTL'],
+    'placeholder': app.config['IMAGE_CACHE_PLACEHOLDER_TTL']
+}
+image_search_cache = ImageSearchCache(
+    max_entries=app.config['IMAGE_CACHE_MAX_ENTRIES'],
+    max_ttl=max(IMAGE_CACHE_TIER_TTLS.values()),
+    disk=SQLiteImageCache(app.config['IMAGE_CACHE_PATH']) if app.config['IMAGE_CACHE_DISK'] else None
+)
+
+# Per-client token buckets and the cap on generations in flight in this process
+client_rate_limiter = None
+if app.config['RATE_LIMIT_PER_MINUTE'] > 0:
+    if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+        client_rate_limiter = SQLiteRateLimiter(
+            app.config['RATE_LIMIT_PATH'],
+            rate=app.config['RATE_LIMIT_PER_MINUTE'] / 60,
+            burst=app.config['RATE_LIMIT_BURST']
+        )
+    else:
+        client_rate_limiter = KeyedRateLimiter(
+            rate=app.config['RATE_LIMIT_PER_MINUTE'] / 60,
+            burst=app.config['RATE_LIMIT_BURST']
+        )
+generation_slots = ConcurrencyLimiter(app.config['MAX_CONCURRENT_GENERATIONS'])
+
+# Threads that look up images and links for gifts while generation continues
+gift_enrichment_executor = ThreadPoolExecutor(
+    max_workers=app.config['GIFT_ENRICHMENT_WORKERS'],
+    thread_name_prefix='gift-enrichment'
+)
+
+# Threads running the image providers of a fanned-out search
+image_provider_executor = ThreadPoolExecutor(
+    max_workers=app.config['IMAGE_FANOUT_WORKERS'],
+    thread_name_prefix='image-provider'
+)
+
+# Event loop and pooled async HTTP client for the async pipeline, if enabled
+pipeline_runner = None
+if app.config['ASYNC_PIPELINE']:
+    if HTTPX_AVAILABLE:
+        pipeline_runner = AsyncPipelineRunner(
+            max_connections=app.config['ASYNC_MAX_CONNECTIONS'],
+            max_keepalive_connections=app.config['ASYNC_MAX_KEEPALIVE'],
+            timeout=app.config['IMAGE_SEARCH_TIMEOUT']
+        )
+    else:
+        logger.warning("ASYNC_PIPELINE is enabled but httpx is not installed; using the sync pipeline")
 
 def generate_result_id():
     """Generate a unique ID for results."""
@@ -123,45 +345,29 @@ def store_result(questions_answers: dict, gift_ideas: list) -> str:
     while result_id in results_store:
         result_id = generate_result_id()
     
-    results_store[result_id] = {
+    result_sweeper.ensure_started()
+    
+    created_at = datetime.utcnow()
+    results_store.put({
         'id': result_id,
         'questions_answers': questions_answers,
         'gift_ideas': gift_ideas,
-        'created_at': datetime.utcnow(),
-        'expires_at': datetime.utcnow() + timedelta(days=30)  # Results expire after 30 days
-    }
+        'created_at': created_at,
+        'expires_at': created_at + timedelta(days=app.config['RESULT_TTL_DAYS'])  # Results expire after 30 days by default
+    })
     
     logger.info(f"Stored results with ID: {result_id}")
     return result_id
 
 def get_result(result_id: str) -> Optional[dict]:
-    """Retrieve results by ID."""
-    result = results_store.get(result_id)
-    
-    if not result:
-        return None
-    
-    # Check if result has expired
-    if datetime.utcnow() > result['expires_at']:
-        del results_store[result_id]
-        logger.info(f"Expired result {result_id} removed from storage")
-        return None
-    
-    return result
+    """Retrieve results by ID (None if missing or expired)."""
+    return results_store.get(result_id)
 
 def cleanup_expired_results():
-    """Clean up expired results from storage."""
-    now = datetime.utcnow()
-    expired_ids = [
-        result_id for result_id, result_data in results_store.items()
-        if now > result_data['expires_at']
-    ]
-    
-    for result_id in expired_ids:
-        del results_store[result_id]
-        logger.info(f"Cleaned up expired result: {result_id}")
-    
-    logger.info(f"Cleanup complete. Removed {len(expired_ids)} expired results.")
+    """Clean up expired results now (normally done by the background sweeper)."""
+    removed = result_sweeper.run_once()
+    logger.info(f"Cleanup complete. Removed {removed} expired results.")
+    return removed
 
 # Verify OpenAI API key is configured
 if not app.config['OPENAI_API_KEY']:
@@ -187,6 +393,13 @@ REQUIRED_QUESTIONS = [
     'limitations'
 ]
 
+# Fields every gift idea from the AI must have (non-empty)
+CORE_GIFT_FIELDS = ['title', 'description', 'starter', 'reaction']
+
+# Number of gift ideas asked for, and the JSON shape the AI must reply with
+GIFT_IDEA_COUNT = 3
+GIFT_JSON_FORMAT = '{"gift_ideas": [{"title": "Creative gift name", "description": "Detailed psychological reasoning", "starter": "Presentation strategy", "reaction": "Authentic emotional response", "image_search_terms": "2-4 keywords for image search", "amazon_search_query": "Exact Amazon search term", "price_range": "Price range in INR"}]}'
+
 def validate_questionnaire_data(data: Dict[str, Any]) -> tuple[bool, str]:
     """
     Validate incoming questionnaire data.
@@ -242,6 +455,37 @@ def sanitize_input(text: str) -> str:
     
     return sanitized
 
+# Answers built from multi-select chips (comma separated), where order carries no meaning
+LIST_LIKE_QUESTIONS = {'previous_gifts', 'hate', 'complaints', 'complain_about_them', 'limitations'}
+
+def canonicalize_answers(answers: Dict[str, str]) -> Dict[str, str]:
+    """
+    Reduce questionnaire answers to a canonical form for cache lookups.
+    
+    Answers are trimmed, case-folded and whitespace-collapsed; list-like
+    answers are split on commas/semicolons, de-duplicated and sorted, so
+    "Books, chocolate" and "chocolate,books" compare equal.
+    
+    Args:
+        answers: Sanitized questionnaire responses
+        
+    Returns:
+        Canonicalized answers
+    """
+    canonical = {}
+    for question, answer in answers.items():
+        text = ' '.join((answer or '').casefold().split())
+        if question in LIST_LIKE_QUESTIONS:
+            items = {item.strip() for item in text.replace(';', ',').split(',')}
+            text = ', '.join(sorted(item for item in items if item))
+        canonical[question] = text
+    return canonical
+
+def questionnaire_cache_key(answers: Dict[str, str]) -> str:
+    """Build the gift ideas cache key for a set of sanitized answers."""
+    canonical = json.dumps(canonicalize_answers(answers), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
 def create_gift_generation_prompt(answers: Dict[str, str]) -> str:
     """
     Research-backed prompt using psychological principles and CoT reasoning
@@ -488,7 +732,7 @@ def search_unsplash_images(search_terms: str, count: int = 3) -> List[Dict[str,
             'content_filter': 'high'
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, provider='unsplash', headers=headers, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -572,6 +816,45 @@ def search_pixabay_public(search_terms: str, count: int = 3) -> List[Dict[str, A
     """Try public Pixabay endpoints."""
     return []  # Placeholder for now
 
+GOOGLE_CUSTOM_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+def _google_search_params(search_terms: str, count: int, api_key: str, cx: str) -> Dict[str, Any]:
+    return {
+        'key': api_key,
+        'cx': cx,
+        'q': f"{search_terms} product buy",
+        'searchType': 'image',
+        'num': min(count, 10),  # Max 10 per request
+        'imgSize': 'medium',
+        'imgType': 'photo',
+        'safe': 'active',
+        'fields': 'items(title,link,image)'
+    }
+
+def _process_google_results(data: dict, search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Convert Google Custom Search image items into our format."""
+    images = []
+    
+    for item in data.get('items', []):
+        if 'link' in item and 'image' in item:
+            # Filter out low-quality sources
+            image_url = item['link']
+            if not any(bad in image_url.lower() for bad in ['pinterest.com', 'blogspot.com']):
+                images.append({
+                    'url': image_url,
+                    'title': item.get('title', f'{search_terms} - Product {len(images) + 1}'),
+                    'width': item['image'].get('width', 600),
+                    'height': item['image'].get('height', 400),
+                    'thumbnail': item['image'].get('thumbnailLink', image_url),
+                    'source': 'Google Custom Search',
+                    'photographer': 'Web Search Result'
+                })
+                
+                if len(images) >= count:
+                    break
+    
+    return images
+
 def search_google_custom_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
     """
     Search for images using Google Custom Search API (free tier: 100 queries/day).
@@ -595,42 +878,13 @@ def search_google_custom_images(search_terms: str, count: int = 3) -> List[Dict[
             return []
         
         # Google Custom Search API endpoint
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            'key': google_api_key,
-            'cx': google_cx,
-            'q': f"{search_terms} product buy",
-            'searchType': 'image',
-            'num': min(count, 10),  # Max 10 per request
-            'imgSize': 'medium',
-            'imgType': 'photo',
-            'safe': 'active',
-            'fields': 'items(title,link,image)'
-        }
+        url = GOOGLE_CUSTOM_SEARCH_URL
+        params = _google_search_params(search_terms, count, google_api_key, google_cx)
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, provider='google', params=params, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
-            images = []
-            
-            for item in data.get('items', []):
-                if 'link' in item and 'image' in item:
-                    # Filter out low-quality sources
-                    image_url = item['link']
-                    if not any(bad in image_url.lower() for bad in ['pinterest.com', 'blogspot.com']):
-                        images.append({
-                            'url': image_url,
-                            'title': item.get('title', f'{search_terms} - Product {len(images) + 1}'),
-                            'width': item['image'].get('width', 600),
-                            'height': item['image'].get('height', 400),
-                            'thumbnail': item['image'].get('thumbnailLink', image_url),
-                            'source': 'Google Custom Search',
-                            'photographer': 'Web Search Result'
-                        })
-                        
-                        if len(images) >= count:
-                            break
+            images = _process_google_results(response.json(), search_terms, count)
             
             logger.info(f"Google Custom Search found {len(images)} images for '{search_terms}'")
             return images
@@ -910,16 +1164,18 @@ def search_duckduckgo_images(search_terms: str, count: int = 3) -> List[Dict[str
     """
     try:
         # Method 1: Try using duckduckgo-search library if available
-        try:
-            logger.info(f"Attempting DuckDuckGo library search for: '{search_terms}'")
-            images = _search_with_ddg_library(search_terms, count)
-            if images:
-                logger.info(f"✓ Found {len(images)} images using DDG library")
-                return images
-        except ImportError:
-            logger.info("duckduckgo-search library not available, trying manual methods")
-        except Exception as e:
-            logger.warning(f"DDG library search failed: {str(e)}")
+        # (it always talks to duckduckgo.com, so it is skipped when DuckDuckGo is redirected)
+        if app.config['DUCKDUCKGO_BASE_URL'] == 'https://duckduckgo.com':
+            try:
+                logger.info(f"Attempting DuckDuckGo library search for: '{search_terms}'")
+                images = _search_with_ddg_library(search_terms, count)
+                if images:
+                    logger.info(f"✓ Found {len(images)} images using DDG library")
+                    return images
+            except ImportError:
+                logger.info("duckduckgo-search library not available, trying manual methods")
+            except Exception as e:
+                logger.warning(f"DDG library search failed: {str(e)}")
         
         # Method 2: Enhanced manual search with better product targeting
         try:
@@ -994,138 +1250,150 @@ def _search_with_ddg_library(search_terms: str, count: int) -> List[Dict[str, An
         logger.error(f"DDG library error: {str(e)}")
         return []
 
+DDG_MANUAL_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'DNT': '1'
+}
+
+def _ddg_manual_search_variations(search_terms: str) -> List[str]:
+    """Query variations tried in order against the DuckDuckGo instant answers API."""
+    return [
+        f"{search_terms} product",
+        f"{search_terms} buy online",
+        f"{search_terms} shop",
+        f"buy {search_terms}",
+        search_terms  # Original as fallback
+    ]
+
+def _ddg_instant_answer_params(variation: str) -> Dict[str, str]:
+    return {
+        'q': variation,
+        'format': 'json',
+        'no_html': '1',
+        'skip_disambig': '1'
+    }
+
+def _process_ddg_instant_answer(data: dict, search_terms: str) -> List[Dict[str, Any]]:
+    """Turn the image of a DuckDuckGo instant answer (if any) into our format."""
+    # Look for image data in the response
+    if 'Image' in data and data['Image']:
+        return [{
+            'url': data['Image'],
+            'title': data.get('Heading', f'{search_terms} - Product 1'),
+            'width': 600,
+            'height': 400,
+            'thumbnail': data['Image'],
+            'source': 'DuckDuckGo API',
+            'source_url': data.get('FirstURL', ''),
+            'photographer': 'Web Search Result'
+        }]
+    return []
+
 def _search_ddg_manual_enhanced(search_terms: str, count: int) -> List[Dict[str, Any]]:
     """Enhanced manual search with better targeting and retry logic."""
     import requests
     import re
-    import time
-    import random
     from urllib.parse import quote_plus
     
     # Create multiple search variations for better results
-    search_variations = [
-        f"{search_terms} product",
-        f"{search_terms} buy online",
-        f"{search_terms} shop",
-        f"buy {search_terms}",
-        search_terms  # Original as fallback
-    ]
+    search_variations = _ddg_manual_search_variations(search_terms)
     
     for variation in search_variations:
         try:
             logger.info(f"Trying search variation: '{variation}'")
             
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'DNT': '1'
-            })
-            
             # Use DuckDuckGo instant answers API approach
-            search_url = "https://api.duckduckgo.com/"
-            params = {
-                'q': variation,
-                'format': 'json',
-                'no_html': '1',
-                'skip_disambig': '1'
-            }
+            search_url = f"{app.config['DUCKDUCKGO_API_BASE_URL']}/"
+            params = _ddg_instant_answer_params(variation)
             
-            response = session.get(search_url, params=params, timeout=10)
+            response = http_client.get(search_url, provider='duckduckgo_api', params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                # Look for image data in the response
-                if 'Image' in data and data['Image']:
-                    images = []
-                    images.append({
-                        'url': data['Image'],
-                        'title': data.get('Heading', f'{search_terms} - Product 1'),
-                        'width': 600,
-                        'height': 400,
-                        'thumbnail': data['Image'],
-                        'source': 'DuckDuckGo API',
-                        'source_url': data.get('FirstURL', ''),
-                        'photographer': 'Web Search Result'
-                    })
+                images = _process_ddg_instant_answer(response.json(), search_terms)
+                if images:
                     return images
             
-            # Small delay between attempts
-            time.sleep(random.uniform(0.5, 1.0))
-            
         except Exception as e:
             logger.debug(f"Search variation '{variation}' failed: {str(e)}")
             continue
     
     return []
 
-def _search_ddg_web_scraping(search_terms: str, count: int) -> List[Dict[str, Any]]:
-    """Simplified web scraping approach targeting specific e-commerce sites."""
-    import requests
-    import re
-    from urllib.parse import quote_plus
-    
-    # Target e-commerce sites that are likely to have product images
-    ecommerce_sites = [
+DDG_SCRAPING_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+def _ddg_scraping_queries(search_terms: str) -> List[str]:
+    """Site-restricted queries targeting e-commerce sites likely to have product images."""
+    return [
         f"site:amazon.com {search_terms}",
         f"site:ebay.com {search_terms}",
         f"site:etsy.com {search_terms}",
         f"site:alibaba.com {search_terms}",
         f"site:shopify.com {search_terms}"
     ]
+
+def _process_ddg_scraped_html(html: str, search_terms: str, images: List[Dict[str, Any]], count: int) -> None:
+    """Extract image URLs from a DuckDuckGo HTML results page, appending to ``images`` until ``count``."""
+    # Look for image URLs in the HTML response
+    image_patterns = [
+        r'data-src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'url\(["\']([^"\']+\.(?:jpg|jpeg|png|webp)[^"\']*)["\']?\)',
+    ]
     
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-    })
+    found_urls = set()
+    
+    for pattern in image_patterns:
+        matches = re.findall(pattern, html, re.IGNORECASE)
+        for match in matches:
+            clean_url = match.replace('\\/', '/').strip()
+            if (clean_url.startswith('http') and 
+                len(clean_url) > 30 and 
+                not any(bad in clean_url.lower() for bad in ['icon', 'logo', 'avatar', 'thumb'])):
+                found_urls.add(clean_url)
+    
+    # Convert found URLs to our format
+    for i, url in enumerate(list(found_urls)[:count - len(images)]):
+        images.append({
+            'url': url,
+            'title': f'{search_terms} - Product {len(images) + 1}',
+            'width': 600,
+            'height': 400,
+            'thumbnail': url,
+            'source': 'DuckDuckGo Scraping',
+            'photographer': 'Web Search Result'
+        })
+        
+        if len(images) >= count:
+            break
+
+def _search_ddg_web_scraping(search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Simplified web scraping approach targeting specific e-commerce sites."""
+    import requests
+    import re
+    from urllib.parse import quote_plus
+    
+    # Target e-commerce sites that are likely to have product images
+    ecommerce_sites = _ddg_scraping_queries(search_terms)
     
     images = []
     
     for site_query in ecommerce_sites:
         try:
             # Use DuckDuckGo HTML search
-            search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(site_query)}"
+            search_url = f"{app.config['DUCKDUCKGO_HTML_BASE_URL']}/html/?q={quote_plus(site_query)}"
             
-            response = session.get(search_url, timeout=10)
+            response = http_client.get(search_url, provider='duckduckgo_html', timeout=10)
             
             if response.status_code == 200:
-                # Look for image URLs in the HTML response
-                image_patterns = [
-                    r'data-src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                    r'src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                    r'url\(["\']([^"\']+\.(?:jpg|jpeg|png|webp)[^"\']*)["\']?\)',
-                ]
-                
-                found_urls = set()
-                
-                for pattern in image_patterns:
-                    matches = re.findall(pattern, response.text, re.IGNORECASE)
-                    for match in matches:
-                        clean_url = match.replace('\\/', '/').strip()
-                        if (clean_url.startswith('http') and 
-                            len(clean_url) > 30 and 
-                            not any(bad in clean_url.lower() for bad in ['icon', 'logo', 'avatar', 'thumb'])):
-                            found_urls.add(clean_url)
-                
-                # Convert found URLs to our format
-                for i, url in enumerate(list(found_urls)[:count - len(images)]):
-                    images.append({
-                        'url': url,
-                        'title': f'{search_terms} - Product {len(images) + 1}',
-                        'width': 600,
-                        'height': 400,
-                        'thumbnail': url,
-                        'source': 'DuckDuckGo Scraping',
-                        'photographer': 'Web Search Result'
-                    })
-                    
-                    if len(images) >= count:
-                        break
+                _process_ddg_scraped_html(response.text, search_terms, images, count)
                 
                 if len(images) >= count:
                     break
@@ -1142,7 +1410,7 @@ def _extract_vqd_token_traditional(session: requests.Session, search_terms: str)
     from urllib.parse import quote_plus
     
     search_query = quote_plus(search_terms)
-    search_url = f"https://duckduckgo.com/?q={search_query}&iar=images&iax=images&ia=images"
+    search_url = f"{app.config['DUCKDUCKGO_BASE_URL']}/?q={search_query}&iar=images&iax=images&ia=images"
     
     response = session.get(search_url, timeout=15)
     
@@ -1173,7 +1441,7 @@ def _extract_vqd_token_traditional(session: requests.Session, search_terms: str)
 
 def _fetch_images_with_vqd(session: requests.Session, search_terms: str, vqd_token: str, count: int, original_terms: str) -> List[Dict[str, Any]]:
     """Fetch images using vqd token."""
-    api_url = "https://duckduckgo.com/i.js"
+    api_url = f"{app.config['DUCKDUCKGO_BASE_URL']}/i.js"
     params = {
         'l': 'us-en',
         'o': 'json',
@@ -1207,7 +1475,7 @@ def _fetch_images_alternative_api(session: requests.Session, search_terms: str,
     
     # Try the newer API endpoint
     try:
-        search_url = "https://duckduckgo.com/i.js"
+        search_url = f"{app.config['DUCKDUCKGO_BASE_URL']}/i.js"
         params = {
             'q': search_terms,
             'o': 'json',
@@ -1218,7 +1486,7 @@ def _fetch_images_alternative_api(session: requests.Session, search_terms: str,
         }
         
         # First get a basic page to establish session
-        base_url = f"https://duckduckgo.com/?q={quote_plus(search_terms)}&iar=images"
+        base_url = f"{app.config['DUCKDUCKGO_BASE_URL']}/?q={quote_plus(search_terms)}&iar=images"
         session.get(base_url, timeout=10)
         
         time.sleep(1)
@@ -1241,7 +1509,7 @@ def _fetch_images_html_parsing(session: requests.Session, search_terms: str, cou
     import re
     from urllib.parse import quote_plus
     
-    search_url = f"https://duckduckgo.com/?q={quote_plus(search_terms)}&iar=images&iax=images&ia=images"
+    search_url = f"{app.config['DUCKDUCKGO_BASE_URL']}/?q={quote_plus(search_terms)}&iar=images&iax=images&ia=images"
     
     response = session.get(search_url, timeout=15)
     
@@ -1325,6 +1593,106 @@ def _process_ddg_results(data: dict, count: int, original_terms: str) -> List[Di
     logger.info(f"Successfully processed {len(images)} DuckDuckGo images")
     return images
 
+BING_ENHANCED_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0'
+]
+
+def _bing_enhanced_search_variations(search_terms: str) -> List[str]:
+    """Product-focused query variations tried in order by the enhanced Bing search."""
+    return [
+        f"{search_terms} product buy",
+        f"{search_terms} shopping online",
+        f"buy {search_terms} online",
+        f"{search_terms} store",
+        search_terms  # Original as fallback
+    ]
+
+def _bing_enhanced_request(variation: str) -> tuple[str, Dict[str, str]]:
+    """Build the URL and headers for one enhanced Bing search variation."""
+    # Enhanced search query with product focus
+    search_query = quote_plus(f"{variation} -pinterest -tumblr")
+    search_url = f"{app.config['BING_BASE_URL']}/images/search?q={search_query}&FORM=HDRSC2&first=1&count=35"
+    
+    headers = {
+        'User-Agent': random.choice(BING_ENHANCED_USER_AGENTS),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'DNT': '1'
+    }
+    return search_url, headers
+
+def _process_bing_enhanced_results(html: str, search_terms: str, images: List[Dict[str, Any]], count: int) -> None:
+    """Extract product images from an enhanced Bing results page, appending to ``images`` until ``count``."""
+    # Enhanced pattern matching for better image extraction
+    image_patterns = [
+        r'"murl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'"imgurl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'"turl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'data-src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'mediaurl&quot;:&quot;([^&]+\.(?:jpg|jpeg|png|webp)[^&]*)',
+        r'"mediaUrl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"'
+    ]
+    
+    thumbnail_patterns = [
+        r'"turl":"([^"]+)"',
+        r'"thumburl":"([^"]+)"',
+        r'thumbnail["\']?\s*:\s*["\']([^"\']+)["\']'
+    ]
+    
+    found_images = set()
+    found_thumbnails = set()
+    
+    # Extract main image URLs
+    for pattern in image_patterns:
+        urls = re.findall(pattern, html)
+        for url in urls:
+            # Clean and decode URL
+            clean_url = url.replace('\\u002f', '/').replace('\\/', '/').replace('&amp;', '&')
+            if (clean_url.startswith('http') and 
+                len(clean_url) > 20 and
+                any(ext in clean_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']) and
+                not any(bad in clean_url.lower() for bad in ['favicon', 'icon', 'logo', 'avatar', 'pinterest.com', 'blogspot.com'])):
+                found_images.add(clean_url)
+    
+    # Extract thumbnails
+    for pattern in thumbnail_patterns:
+        urls = re.findall(pattern, html)
+        for url in urls:
+            clean_url = url.replace('\\u002f', '/').replace('\\/', '/').replace('&amp;', '&')
+            if clean_url.startswith('http'):
+                found_thumbnails.add(clean_url)
+    
+    # Create image objects with quality filtering
+    thumbnail_list = list(found_thumbnails)
+    for i, image_url in enumerate(list(found_images)[:count * 2]):  # Get extras to filter
+        # Quality check - prefer images from known good domains
+        good_domains = ['amazon.com', 'ebay.com', 'aliexpress.com', 'shopify.com', 'etsy.com', 'walmart.com', 'target.com']
+        is_good_domain = any(domain in image_url.lower() for domain in good_domains)
+        
+        # Basic size check (avoid tiny images)
+        if len(image_url) > 40 or is_good_domain:
+            thumbnail = thumbnail_list[i] if i < len(thumbnail_list) else image_url
+            
+            images.append({
+                'url': image_url,
+                'title': f"{search_terms} - Product {len(images) + 1}",
+                'width': 600,
+                'height': 400,
+                'thumbnail': thumbnail,
+                'source': 'Bing Images Enhanced',
+                'photographer': 'Web Search Result',
+                'quality_score': 2 if is_good_domain else 1
+            })
+            
+            if len(images) >= count:
+                break
+
 def search_bing_images_enhanced(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
     """
     Enhanced Bing image search with better product targeting and multiple strategies.
@@ -1344,14 +1712,7 @@ def search_bing_images_enhanced(search_terms: str, count: int = 3) -> List[Dict[
         import time
         import random
         
-        # Create product-focused search variations
-        search_variations = [
-            f"{search_terms} product buy",
-            f"{search_terms} shopping online",
-            f"buy {search_terms} online",
-            f"{search_terms} store",
-            search_terms  # Original as fallback
-        ]
+        search_variations = _bing_enhanced_search_variations(search_terms)
         
         images = []
         
@@ -1362,94 +1723,11 @@ def search_bing_images_enhanced(search_terms: str, count: int = 3) -> List[Dict[
             try:
                 logger.info(f"Trying Bing search variation: '{variation}'")
                 
-                # Enhanced search query with product focus
-                search_query = quote_plus(f"{variation} -pinterest -tumblr")
-                search_url = f"https://www.bing.com/images/search?q={search_query}&FORM=HDRSC2&first=1&count=35"
-                
-                headers = {
-                    'User-Agent': random.choice([
-                        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-                        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-                        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0'
-                    ]),
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'DNT': '1'
-                }
-                
-                response = requests.get(search_url, headers=headers, timeout=15)
+                search_url, headers = _bing_enhanced_request(variation)
+                response = http_client.get(search_url, provider='bing', headers=headers, timeout=15)
                 
                 if response.status_code == 200:
-                    # Enhanced pattern matching for better image extraction
-                    image_patterns = [
-                        r'"murl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                        r'"imgurl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                        r'"turl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                        r'data-src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                        r'src="([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                        r'mediaurl&quot;:&quot;([^&]+\.(?:jpg|jpeg|png|webp)[^&]*)',
-                        r'"mediaUrl":"([^"]+\.(?:jpg|jpeg|png|webp)[^"]*)"'
-                    ]
-                    
-                    thumbnail_patterns = [
-                        r'"turl":"([^"]+)"',
-                        r'"thumburl":"([^"]+)"',
-                        r'thumbnail["\']?\s*:\s*["\']([^"\']+)["\']'
-                    ]
-                    
-                    found_images = set()
-                    found_thumbnails = set()
-                    
-                    # Extract main image URLs
-                    for pattern in image_patterns:
-                        urls = re.findall(pattern, response.text)
-                        for url in urls:
-                            # Clean and decode URL
-                            clean_url = url.replace('\\u002f', '/').replace('\\/', '/').replace('&amp;', '&')
-                            if (clean_url.startswith('http') and 
-                                len(clean_url) > 20 and
-                                any(ext in clean_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']) and
-                                not any(bad in clean_url.lower() for bad in ['favicon', 'icon', 'logo', 'avatar', 'pinterest.com', 'blogspot.com'])):
-                                found_images.add(clean_url)
-                    
-                    # Extract thumbnails
-                    for pattern in thumbnail_patterns:
-                        urls = re.findall(pattern, response.text)
-                        for url in urls:
-                            clean_url = url.replace('\\u002f', '/').replace('\\/', '/').replace('&amp;', '&')
-                            if clean_url.startswith('http'):
-                                found_thumbnails.add(clean_url)
-                    
-                    # Create image objects with quality filtering
-                    thumbnail_list = list(found_thumbnails)
-                    for i, image_url in enumerate(list(found_images)[:count * 2]):  # Get extras to filter
-                        # Quality check - prefer images from known good domains
-                        good_domains = ['amazon.com', 'ebay.com', 'aliexpress.com', 'shopify.com', 'etsy.com', 'walmart.com', 'target.com']
-                        is_good_domain = any(domain in image_url.lower() for domain in good_domains)
-                        
-                        # Basic size check (avoid tiny images)
-                        if len(image_url) > 40 or is_good_domain:
-                            thumbnail = thumbnail_list[i] if i < len(thumbnail_list) else image_url
-                            
-                            images.append({
-                                'url': image_url,
-                                'title': f"{search_terms} - Product {len(images) + 1}",
-                                'width': 600,
-                                'height': 400,
-                                'thumbnail': thumbnail,
-                                'source': 'Bing Images Enhanced',
-                                'photographer': 'Web Search Result',
-                                'quality_score': 2 if is_good_domain else 1
-                            })
-                            
-                            if len(images) >= count:
-                                break
-                
-                # Add delay between search variations
-                time.sleep(random.uniform(0.5, 1.5))
+                    _process_bing_enhanced_results(response.text, search_terms, images, count)
                 
             except Exception as e:
                 logger.debug(f"Bing search variation '{variation}' failed: {str(e)}")
@@ -1467,6 +1745,80 @@ def search_bing_images_enhanced(search_terms: str, count: int = 3) -> List[Dict[
         logger.error(f"Error in enhanced Bing search: {str(e)}")
         return []
 
+def _bing_request(search_terms: str) -> tuple[str, Dict[str, str]]:
+    """Build the URL and headers for the basic Bing image search."""
+    # Bing image search URL with more specific product search
+    search_query = quote_plus(f"{search_terms} product buy shopping")
+    search_url = f"{app.config['BING_BASE_URL']}/images/search?q={search_query}&FORM=HDRSC2&first=1"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    }
+    return search_url, headers
+
+def _process_bing_results(html: str, search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Extract product images from a basic Bing results page."""
+    # Multiple patterns to extract image data
+    patterns = [
+        r'"murl":"([^"]+)"',
+        r'"imgurl":"([^"]+)"',
+        r'data-src="([^"]*\.(?:jpg|jpeg|png|webp)[^"]*)"',
+        r'src="([^"]*\.(?:jpg|jpeg|png|webp)[^"]*)"'
+    ]
+    
+    thumbnail_patterns = [
+        r'"turl":"([^"]+)"',
+        r'"thumburl":"([^"]+)"'
+    ]
+    
+    image_urls = []
+    thumbnail_urls = []
+    
+    # Try each pattern
+    for pattern in patterns:
+        urls = re.findall(pattern, html)
+        if urls:
+            # Clean and decode URLs
+            for url in urls:
+                clean_url = url.replace('\\u002f', '/').replace('\\//', '//')
+                if clean_url.startswith('http') and any(ext in clean_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
+                    image_urls.append(clean_url)
+            if len(image_urls) >= count:
+                break
+    
+    # Get thumbnails
+    for pattern in thumbnail_patterns:
+        thumb_urls = re.findall(pattern, html)
+        if thumb_urls:
+            for url in thumb_urls:
+                clean_url = url.replace('\\u002f', '/').replace('\\//', '//')
+                if clean_url.startswith('http'):
+                    thumbnail_urls.append(clean_url)
+            if len(thumbnail_urls) >= count:
+                break
+    
+    # Create image objects
+    images = []
+    for i in range(min(count, len(image_urls))):
+        thumbnail = thumbnail_urls[i] if i < len(thumbnail_urls) else image_urls[i]
+        
+        images.append({
+            'url': image_urls[i],
+            'title': f"{search_terms} - Product {i + 1}",
+            'width': 600,
+            'height': 400,
+            'thumbnail': thumbnail,
+            'source': 'Bing Images',
+            'photographer': 'Web Search Result'
+        })
+    
+    return images
+
 def search_bing_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
     """
     Search for real product images using Bing image search (no API key required).
@@ -1484,75 +1836,11 @@ def search_bing_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]
         import re
         import json
         
-        # Bing image search URL with more specific product search
-        search_query = quote_plus(f"{search_terms} product buy shopping")
-        search_url = f"https://www.bing.com/images/search?q={search_query}&FORM=HDRSC2&first=1"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=15)
+        search_url, headers = _bing_request(search_terms)
+        response = http_client.get(search_url, provider='bing', headers=headers, timeout=15)
         
         if response.status_code == 200:
-            # Multiple patterns to extract image data
-            patterns = [
-                r'"murl":"([^"]+)"',
-                r'"imgurl":"([^"]+)"',
-                r'data-src="([^"]*\.(?:jpg|jpeg|png|webp)[^"]*)"',
-                r'src="([^"]*\.(?:jpg|jpeg|png|webp)[^"]*)"'
-            ]
-            
-            thumbnail_patterns = [
-                r'"turl":"([^"]+)"',
-                r'"thumburl":"([^"]+)"'
-            ]
-            
-            image_urls = []
-            thumbnail_urls = []
-            
-            # Try each pattern
-            for pattern in patterns:
-                urls = re.findall(pattern, response.text)
-                if urls:
-                    # Clean and decode URLs
-                    for url in urls:
-                        clean_url = url.replace('\\u002f', '/').replace('\\//', '//')
-                        if clean_url.startswith('http') and any(ext in clean_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
-                            image_urls.append(clean_url)
-                    if len(image_urls) >= count:
-                        break
-            
-            # Get thumbnails
-            for pattern in thumbnail_patterns:
-                thumb_urls = re.findall(pattern, response.text)
-                if thumb_urls:
-                    for url in thumb_urls:
-                        clean_url = url.replace('\\u002f', '/').replace('\\//', '//')
-                        if clean_url.startswith('http'):
-                            thumbnail_urls.append(clean_url)
-                    if len(thumbnail_urls) >= count:
-                        break
-            
-            # Create image objects
-            images = []
-            for i in range(min(count, len(image_urls))):
-                thumbnail = thumbnail_urls[i] if i < len(thumbnail_urls) else image_urls[i]
-                
-                images.append({
-                    'url': image_urls[i],
-                    'title': f"{search_terms} - Product {i + 1}",
-                    'width': 600,
-                    'height': 400,
-                    'thumbnail': thumbnail,
-                    'source': 'Bing Images',
-                    'photographer': 'Web Search Result'
-                })
+            images = _process_bing_results(response.text, search_terms, count)
             
             if images:
                 logger.info(f"Found {len(images)} real product images from Bing for '{search_terms}'")
@@ -1567,11 +1855,41 @@ def search_bing_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]
         logger.error(f"Error searching Bing images: {str(e)}")
         return []
 
-def generate_pixabay_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
-    """
-    Use Pixabay API (free, no auth required for basic usage).
-    
-    Args:
+def _pixabay_params(search_terms: str, count: int) -> Dict[str, Any]:
+    return {
+        'q': search_terms,
+        'image_type': 'photo',
+        'orientation': 'horizontal',
+        'category': 'objects',
+        'min_width': 300,
+        'min_height': 200,
+        'per_page': min(count, 20),
+        'safesearch': 'true'
+    }
+
+def _process_pixabay_results(data: dict, search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Convert Pixabay API hits into our format."""
+    images = []
+    
+    for photo in data.get('hits', [])[:count]:
+        images.append({
+            'url': photo['webformatURL'],
+            'title': photo.get('tags', search_terms),
+            'width': photo.get('webformatWidth', 400),
+            'height': photo.get('webformatHeight', 300),
+            'thumbnail': photo.get('previewURL', photo['webformatURL']),
+            'source': 'Pixabay',
+            'photographer': photo.get('user', 'Unknown'),
+            'photographer_url': f"https://pixabay.com/users/{photo.get('user', '')}-{photo.get('user_id', '')}"
+        })
+    
+    return images
+
+def generate_pixabay_images(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """
+    Use Pixabay API (free, no auth required for basic usage).
+    
+    Args:
         search_terms: Search terms for images
         count: Number of images to generate
         
@@ -1582,35 +1900,13 @@ def generate_pixabay_images(search_terms: str, count: int = 3) -> List[Dict[str,
         import requests
         
         # Pixabay public API (no key needed for basic usage)
-        url = 'https://pixabay.com/api/'
-        params = {
-            'q': search_terms,
-            'image_type': 'photo',
-            'orientation': 'horizontal',
-            'category': 'objects',
-            'min_width': 300,
-            'min_height': 200,
-            'per_page': min(count, 20),
-            'safesearch': 'true'
-        }
+        url = f"{app.config['PIXABAY_BASE_URL']}/api/"
+        params = _pixabay_params(search_terms, count)
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, provider='pixabay', params=params, timeout=15)
         
         if response.status_code == 200:
-            data = response.json()
-            images = []
-            
-            for photo in data.get('hits', [])[:count]:
-                images.append({
-                    'url': photo['webformatURL'],
-                    'title': photo.get('tags', search_terms),
-                    'width': photo.get('webformatWidth', 400),
-                    'height': photo.get('webformatHeight', 300),
-                    'thumbnail': photo.get('previewURL', photo['webformatURL']),
-                    'source': 'Pixabay',
-                    'photographer': photo.get('user', 'Unknown'),
-                    'photographer_url': f"https://pixabay.com/users/{photo.get('user', '')}-{photo.get('user_id', '')}"
-                })
+            images = _process_pixabay_results(response.json(), search_terms, count)
             
             logger.info(f"Found {len(images)} real Pixabay images for '{search_terms}'")
             return images
@@ -1675,7 +1971,7 @@ def search_pexels_images(search_terms: str, count: int = 3) -> List[Dict[str, An
             return generate_pexels_demo_images(search_terms, count)
         
         # Use official Pexels API with API key
-        url = 'https://api.pexels.com/v1/search'
+        url = f"{app.config['PEXELS_BASE_URL']}/search"
         headers = {'Authorization': api_key}
         params = {
             'query': search_terms,
@@ -1683,7 +1979,7 @@ def search_pexels_images(search_terms: str, count: int = 3) -> List[Dict[str, An
             'orientation': 'square'
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, provider='pexels', headers=headers, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -1726,7 +2022,7 @@ def generate_pexels_demo_images(search_terms: str, count: int = 3) -> List[Dict[
         import requests
         
         # Try Pexels API without authentication first
-        url = 'https://api.pexels.com/v1/search'
+        url = f"{app.config['PEXELS_BASE_URL']}/search"
         headers = {
             'User-Agent': 'Ruby\'s Gifts App (https://rubysgifts.kks.im)'
         }
@@ -1737,7 +2033,7 @@ def generate_pexels_demo_images(search_terms: str, count: int = 3) -> List[Dict[
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = http_client.get(url, provider='pexels', headers=headers, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1768,10 +2064,172 @@ def generate_pexels_demo_images(search_terms: str, count: int = 3) -> List[Dict[
         logger.error(f"Error with Pexels search: {str(e)}")
         return []
 
+# Cache tier of each image source (anything else is a scraped search engine)
+IMAGE_SOURCE_TIERS = {
+    'Curated Product Collection': 'curated',
+    'Improved Curated Collection': 'curated',
+    'Pixabay': 'api',
+    'Pexels': 'api',
+    'Unsplash': 'api',
+    'Google Custom Search': 'api',
+    'Lorem Picsum': 'placeholder',
+    'Placeholder': 'placeholder',
+    'Enhanced Placeholder': 'placeholder'
+}
+
+def image_cache_ttl(images: List[Dict[str, Any]]) -> float:
+    """Seconds to cache a search result: the TTL of its shortest-lived source tier."""
+    tiers = {IMAGE_SOURCE_TIERS.get(image.get('source'), 'scraped') for image in images} or {'placeholder'}
+    return min(IMAGE_CACHE_TIER_TTLS[tier] for tier in tiers)
+
+def finish_image_search(search_terms: str, cleaned_terms: str, images: List[Dict[str, Any]], count: int,
+                        upstream_calls: int = 0) -> List[Dict[str, Any]]:
+    """
+    Top up network search results with curated and placeholder images, and
+    cache the final result in image_search_cache.
+    
+    Args:
+        search_terms: Original search terms (used for placeholders)
+        cleaned_terms: clean_search_terms() output (used for curated lookups)
+        images: Images found by the network providers so far
+        count: Number of images wanted
+        upstream_calls: Network providers queried (what a cache hit will save)
+        
+    Returns:
+        At most ``count`` images
+    """
+    # FALLBACK 2: Use improved curated product images with real URLs
+    if len(images) < count:
+        try:
+            logger.info(f"Using improved curated product images for '{cleaned_terms}'")
+            curated_images = get_improved_curated_images(cleaned_terms, count - len(images))
+            if curated_images:
+                images.extend(curated_images)
+                logger.info(f"Added {len(curated_images)} improved curated images")
+        except Exception as e:
+            logger.warning(f"Improved curated images failed: {str(e)}")
+    
+    # FALLBACK 3: Traditional curated images as last resort
+    if len(images) < count:
+        try:
+            logger.info(f"Using traditional curated images as final fallback for '{cleaned_terms}'")
+            curated_images = get_curated_product_images(cleaned_terms, count - len(images))
+            if curated_images:
+                images.extend(curated_images)
+                logger.info(f"Added {len(curated_images)} traditional curated images")
+        except Exception as e:
+            logger.warning(f"Traditional curated images failed: {str(e)}")
+    
+    # FINAL FALLBACK: Enhanced placeholder images
+    if len(images) < count and app.config.get('USE_PLACEHOLDER_FALLBACK', True):
+        remaining = count - len(images)
+        placeholder_images = generate_enhanced_placeholder_images(search_terms, remaining)
+        images.extend(placeholder_images)
+        logger.info(f"Added {len(placeholder_images)} placeholder images as final fallback")
+    
+    # Log final results
+    source_breakdown = {}
+    for img in images:
+        source = img.get('source', 'Unknown')
+        source_breakdown[source] = source_breakdown.get(source, 0) + 1
+    
+    logger.info(f"✓ Successfully found {len(images)} total images for '{search_terms}' | Sources: {source_breakdown}")
+    images = images[:count]  # Ensure we don't exceed requested count
+    image_search_cache.set(cleaned_terms, count, images, image_cache_ttl(images), upstream_calls)
+    return images
+
+# Default headers sent with each provider's requests through http_client
+JSON_API_HEADERS = {'Accept': 'application/json'}
+http_client.register_provider('openai', {"Content-Type": "application/json"})
+http_client.register_provider('duckduckgo_api', DDG_MANUAL_HEADERS)
+http_client.register_provider('duckduckgo_html', DDG_SCRAPING_HEADERS)
+http_client.register_provider('pixabay', JSON_API_HEADERS)
+http_client.register_provider('pexels', JSON_API_HEADERS)
+http_client.register_provider('unsplash', JSON_API_HEADERS)
+http_client.register_provider('google', JSON_API_HEADERS)
+
+# Network image providers in the order search_images_for_gift() tries them
+IMAGE_PROVIDERS = [
+    ('Bing Enhanced', search_bing_images_enhanced),
+    ('DuckDuckGo', search_duckduckgo_images),
+    ('Bing', search_bing_images),
+    ('Pixabay', generate_pixabay_images),
+    ('Google Custom Search', search_google_custom_images)
+]
+
+def search_network_images_fanout(cleaned_terms: str, count: int) -> List[Dict[str, Any]]:
+    """
+    Query every network image provider at once and merge in priority order.
+    
+    Each provider is asked for ``count`` images on image_provider_executor.
+    Results are merged in IMAGE_PROVIDERS order, so the outcome matches the
+    sequential cascade: as soon as the providers ranked above every
+    still-running one have supplied ``count`` images, the rest are cancelled
+    (if not started yet) or left to finish in the background, their results
+    discarded. Providers still running after IMAGE_FANOUT_TIMEOUT are skipped.
+    
+    Args:
+        cleaned_terms: clean_search_terms() output
+        count: Number of images wanted
+        
+    Returns:
+        At most ``count`` images from the network providers (may be fewer)
+    """
+    started = time.time()
+    deadline = started + app.config['IMAGE_FANOUT_TIMEOUT']
+    
+    futures = [image_provider_executor.submit(provider, cleaned_terms, count) for _, provider in IMAGE_PROVIDERS]
+    pending = set(futures)
+    
+    def merge(stop_at_pending: bool) -> List[Dict[str, Any]]:
+        # Images from finished providers in priority order, de-duplicated by URL
+        merged, seen = [], set()
+        for (name, _), future in zip(IMAGE_PROVIDERS, futures):
+            if future in pending:
+                if stop_at_pending:
+                    break
+                continue
+            try:
+                found = future.result() or []
+            except Exception as e:
+                logger.warning(f"{name} image search failed: {str(e)}")
+                found = []
+            for image in found:
+                if image.get('url') not in seen:
+                    seen.add(image.get('url'))
+                    merged.append(image)
+        return merged
+    
+    images = []
+    while pending:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        images = merge(stop_at_pending=True)
+        if len(images) >= count:
+            break
+    
+    if pending:
+        waiting_on = [name for (name, _), future in zip(IMAGE_PROVIDERS, futures) if future in pending]
+        for future in pending:
+            future.cancel()
+        if len(images) < count:
+            logger.warning(f"Image providers timed out for '{cleaned_terms}': {', '.join(waiting_on)}")
+            images = merge(stop_at_pending=False)
+        else:
+            logger.info(f"Ignoring slower image providers for '{cleaned_terms}': {', '.join(waiting_on)}")
+    
+    logger.info(f"Fan-out image search for '{cleaned_terms}' found {len(images)} images in {time.time() - started:.2f}s")
+    return images[:count]
+
 def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
     """
     Search for real product images prioritizing DuckDuckGo image search.
     Falls back through multiple services: DuckDuckGo -> Bing -> Pixabay -> Placeholders.
+    With IMAGE_PROVIDER_FANOUT the network services are queried concurrently
+    instead (see search_network_images_fanout).
+    Results are cached per cleaned search terms and count (image_search_cache).
     
     Args:
         search_terms: Keywords to search for images
@@ -1785,10 +2243,21 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
         cleaned_terms = clean_search_terms(search_terms)
         logger.info(f"Searching for real product images: '{search_terms}' (cleaned: '{cleaned_terms}')")
         
+        cached_images = image_search_cache.get(cleaned_terms, count)
+        if cached_images is not None:
+            logger.info(f"Image cache hit for '{cleaned_terms}'")
+            return cached_images
+        
+        if app.config['IMAGE_PROVIDER_FANOUT']:
+            images = search_network_images_fanout(cleaned_terms, count)
+            return finish_image_search(search_terms, cleaned_terms, images, count, len(IMAGE_PROVIDERS))
+        
         images = []
+        upstream_calls = 0
         
         # PRIMARY: Try enhanced Bing image search for real products (most reliable)
         if len(images) < count:
+            upstream_calls += 1
             try:
                 logger.info(f"Attempting enhanced Bing image search for '{cleaned_terms}'")
                 bing_images = search_bing_images_enhanced(cleaned_terms, count - len(images))
@@ -1802,6 +2271,7 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
         
         # SECONDARY: Try DuckDuckGo image search for real products
         if len(images) < count:
+            upstream_calls += 1
             try:
                 logger.info(f"Attempting DuckDuckGo image search for '{cleaned_terms}'")
                 duckduckgo_images = search_duckduckgo_images(cleaned_terms, count - len(images))
@@ -1815,6 +2285,7 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
         
         # TERTIARY: Try original Bing search as backup
         if len(images) < count:
+            upstream_calls += 1
             try:
                 logger.info(f"Attempting original Bing image search for '{cleaned_terms}'")
                 bing_images = search_bing_images(cleaned_terms, count - len(images))
@@ -1828,6 +2299,7 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
         
         # TERTIARY: Try Pixabay for real product photos
         if len(images) < count:
+            upstream_calls += 1
             try:
                 logger.info(f"Attempting Pixabay search for '{cleaned_terms}'")
                 pixabay_images = generate_pixabay_images(cleaned_terms, count - len(images))
@@ -1841,6 +2313,7 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
         
         # FALLBACK 1: Try Google Custom Search if configured
         if len(images) < count:
+            upstream_calls += 1
             try:
                 logger.info(f"Attempting Google Custom Search for '{cleaned_terms}'")
                 google_images = search_google_custom_images(cleaned_terms, count - len(images))
@@ -1852,43 +2325,7 @@ def search_images_for_gift(search_terms: str, count: int = 3) -> List[Dict[str,
             except Exception as e:
                 logger.warning(f"Google Custom Search failed: {str(e)}")
         
-        # FALLBACK 2: Use improved curated product images with real URLs
-        if len(images) < count:
-            try:
-                logger.info(f"Using improved curated product images for '{cleaned_terms}'")
-                curated_images = get_improved_curated_images(cleaned_terms, count - len(images))
-                if curated_images:
-                    images.extend(curated_images)
-                    logger.info(f"Added {len(curated_images)} improved curated images")
-            except Exception as e:
-                logger.warning(f"Improved curated images failed: {str(e)}")
-        
-        # FALLBACK 3: Traditional curated images as last resort
-        if len(images) < count:
-            try:
-                logger.info(f"Using traditional curated images as final fallback for '{cleaned_terms}'")
-                curated_images = get_curated_product_images(cleaned_terms, count - len(images))
-                if curated_images:
-                    images.extend(curated_images)
-                    logger.info(f"Added {len(curated_images)} traditional curated images")
-            except Exception as e:
-                logger.warning(f"Traditional curated images failed: {str(e)}")
-        
-        # FINAL FALLBACK: Enhanced placeholder images
-        if len(images) < count and app.config.get('USE_PLACEHOLDER_FALLBACK', True):
-            remaining = count - len(images)
-            placeholder_images = generate_enhanced_placeholder_images(search_terms, remaining)
-            images.extend(placeholder_images)
-            logger.info(f"Added {len(placeholder_images)} placeholder images as final fallback")
-        
-        # Log final results
-        source_breakdown = {}
-        for img in images:
-            source = img.get('source', 'Unknown')
-            source_breakdown[source] = source_breakdown.get(source, 0) + 1
-        
-        logger.info(f"✓ Successfully found {len(images)} total images for '{search_terms}' | Sources: {source_breakdown}")
-        return images[:count]  # Ensure we don't exceed requested count
+        return finish_image_search(search_terms, cleaned_terms, images, count, upstream_calls)
         
     except Exception as e:
         logger.error(f"Unexpected error in image search: {str(e)}")
@@ -2077,6 +2514,44 @@ def generate_direct_product_link(search_query: str) -> Optional[str]:
         logger.error(f"Error generating direct product link: {str(e)}")
         return None
 
+def attach_images_and_links(gift: Dict[str, Any], images: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Copy a gift idea with its images and an Amazon affiliate link added.
+    
+    Args:
+        gift: Gift dictionary from OpenAI response
+        images: Images found for the gift
+        
+    Returns:
+        Enhanced gift dictionary
+    """
+    amazon_search_query = gift.get('amazon_search_query', gift.get('title', ''))
+    
+    # Try to generate a direct product link first, fallback to search link
+    amazon_link = generate_direct_product_link(amazon_search_query)
+    if not amazon_link:
+        amazon_link = generate_amazon_affiliate_link(amazon_search_query)
+    
+    # Add new fields to the gift
+    enhanced_gift = gift.copy()
+    enhanced_gift['images'] = images
+    enhanced_gift['amazon_link'] = amazon_link
+    
+    # Ensure all required fields are present
+    if 'price_range' not in enhanced_gift:
+        enhanced_gift['price_range'] = 'Price varies'
+    
+    logger.info(f"Enhanced gift '{gift.get('title', 'Unknown')}' with {len(images)} images")
+    return enhanced_gift
+
+def fallback_enhanced_gift(gift: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the original gift with empty images and a basic Amazon link."""
+    fallback_gift = gift.copy()
+    fallback_gift['images'] = []
+    fallback_gift['amazon_link'] = generate_amazon_affiliate_link(gift.get('title', ''))
+    fallback_gift['price_range'] = gift.get('price_range', 'Price varies')
+    return fallback_gift
+
 def process_gift_with_images_and_links(gift: Dict[str, Any]) -> Dict[str, Any]:
     """
     Process a single gift idea by adding images and Amazon affiliate links.
@@ -2090,49 +2565,62 @@ def process_gift_with_images_and_links(gift: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # Extract search terms from the gift data
         image_search_terms = gift.get('image_search_terms', gift.get('title', ''))
-        amazon_search_query = gift.get('amazon_search_query', gift.get('title', ''))
         
         # Search for images
         images = search_images_for_gift(image_search_terms, app.config['IMAGE_SEARCH_COUNT'])
         
-        # Try to generate a direct product link first, fallback to search link
-        amazon_link = generate_direct_product_link(amazon_search_query)
-        if not amazon_link:
-            amazon_link = generate_amazon_affiliate_link(amazon_search_query)
-        
-        # Add new fields to the gift
-        enhanced_gift = gift.copy()
-        enhanced_gift['images'] = images
-        enhanced_gift['amazon_link'] = amazon_link
-        
-        # Ensure all required fields are present
-        if 'price_range' not in enhanced_gift:
-            enhanced_gift['price_range'] = 'Price varies'
-        
-        logger.info(f"Enhanced gift '{gift.get('title', 'Unknown')}' with {len(images)} images")
-        return enhanced_gift
+        return attach_images_and_links(gift, images)
         
     except Exception as e:
         logger.error(f"Error processing gift with images: {str(e)}")
-        # Return original gift with empty images and basic Amazon link
-        fallback_gift = gift.copy()
-        fallback_gift['images'] = []
-        fallback_gift['amazon_link'] = generate_amazon_affiliate_link(gift.get('title', ''))
-        fallback_gift['price_range'] = gift.get('price_range', 'Price varies')
-        return fallback_gift
+        return fallback_enhanced_gift(gift)
 
-def generate_gift_ideas(answers: Dict[str, str]) -> Dict[str, Any]:
+def submit_gift_enrichment(gifts: List[Dict[str, Any]], enrichment: Optional[List[Optional[Future]]] = None) -> List[Future]:
     """
-    Generate gift ideas using OpenAI API via direct HTTP calls (Vercel-compatible).
+    Start image search and link generation for every gift not already under way.
     
     Args:
-        answers: Dictionary containing sanitized questionnaire responses
+        gifts: Validated gift ideas
+        enrichment: Futures already started for some gifts (None entries are started here)
         
     Returns:
-        Dictionary containing generated gift ideas
+        One future per gift, resolving to the enhanced gift
+    """
+    enrichment = list(enrichment or [])
+    enrichment += [None] * (len(gifts) - len(enrichment))
+    return [
+        future if future is not None else gift_enrichment_executor.submit(process_gift_with_images_and_links, gift)
+        for gift, future in zip(gifts, enrichment)
+    ]
+
+def enriched_gift_result(index: int, gift: Dict[str, Any], future: Future, deadline: float) -> Dict[str, Any]:
+    """
+    Wait for one gift's enrichment until the request deadline.
+    
+    Args:
+        index: Position of the gift (for log messages)
+        gift: The gift being enriched
+        future: Future from submit_gift_enrichment()
+        deadline: time.time() by which all of the request's gifts must be done
         
+    Returns:
+        The enhanced gift, or fallback_enhanced_gift() if it failed or ran out of time
+    """
+    try:
+        return future.result(timeout=max(0.0, deadline - time.time()))
+    except FutureTimeoutError:
+        future.cancel()
+        logger.warning(f"Image search for gift {index+1} missed the request deadline; using fallback")
+    except Exception as e:
+        logger.error(f"Failed to process gift {index+1}: {str(e)}")
+    return fallback_enhanced_gift(gift)
+
+def get_openai_headers() -> Dict[str, str]:
+    """
+    Build the OpenAI request headers.
+    
     Raises:
-        Exception: If OpenAI API call fails
+        Exception: If no API key is configured
     """
     # Check if API key is available
     api_key = app.config.get('OPENAI_API_KEY')
@@ -2141,61 +2629,195 @@ def generate_gift_ideas(answers: Dict[str, str]) -> Dict[str, Any]:
         raise Exception("AI service not configured properly.")
     
     # Strip any whitespace/newlines from API key
-    api_key = api_key.strip()
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key.strip()}"
+    }
+
+def build_gift_completion_payload(answers: Dict[str, str], stream: bool = False, count: int = GIFT_IDEA_COUNT,
+                                  exclude_titles: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Build the chat completions request body for a questionnaire.
+    
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        stream: Request a server-sent events stream of content deltas
+        count: Number of gift ideas to ask for
+        exclude_titles: Gifts already suggested, when asking for the missing ones
+        
+    Returns:
+        JSON payload for the chat completions API
+    """
+    prompt = create_gift_generation_prompt(answers)
+    payload = {
+        "model": "gpt-3.5-turbo",
+        "messages": [
+            {
+                "role": "system", 
+                "content": f"You are a world-class gift psychology expert. Apply step-by-step analytical thinking and respond with valid JSON containing exactly {count} gift ideas in this format: {GIFT_JSON_FORMAT}"
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ],
+        "max_tokens": 1500,
+        "temperature": 0.7
+    }
+    if exclude_titles:
+        payload["messages"].append({
+            "role": "user",
+            "content": f"You already suggested: {'; '.join(exclude_titles)}. Suggest {count} different gift ideas in the same JSON format."
+        })
+    if stream:
+        payload["stream"] = True
+    return payload
+
+def post_chat_completion(headers: Dict[str, str], payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+    """
+    POST to the chat completions API with retries and the OpenAI circuit breaker.
+    
+    Raises:
+        CircuitOpenError: If OpenAI has been failing and the breaker is open
+        requests.exceptions.RequestException: If the final attempt failed
+    """
+    return call_with_resilience(
+        lambda: http_client.post(
+            f"{app.config['OPENAI_BASE_URL']}/chat/completions",
+            provider='openai',
+            headers=headers,
+            json=payload,
+            timeout=25,  # With stream=True this applies per read
+            stream=stream
+        ),
+        openai_retry_policy,
+        openai_breaker,
+        name='OpenAI'
+    )
+
+def is_complete_gift(gift: Any) -> bool:
+    """True if a gift idea has every core field filled in."""
+    return isinstance(gift, dict) and all(gift.get(field) for field in CORE_GIFT_FIELDS)
+
+def keep_complete_gifts(gift_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop incomplete gift ideas, as long as at least one complete gift remains.
+    
+    Otherwise the data is returned unchanged so validation reports the problem.
+    """
+    gifts = gift_data.get('gift_ideas')
+    if isinstance(gifts, list):
+        complete = [gift for gift in gifts if is_complete_gift(gift)]
+        if complete and len(complete) < len(gifts):
+            logger.warning(f"Dropping {len(gifts) - len(complete)} incomplete gift ideas")
+            gift_data['gift_ideas'] = complete
+    return gift_data
+
+def parse_gift_completion(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the gift ideas JSON out of a chat completions response body.
+    
+    Replies wrapped in prose or a code fence are unwrapped, and the finished
+    gifts of a reply cut off at max_tokens are salvaged (see extract_gift_json).
+    
+    Raises:
+        Exception: If no gift ideas can be recovered from the completion
+    """
+    choice = response_data['choices'][0]
+    content = choice['message']['content']
+    
+    logger.info(f"Received response from OpenAI: {len(content)} characters")
+    if choice.get('finish_reason') == 'length':
+        logger.warning("OpenAI response was cut off at max_tokens")
+    
+    gift_data, complete = extract_gift_json(content)
+    if gift_data is None:
+        logger.error("Failed to parse OpenAI response as JSON")
+        logger.error(f"Raw response: {content}")
+        raise Exception("Invalid JSON response from AI service")
+    
+    return keep_complete_gifts(gift_data)
+
+def missing_gift_count(gifts: List[Dict[str, Any]]) -> int:
+    """Number of gift ideas to re-prompt for (0 if disabled or nothing usable was returned)."""
+    complete = [gift for gift in gifts if is_complete_gift(gift)]
+    if not app.config['GIFT_REPROMPT_MISSING'] or not complete:
+        return 0
+    return max(0, GIFT_IDEA_COUNT - len(complete))
+
+def request_missing_gifts(answers: Dict[str, str], gifts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ask OpenAI for only the gift ideas missing from a partial reply.
+    
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        gifts: Gift ideas received so far
+        
+    Returns:
+        The additional complete gift ideas (empty if none were needed or the
+        re-prompt failed; the partial result is used as-is then)
+    """
+    missing = missing_gift_count(gifts)
+    if not missing:
+        return []
+    
+    logger.info(f"Re-prompting OpenAI for {missing} missing gift ideas")
+    try:
+        payload = build_gift_completion_payload(
+            answers,
+            count=missing,
+            exclude_titles=[gift['title'] for gift in gifts if is_complete_gift(gift)]
+        )
+        response = post_chat_completion(get_openai_headers(), payload)
+        if not response.ok:
+            logger.warning(f"Re-prompt for missing gifts failed with status {response.status_code}")
+            return []
+        
+        extra = parse_gift_completion(response.json()).get('gift_ideas') or []
+        return [gift for gift in extra if is_complete_gift(gift)][:missing]
+    
+    except Exception as e:
+        logger.warning(f"Re-prompt for missing gifts failed; keeping {len(gifts)} gifts: {str(e)}")
+        return []
+
+def generate_gift_ideas(answers: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Generate gift ideas using OpenAI API via direct HTTP calls (Vercel-compatible).
+    
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        
+    Returns:
+        Dictionary containing generated gift ideas
+        
+    Raises:
+        Exception: If OpenAI API call fails
+    """
+    headers = get_openai_headers()
     
     import requests
     import json
     
     try:
-        prompt = create_gift_generation_prompt(answers)
+        payload = build_gift_completion_payload(answers)
         
         logger.info("Sending request to OpenAI API via HTTP")
         
         # Use direct HTTP call instead of OpenAI SDK (Vercel-compatible approach)
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        payload = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are a world-class gift psychology expert. Apply step-by-step analytical thinking and respond with valid JSON containing exactly 3 gift ideas in this format: {\"gift_ideas\": [{\"title\": \"Creative gift name\", \"description\": \"Detailed psychological reasoning\", \"starter\": \"Presentation strategy\", \"reaction\": \"Authentic emotional response\", \"image_search_terms\": \"2-4 keywords for image search\", \"amazon_search_query\": \"Exact Amazon search term\", \"price_range\": \"Price range in INR\"}]}"
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            "max_tokens": 1500,
-            "temperature": 0.7
-        }
-        
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers=headers,
-            json=payload,
-            timeout=25
-        )
+        response = post_chat_completion(headers, payload)
         
         if not response.ok:
             logger.error(f"OpenAI API request failed with status {response.status_code}: {response.text}")
             raise Exception(f"OpenAI API request failed: {response.status_code}")
         
-        response_data = response.json()
-        content = response_data['choices'][0]['message']['content']
-        
-        logger.info(f"Received response from OpenAI: {len(content)} characters")
-        
-        try:
-            gift_data = json.loads(content)
-            return gift_data
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse OpenAI response as JSON: {e}")
-            logger.error(f"Raw response: {content}")
-            raise Exception("Invalid JSON response from AI service")
+        gift_data = parse_gift_completion(response.json())
+        if isinstance(gift_data.get('gift_ideas'), list):
+            gift_data['gift_ideas'].extend(request_missing_gifts(answers, gift_data['gift_ideas']))
+        return gift_data
+    
+    except CircuitOpenError:
+        logger.warning("OpenAI circuit is open; failing fast")
+        raise
             
     except requests.exceptions.Timeout:
         logger.error("OpenAI API request timed out")
@@ -2209,6 +2831,98 @@ def generate_gift_ideas(answers: Dict[str, str]) -> Dict[str, Any]:
         logger.error(f"Unexpected error in OpenAI API call: {str(e)}")
         raise Exception(f"AI service error: {str(e)}")
 
+def stream_gift_completion(answers: Dict[str, str]):
+    """
+    Stream the gift ideas completion from OpenAI as it is generated.
+    
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        
+    Yields:
+        Pieces of the completion text, in order
+        
+    Raises:
+        Exception: If the OpenAI API call fails
+    """
+    headers = get_openai_headers()
+    payload = build_gift_completion_payload(answers, stream=True)
+    
+    try:
+        logger.info("Sending streaming request to OpenAI API via HTTP")
+        # Retries only cover getting the stream started; a stream that breaks part-way is an error
+        response = post_chat_completion(headers, payload, stream=True)
+        
+        with response:
+            if not response.ok:
+                logger.error(f"OpenAI API request failed with status {response.status_code}: {response.text}")
+                raise Exception(f"OpenAI API request failed: {response.status_code}")
+            
+            # Server-sent events: one "data: {...}" line per delta, terminated by "data: [DONE]"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                
+                choices = json.loads(data).get('choices') or [{}]
+                content = choices[0].get('delta', {}).get('content')
+                if content:
+                    yield content
+    
+    except requests.exceptions.Timeout:
+        logger.error("OpenAI API streaming request timed out")
+        raise Exception("AI service request timed out. Please try again.")
+    
+    except requests.exceptions.ConnectionError:
+        logger.error("Failed to connect to OpenAI API")
+        raise Exception("Failed to connect to AI service. Please check your internet connection.")
+
+def stream_gift_ideas(answers: Dict[str, str]):
+    """
+    Generate gift ideas, yielding each one as soon as the model finishes it.
+    
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        
+    Yields:
+        Gift idea dictionaries, in the order the model produced them
+        
+    Raises:
+        Exception: If the OpenAI API call fails or no gifts can be parsed
+    """
+    parser = IncrementalGiftParser()
+    
+    for chunk in stream_gift_completion(answers):
+        for gift in parser.feed(chunk):
+            yield gift
+    
+    logger.info(f"Received streamed response from OpenAI: {len(parser.text)} characters")
+    
+    if parser.gifts:
+        gifts = parser.gifts
+        if not parser.closed:
+            logger.warning(f"Streamed response ended after {len(gifts)} complete gifts")
+    else:
+        # The gift_ideas array was never found incrementally; fall back to parsing the whole reply
+        gift_data, _ = extract_gift_json(parser.text)
+        if gift_data is None:
+            logger.error("Failed to parse OpenAI response as JSON")
+            logger.error(f"Raw response: {parser.text}")
+            raise Exception("Invalid JSON response from AI service")
+        
+        gifts = [gift for gift in gift_data.get('gift_ideas') or [] if isinstance(gift, dict)]
+        for gift in gifts:
+            yield gift
+    
+    # A short or truncated reply is topped up with just the missing gifts
+    for gift in request_missing_gifts(answers, gifts):
+        yield gift
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.route('/')
 def serve_frontend():
     """Serve the main HTML application."""
@@ -2274,7 +2988,19 @@ def health_check():
         "api_key_present": bool(app.config.get('OPENAI_API_KEY')),
         "image_search_available": image_search_available,
         "image_search_status": image_search_status,
-        "amazon_affiliate_tag": app.config.get('AMAZON_AFFILIATE_TAG', 'Not configured')
+        "amazon_affiliate_tag": app.config.get('AMAZON_AFFILIATE_TAG', 'Not configured'),
+        "result_store": results_store.stats(),
+        "result_sweeper": result_sweeper.stats(),
+        "gift_ideas_cache": gift_ideas_cache.stats(),
+        "image_search_cache": image_search_cache.stats(),
+        "gift_flights": gift_flights.stats(),
+        "openai_circuit": openai_breaker.stats(),
+        "http_client": http_client.stats(),
+        "async_pipeline": pipeline_runner.stats() if pipeline_runner is not None else None,
+        "admission": {
+            "rate_limit": client_rate_limiter.stats() if client_rate_limiter is not None else None,
+            "generations": generation_slots.stats()
+        }
     })
 
 @app.route('/test_openai', methods=['GET'])
@@ -2305,8 +3031,9 @@ def test_openai():
             "max_tokens": 10
         }
         
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
+        response = http_client.post(
+            f"{app.config['OPENAI_BASE_URL']}/chat/completions",
+            provider='openai',
             headers=headers,
             json=payload,
             timeout=10
@@ -2383,18 +3110,625 @@ def test_image_search():
             "error_type": type(e).__name__
         }), 500
 
-@app.route('/generate_gifts', methods=['POST'])
-def generate_gifts():
+class GiftGenerationError(Exception):
+    """AI output that cannot be turned into gift ideas (reported with an error code)."""
+    
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+def generate_gift_ideas_overlapped(answers: Dict[str, str]) -> tuple[Dict[str, Any], List[Optional[Future]]]:
     """
-    Generate personalized gift ideas based on questionnaire responses.
+    Generate gift ideas from a streamed completion, starting each gift's image
+    search and link generation as soon as the model has finished that gift.
     
-    Expected JSON payload:
-    {
-        "call_them": "buddy",
-        "relationship": "best friend", 
-        "previous_gifts": "chocolate, book",
-        "hate": "spiders, loud noises",
-        "complaints": "traffic, work stress",
+    Args:
+        answers: Dictionary containing sanitized questionnaire responses
+        
+    Returns:
+        Tuple of (gift data, one future per gift resolving to the enhanced gift);
+        the future is None for gifts missing a core field, which fail validation
+        
+    Raises:
+        Exception: If the OpenAI API call fails
+    """
+    gifts = []
+    enrichment = []
+    started = time.perf_counter()
+    
+    try:
+        for gift in stream_gift_ideas(answers):
+            gifts.append(gift)
+            if all(gift.get(field) for field in CORE_GIFT_FIELDS):
+                logger.info(f"Gift {len(gifts)} completed after {(time.perf_counter() - started) * 1000:.0f}ms; starting image search")
+                enrichment.append(gift_enrichment_executor.submit(process_gift_with_images_and_links, gift))
+            else:
+                enrichment.append(None)
+    except BaseException:
+        for future in enrichment:
+            if future is not None:
+                future.cancel()
+        raise
+    
+    # Incomplete gifts are dropped as long as complete ones remain (see keep_complete_gifts)
+    if None in enrichment and any(future is not None for future in enrichment):
+        logger.warning(f"Dropping {enrichment.count(None)} incomplete gift ideas")
+        gifts, enrichment = zip(*[(gift, future) for gift, future in zip(gifts, enrichment) if future is not None])
+        gifts, enrichment = list(gifts), list(enrichment)
+    
+    return {"gift_ideas": gifts}, enrichment
+
+def validate_gift_data(gift_data: Dict[str, Any]) -> None:
+    """
+    Check the structure of gift ideas returned by the AI service.
+    
+    Raises:
+        GiftGenerationError: If the response is malformed or a gift lacks a core field
+    """
+    # Validate the structure of returned data
+    if 'gift_ideas' not in gift_data or not isinstance(gift_data['gift_ideas'], list):
+        logger.error("Invalid response structure from OpenAI")
+        raise GiftGenerationError("Invalid response from AI service", "INVALID_AI_RESPONSE")
+    
+    if len(gift_data['gift_ideas']) != GIFT_IDEA_COUNT:
+        logger.warning(f"Expected {GIFT_IDEA_COUNT} gift ideas, got {len(gift_data['gift_ideas'])}")
+    
+    # Validate each gift idea has core required fields
+    for i, gift in enumerate(gift_data['gift_ideas']):
+        for field in CORE_GIFT_FIELDS:
+            if field not in gift or not gift[field]:
+                logger.error(f"Gift idea {i+1} missing required field: {field}")
+                raise GiftGenerationError("Incomplete gift idea generated", "INCOMPLETE_AI_RESPONSE")
+    
+    logger.info(f"Successfully generated {len(gift_data['gift_ideas'])} gift ideas")
+
+def build_gift_ideas(sanitized_answers: Dict[str, str], cache_key: str) -> List[Dict[str, Any]]:
+    """
+    Generate, validate and enhance gift ideas for a questionnaire.
+    
+    Args:
+        sanitized_answers: Sanitized questionnaire responses
+        cache_key: questionnaire_cache_key() of the answers
+        
+    Returns:
+        Gift ideas with images and affiliate links
+        
+    Raises:
+        GiftGenerationError: If the AI response is malformed or incomplete
+        Exception: If the OpenAI API call fails
+    """
+    # Generate gift ideas using OpenAI, unless an equivalent questionnaire was answered recently
+    cached_gift_data = gift_ideas_cache.get(cache_key)
+    enrichment = []
+    if cached_gift_data is not None:
+        logger.info(f"Gift ideas cache hit for {cache_key[:12]}")
+        gift_data = copy.deepcopy(cached_gift_data)
+    elif app.config['OVERLAP_IMAGE_SEARCH']:
+        # Image searches start while the model is still writing the remaining gifts
+        gift_data, enrichment = generate_gift_ideas_overlapped(sanitized_answers)
+    else:
+        gift_data = generate_gift_ideas(sanitized_answers)
+    
+    try:
+        validate_gift_data(gift_data)
+    except GiftGenerationError:
+        for future in enrichment:
+            if future is not None:
+                future.cancel()
+        raise
+    
+    # Only responses that passed validation are cached (before images are attached)
+    if cached_gift_data is None:
+        gift_ideas_cache.set(cache_key, copy.deepcopy(gift_data))
+    
+    # Process the gifts concurrently to add images and Amazon affiliate links
+    logger.info("Processing gifts with images and affiliate links...")
+    enrichment = submit_gift_enrichment(gift_data['gift_ideas'], enrichment)
+    deadline = time.time() + app.config['GIFT_ENRICHMENT_TIMEOUT']
+    enhanced_gifts = [
+        enriched_gift_result(i, gift, future, deadline)
+        for i, (gift, future) in enumerate(zip(gift_data['gift_ideas'], enrichment))
+    ]
+    
+    logger.info(f"Successfully enhanced all {len(enhanced_gifts)} gifts with images and links")
+    return enhanced_gifts
+
+# Async pipeline (ASYNC_PIPELINE=true): the generation above as coroutines on the
+# shared event loop of async_pipeline.py, building requests and parsing responses
+# with the same helpers as the synchronous providers
+
+async def throttle_async(url: str) -> None:
+    """Wait for the request budget of ``url``'s host, shared with http_client."""
+    wait = http_client.reserve(url)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+async def search_bing_images_enhanced_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """Coroutine version of search_bing_images_enhanced()."""
+    try:
+        images = []
+        
+        for variation in _bing_enhanced_search_variations(search_terms):
+            if len(images) >= count:
+                break
+            
+            try:
+                logger.info(f"Trying Bing search variation: '{variation}'")
+                
+                search_url, headers = _bing_enhanced_request(variation)
+                await throttle_async(search_url)
+                response = await client.get(search_url, headers=headers, timeout=15)
+                
+                if response.status_code == 200:
+                    _process_bing_enhanced_results(response.text, search_terms, images, count)
+                
+            except Exception as e:
+                logger.debug(f"Bing search variation '{variation}' failed: {str(e)}")
+                continue
+        
+        # Sort by quality score (good domains first)
+        images.sort(key=lambda x: x.get('quality_score', 0), reverse=True)
+        
+        if images:
+            logger.info(f"Enhanced Bing search found {len(images)} real product images for '{search_terms}'")
+        
+        return images[:count]
+        
+    except Exception as e:
+        logger.error(f"Error in enhanced Bing search: {str(e)}")
+        return []
+
+async def _search_ddg_manual_enhanced_async(client, search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Coroutine version of _search_ddg_manual_enhanced()."""
+    for variation in _ddg_manual_search_variations(search_terms):
+        try:
+            logger.info(f"Trying search variation: '{variation}'")
+            
+            await throttle_async(f"{app.config['DUCKDUCKGO_API_BASE_URL']}/")
+            response = await client.get(
+                f"{app.config['DUCKDUCKGO_API_BASE_URL']}/",
+                params=_ddg_instant_answer_params(variation),
+                headers=DDG_MANUAL_HEADERS,
+                timeout=10
+            )
+            
+            if response.status_code == 200:
+                images = _process_ddg_instant_answer(response.json(), search_terms)
+                if images:
+                    return images
+            
+        except Exception as e:
+            logger.debug(f"Search variation '{variation}' failed: {str(e)}")
+            continue
+    
+    return []
+
+async def _search_ddg_web_scraping_async(client, search_terms: str, count: int) -> List[Dict[str, Any]]:
+    """Coroutine version of _search_ddg_web_scraping()."""
+    images = []
+    
+    for site_query in _ddg_scraping_queries(search_terms):
+        try:
+            search_url = f"{app.config['DUCKDUCKGO_HTML_BASE_URL']}/html/?q={quote_plus(site_query)}"
+            await throttle_async(search_url)
+            response = await client.get(search_url, headers=DDG_SCRAPING_HEADERS, timeout=10)
+            
+            if response.status_code == 200:
+                _process_ddg_scraped_html(response.text, search_terms, images, count)
+                
+                if len(images) >= count:
+                    break
+                    
+        except Exception as e:
+            logger.debug(f"Site query '{site_query}' failed: {str(e)}")
+            continue
+    
+    return images
+
+async def search_duckduckgo_images_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """Coroutine version of search_duckduckgo_images()."""
+    try:
+        # The duckduckgo-search library is synchronous, so it runs on a worker thread
+        if app.config['DUCKDUCKGO_BASE_URL'] == 'https://duckduckgo.com':
+            try:
+                logger.info(f"Attempting DuckDuckGo library search for: '{search_terms}'")
+                images = await asyncio.to_thread(_search_with_ddg_library, search_terms, count)
+                if images:
+                    logger.info(f"✓ Found {len(images)} images using DDG library")
+                    return images
+            except ImportError:
+                logger.info("duckduckgo-search library not available, trying manual methods")
+            except Exception as e:
+                logger.warning(f"DDG library search failed: {str(e)}")
+        
+        for label, method in (('enhanced manual search', _search_ddg_manual_enhanced_async),
+                              ('web scraping', _search_ddg_web_scraping_async)):
+            try:
+                logger.info(f"Attempting DDG {label} for: '{search_terms}'")
+                images = await method(client, search_terms, count)
+                if images:
+                    logger.info(f"✓ Found {len(images)} images using {label}")
+                    return images
+            except Exception as e:
+                logger.warning(f"DDG {label} failed: {str(e)}")
+        
+        logger.warning(f"All DuckDuckGo methods failed for '{search_terms}'")
+        return []
+        
+    except Exception as e:
+        logger.error(f"Critical error in DuckDuckGo search: {str(e)}")
+        return []
+
+async def search_bing_images_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """Coroutine version of search_bing_images()."""
+    try:
+        search_url, headers = _bing_request(search_terms)
+        await throttle_async(search_url)
+        response = await client.get(search_url, headers=headers, timeout=15)
+        
+        if response.status_code == 200:
+            images = _process_bing_results(response.text, search_terms, count)
+            
+            if images:
+                logger.info(f"Found {len(images)} real product images from Bing for '{search_terms}'")
+                return images
+            else:
+                logger.warning(f"No valid image URLs extracted from Bing for '{search_terms}'")
+        
+        logger.warning(f"Bing search returned status {response.status_code} for '{search_terms}'")
+        return []
+        
+    except Exception as e:
+        logger.error(f"Error searching Bing images: {str(e)}")
+        return []
+
+async def generate_pixabay_images_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """Coroutine version of generate_pixabay_images()."""
+    try:
+        response = await client.get(
+            f"{app.config['PIXABAY_BASE_URL']}/api/",
+            params=_pixabay_params(search_terms, count),
+            timeout=15
+        )
+        
+        if response.status_code == 200:
+            images = _process_pixabay_results(response.json(), search_terms, count)
+            logger.info(f"Found {len(images)} real Pixabay images for '{search_terms}'")
+            return images
+        else:
+            logger.warning(f"Pixabay API returned status {response.status_code}")
+            return []
+            
+    except Exception as e:
+        logger.error(f"Error searching Pixabay: {str(e)}")
+        return []
+
+async def search_google_custom_images_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """Coroutine version of search_google_custom_images()."""
+    try:
+        google_api_key = app.config.get('GOOGLE_API_KEY')
+        google_cx = app.config.get('GOOGLE_CUSTOM_SEARCH_ENGINE_ID')
+        
+        if not google_api_key or not google_cx:
+            logger.info("Google Custom Search not configured (missing API key or CX ID)")
+            return []
+        
+        response = await client.get(
+            GOOGLE_CUSTOM_SEARCH_URL,
+            params=_google_search_params(search_terms, count, google_api_key, google_cx),
+            timeout=10
+        )
+        
+        if response.status_code == 200:
+            images = _process_google_results(response.json(), search_terms, count)
+            logger.info(f"Google Custom Search found {len(images)} images for '{search_terms}'")
+            return images
+        else:
+            logger.warning(f"Google Custom Search returned status {response.status_code}")
+            return []
+            
+    except Exception as e:
+        logger.error(f"Error in Google Custom Search: {str(e)}")
+        return []
+
+# Network image providers in the order search_images_for_gift() tries them
+ASYNC_IMAGE_PROVIDERS = [
+    ('Bing Enhanced', search_bing_images_enhanced_async),
+    ('DuckDuckGo', search_duckduckgo_images_async),
+    ('Bing', search_bing_images_async),
+    ('Pixabay', generate_pixabay_images_async),
+    ('Google Custom Search', search_google_custom_images_async)
+]
+
+async def search_images_for_gift_async(client, search_terms: str, count: int = 3) -> List[Dict[str, Any]]:
+    """
+    Coroutine version of search_images_for_gift().
+    
+    Providers are still tried in cascade order; concurrency comes from running
+    the cascades of every gift (and every request) on the same event loop.
+    
+    Args:
+        client: Shared httpx.AsyncClient
+        search_terms: Keywords to search for images
+        count: Number of images to return
+        
+    Returns:
+        List of image dictionaries with url, title, etc.
+    """
+    try:
+        cleaned_terms = clean_search_terms(search_terms)
+        logger.info(f"Searching for real product images: '{search_terms}' (cleaned: '{cleaned_terms}')")
+        
+        cached_images = image_search_cache.get(cleaned_terms, count)
+        if cached_images is not None:
+            logger.info(f"Image cache hit for '{cleaned_terms}'")
+            return cached_images
+        
+        images = []
+        upstream_calls = 0
+        
+        for name, provider in ASYNC_IMAGE_PROVIDERS:
+            if len(images) >= count:
+                break
+            upstream_calls += 1
+            try:
+                logger.info(f"Attempting {name} image search for '{cleaned_terms}'")
+                found = await provider(client, cleaned_terms, count - len(images))
+                if found:
+                    images.extend(found)
+                    logger.info(f"✓ Added {len(found)} real product images from {name}")
+                else:
+                    logger.warning(f"{name} returned no images")
+            except Exception as e:
+                logger.warning(f"{name} image search failed: {str(e)}")
+        
+        return finish_image_search(search_terms, cleaned_terms, images, count, upstream_calls)
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in image search: {str(e)}")
+        return generate_enhanced_placeholder_images(search_terms, count)
+
+async def process_gift_with_images_and_links_async(client, gift: Dict[str, Any]) -> Dict[str, Any]:
+    """Coroutine version of process_gift_with_images_and_links(); never raises."""
+    try:
+        image_search_terms = gift.get('image_search_terms', gift.get('title', ''))
+        images = await search_images_for_gift_async(client, image_search_terms, app.config['IMAGE_SEARCH_COUNT'])
+        return attach_images_and_links(gift, images)
+        
+    except Exception as e:
+        logger.error(f"Error processing gift with images: {str(e)}")
+        return fallback_enhanced_gift(gift)
+
+async def request_missing_gifts_async(client, answers: Dict[str, str], gifts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Coroutine version of request_missing_gifts(); never raises."""
+    missing = missing_gift_count(gifts)
+    if not missing:
+        return []
+    
+    logger.info(f"Re-prompting OpenAI for {missing} missing gift ideas")
+    try:
+        payload = build_gift_completion_payload(
+            answers,
+            count=missing,
+            exclude_titles=[gift['title'] for gift in gifts if is_complete_gift(gift)]
+        )
+        response = await call_with_resilience_async(
+            lambda: client.post(
+                f"{app.config['OPENAI_BASE_URL']}/chat/completions",
+                headers=get_openai_headers(),
+                json=payload,
+                timeout=25
+            ),
+            openai_retry_policy,
+            openai_breaker,
+            name='OpenAI',
+            retry_on=TRANSIENT_ERRORS,
+            fail_on=REQUEST_ERRORS
+        )
+        if response.is_error:
+            logger.warning(f"Re-prompt for missing gifts failed with status {response.status_code}")
+            return []
+        
+        extra = parse_gift_completion(response.json()).get('gift_ideas') or []
+        return [gift for gift in extra if is_complete_gift(gift)][:missing]
+    
+    except Exception as e:
+        logger.warning(f"Re-prompt for missing gifts failed; keeping {len(gifts)} gifts: {str(e)}")
+        return []
+
+async def generate_gift_ideas_async(client, answers: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Coroutine version of generate_gift_ideas().
+    
+    Raises:
+        CircuitOpenError: If the OpenAI circuit breaker is open
+        Exception: If the OpenAI API call fails (same messages as the sync version)
+    """
+    headers = get_openai_headers()
+    
+    try:
+        payload = build_gift_completion_payload(answers)
+        
+        logger.info("Sending async request to OpenAI API via HTTP")
+        response = await call_with_resilience_async(
+            lambda: client.post(
+                f"{app.config['OPENAI_BASE_URL']}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=25
+            ),
+            openai_retry_policy,
+            openai_breaker,
+            name='OpenAI',
+            retry_on=TRANSIENT_ERRORS,
+            fail_on=REQUEST_ERRORS
+        )
+        
+        if response.is_error:
+            logger.error(f"OpenAI API request failed with status {response.status_code}: {response.text}")
+            raise Exception(f"OpenAI API request failed: {response.status_code}")
+        
+        gift_data = parse_gift_completion(response.json())
+        if isinstance(gift_data.get('gift_ideas'), list):
+            gift_data['gift_ideas'].extend(await request_missing_gifts_async(client, answers, gift_data['gift_ideas']))
+        return gift_data
+    
+    except CircuitOpenError:
+        logger.warning("OpenAI circuit is open; failing fast")
+        raise
+    
+    except TRANSIENT_ERRORS as e:
+        if isinstance(e, httpx.TimeoutException):
+            logger.error("OpenAI API request timed out")
+            raise Exception("AI service request timed out. Please try again.")
+        logger.error("Failed to connect to OpenAI API")
+        raise Exception("Failed to connect to AI service. Please check your internet connection.")
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in OpenAI API call: {str(e)}")
+        raise Exception(f"AI service error: {str(e)}")
+
+async def build_gift_ideas_async(client, sanitized_answers: Dict[str, str], cache_key: str) -> List[Dict[str, Any]]:
+    """
+    Coroutine version of build_gift_ideas(); the gifts are enhanced concurrently.
+    
+    Raises:
+        GiftGenerationError: If the AI response is malformed or incomplete
+        Exception: If the OpenAI API call fails
+    """
+    cached_gift_data = gift_ideas_cache.get(cache_key)
+    if cached_gift_data is not None:
+        logger.info(f"Gift ideas cache hit for {cache_key[:12]}")
+        gift_data = copy.deepcopy(cached_gift_data)
+    else:
+        gift_data = await generate_gift_ideas_async(client, sanitized_answers)
+    
+    validate_gift_data(gift_data)
+    
+    if cached_gift_data is None:
+        gift_ideas_cache.set(cache_key, copy.deepcopy(gift_data))
+    
+    logger.info("Processing gifts with images and affiliate links concurrently...")
+    enhanced_gifts = await asyncio.gather(*(
+        process_gift_with_images_and_links_async(client, gift) for gift in gift_data['gift_ideas']
+    ))
+    
+    logger.info(f"Successfully enhanced all {len(enhanced_gifts)} gifts with images and links")
+    return list(enhanced_gifts)
+
+def client_identity() -> str:
+    """Key requests are rate limited by: the API key if one is sent, otherwise the client IP."""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    
+    if app.config['TRUST_PROXY_HEADERS'] and request.access_route:
+        return 'ip:' + request.access_route[0]
+    return f"ip:{request.remote_addr}"
+
+def rejection_response(error: str, code: str, retry_after: float):
+    """429 response with a Retry-After header."""
+    retry_after = max(1, int(retry_after + 0.999))
+    response = jsonify({
+        "success": False,
+        "error": error,
+        "code": code,
+        "retry_after": retry_after
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def check_client_rate(client: str, cost: int = 1) -> Optional[float]:
+    """
+    Charge ``cost`` rate limit tokens to a client.
+    
+    Returns:
+        None if the client is within its rate limit, otherwise seconds until it would be
+    """
+    if client_rate_limiter is None:
+        return None
+    
+    admitted, retry_after = client_rate_limiter.check(client, cost)
+    if admitted:
+        return None
+    logger.warning(f"Rate limited {client} (retry in {retry_after:.1f}s)")
+    return retry_after
+
+def admit_generation(cost: int = 1, slots: int = 1):
+    """
+    Admission control for a generation request, checked before any work starts.
+    
+    Args:
+        cost: Rate limit tokens to charge the client
+        slots: Concurrent generation slots the request will occupy
+        
+    Returns:
+        None if admitted (the caller must release ``slots`` from generation_slots
+        when done), otherwise a 429 response tuple to return
+    """
+    retry_after = check_client_rate(client_identity(), cost)
+    if retry_after is not None:
+        return rejection_response("Too many requests. Please slow down.", "RATE_LIMITED", retry_after)
+    
+    if not generation_slots.try_acquire(slots):
+        logger.warning(f"Rejected generation: {generation_slots.in_flight} already in flight")
+        return rejection_response(
+            "Server is busy generating gift ideas. Please try again shortly.",
+            "SERVER_BUSY",
+            app.config['BUSY_RETRY_AFTER']
+        )
+    return None
+
+def run_gift_generation(sanitized_answers: Dict[str, str], cache_key: str) -> tuple[List[Dict[str, Any]], bool]:
+    """
+    Build gift ideas on the configured pipeline (async if enabled, else sync).
+    
+    Identical questionnaires already being generated are joined rather than repeated.
+    
+    Returns:
+        Tuple of (enhanced gift ideas, shared with another caller)
+    """
+    if pipeline_runner is not None:
+        generate = lambda: pipeline_runner.run(
+            lambda client: build_gift_ideas_async(client, sanitized_answers, cache_key),
+            timeout=app.config['ASYNC_PIPELINE_TIMEOUT']
+        )
+    else:
+        generate = lambda: build_gift_ideas(sanitized_answers, cache_key)
+    
+    return gift_flights.do(cache_key, generate)
+
+def describe_generation_error(e: Exception) -> tuple[str, str]:
+    """Map an unexpected generation failure to a client-facing (message, code) pair."""
+    error_message = "Internal server error occurred while generating gift ideas"
+    error_code = "INTERNAL_ERROR"
+    
+    # Check if it's an OpenAI-related error
+    if "OpenAI" in str(e) or "AI service" in str(e):
+        error_message = str(e)
+        error_code = "AI_SERVICE_ERROR"
+    elif "timeout" in str(e).lower():
+        error_message = "Request timed out while generating gift ideas. Please try again."
+        error_code = "TIMEOUT_ERROR"
+    elif "connection" in str(e).lower():
+        error_message = "Failed to connect to AI service. Please try again."
+        error_code = "CONNECTION_ERROR"
+    
+    return error_message, error_code
+
+@app.route('/generate_gifts', methods=['POST'])
+def generate_gifts():
+    """
+    Generate personalized gift ideas based on questionnaire responses.
+    
+    Expected JSON payload:
+    {
+        "call_them": "buddy",
+        "relationship": "best friend", 
+        "previous_gifts": "chocolate, book",
+        "hate": "spiders, loud noises",
+        "complaints": "traffic, work stress",
         "complain_about_them": "always late, too picky",
         "budget": "under 500₹",
         "limitations": "allergy-free, eco-friendly"
@@ -2461,63 +3795,42 @@ def generate_gifts():
         
         logger.info(f"Processing gift generation request for relationship: {sanitized_answers.get('relationship', 'unknown')}")
         
-        # Generate gift ideas using OpenAI
-        gift_data = generate_gift_ideas(sanitized_answers)
+        # Over-limit clients and overload are turned away before any work starts
+        rejection = admit_generation()
+        if rejection is not None:
+            return rejection
         
-        # Validate the structure of returned data
-        if 'gift_ideas' not in gift_data or not isinstance(gift_data['gift_ideas'], list):
-            logger.error("Invalid response structure from OpenAI")
+        cache_key = questionnaire_cache_key(sanitized_answers)
+        try:
+            gift_ideas, shared = run_gift_generation(sanitized_answers, cache_key)
+        except GiftGenerationError as e:
             return jsonify({
                 "success": False,
-                "error": "Invalid response from AI service",
-                "code": "INVALID_AI_RESPONSE"
+                "error": e.message,
+                "code": e.code
             }), 500
         
-        if len(gift_data['gift_ideas']) != 3:
-            logger.warning(f"Expected 3 gift ideas, got {len(gift_data['gift_ideas'])}")
-        
-        # Validate each gift idea has core required fields
-        core_required_fields = ['title', 'description', 'starter', 'reaction']
-        for i, gift in enumerate(gift_data['gift_ideas']):
-            for field in core_required_fields:
-                if field not in gift or not gift[field]:
-                    logger.error(f"Gift idea {i+1} missing required field: {field}")
-                    return jsonify({
-                        "success": False,
-                        "error": "Incomplete gift idea generated",
-                        "code": "INCOMPLETE_AI_RESPONSE"
-                    }), 500
-        
-        logger.info(f"Successfully generated {len(gift_data['gift_ideas'])} gift ideas")
+        except CircuitOpenError as e:
+            response = jsonify({
+                "success": False,
+                "error": "AI service is temporarily unavailable. Please try again shortly.",
+                "code": "AI_SERVICE_UNAVAILABLE"
+            })
+            response.headers['Retry-After'] = str(max(1, int(e.retry_after)))
+            return response, 503
         
-        # Process each gift to add images and Amazon affiliate links
-        logger.info("Processing gifts with images and affiliate links...")
-        enhanced_gifts = []
+        finally:
+            generation_slots.release()
         
-        for i, gift in enumerate(gift_data['gift_ideas']):
-            try:
-                logger.info(f"Processing gift {i+1}/{len(gift_data['gift_ideas'])}: {gift.get('title', 'Unknown')}")
-                enhanced_gift = process_gift_with_images_and_links(gift)
-                enhanced_gifts.append(enhanced_gift)
-            except Exception as e:
-                logger.error(f"Failed to process gift {i+1}: {str(e)}")
-                # Add fallback gift with minimal data
-                fallback_gift = gift.copy()
-                fallback_gift['images'] = []
-                fallback_gift['amazon_link'] = generate_amazon_affiliate_link(gift.get('title', ''))
-                fallback_gift['price_range'] = gift.get('price_range', 'Price varies')
-                enhanced_gifts.append(fallback_gift)
-        
-        # Update gift_data with enhanced gifts
-        gift_data['gift_ideas'] = enhanced_gifts
-        logger.info(f"Successfully enhanced all {len(enhanced_gifts)} gifts with images and links")
+        if shared:
+            logger.info(f"Joined in-flight generation for {cache_key[:12]}")
         
         # Store results with unique ID for URL routing
-        result_id = store_result(data, gift_data['gift_ideas'])
+        result_id = store_result(data, gift_ideas)
         
         return jsonify({
             "success": True,
-            "gift_ideas": gift_data['gift_ideas'],
+            "gift_ideas": gift_ideas,
             "result_id": result_id,
             "result_url": f"/results/{result_id}",
             "timestamp": datetime.utcnow().isoformat()
@@ -2528,19 +3841,7 @@ def generate_gifts():
         logger.error(f"Exception type: {type(e).__name__}")
         
         # Provide more specific error messages for debugging
-        error_message = "Internal server error occurred while generating gift ideas"
-        error_code = "INTERNAL_ERROR"
-        
-        # Check if it's an OpenAI-related error
-        if "OpenAI" in str(e) or "AI service" in str(e):
-            error_message = str(e)
-            error_code = "AI_SERVICE_ERROR"
-        elif "timeout" in str(e).lower():
-            error_message = "Request timed out while generating gift ideas. Please try again."
-            error_code = "TIMEOUT_ERROR"
-        elif "connection" in str(e).lower():
-            error_message = "Failed to connect to AI service. Please try again."
-            error_code = "CONNECTION_ERROR"
+        error_message, error_code = describe_generation_error(e)
         
         return jsonify({
             "success": False,
@@ -2553,6 +3854,374 @@ def generate_gifts():
             }
         }), 500
 
+@app.route('/generate_gifts/stream', methods=['POST'])
+def generate_gifts_stream():
+    """
+    Generate gift ideas, streaming each one to the client as Server-Sent Events.
+    
+    Accepts the same JSON payload as /generate_gifts. Events:
+    
+        event: gift    {"index": 0, "gift": {...}}             as soon as the model finishes a gift
+                                                               (images are filled in later)
+        event: images  {"index": 0, "images": [...]}           once that gift's image search completes
+        event: done    {"result_id": ..., "result_url": ...}   after everything is stored
+        event: error   {"error": ..., "code": ...}             if generation fails part-way
+    
+    Validation errors are returned as regular JSON responses before the stream starts.
+    """
+    if not request.is_json:
+        logger.warning("Request missing JSON content-type")
+        return jsonify({
+            "success": False,
+            "error": "Request must contain JSON data",
+            "code": "INVALID_CONTENT_TYPE"
+        }), 400
+    
+    data = request.get_json()
+    
+    is_valid, error_message = validate_questionnaire_data(data)
+    if not is_valid:
+        logger.warning(f"Invalid input data: {error_message}")
+        return jsonify({
+            "success": False,
+            "error": error_message,
+            "code": "INVALID_INPUT",
+            "received_fields": list(data.keys()) if isinstance(data, dict) else [],
+            "required_fields": REQUIRED_QUESTIONS
+        }), 400
+    
+    rejection = admit_generation()
+    if rejection is not None:
+        return rejection
+    
+    sanitized_answers = {question: sanitize_input(answer) for question, answer in data.items()}
+    cache_key = questionnaire_cache_key(sanitized_answers)
+    cached_gift_data = gift_ideas_cache.get(cache_key)
+    
+    def generate_events():
+        started = time.perf_counter()
+        raw_gifts = []
+        enrichment = []
+        
+        try:
+            if cached_gift_data is not None:
+                logger.info(f"Gift ideas cache hit for {cache_key[:12]}")
+                gift_source = iter(copy.deepcopy(cached_gift_data['gift_ideas']))
+            else:
+                gift_source = stream_gift_ideas(sanitized_answers)
+            
+            for gift in gift_source:
+                if not all(gift.get(field) for field in CORE_GIFT_FIELDS):
+                    logger.warning(f"Skipping streamed gift missing required fields: {gift.get('title', 'Unknown')}")
+                    continue
+                
+                if not raw_gifts:
+                    logger.info(f"First gift streamed after {(time.perf_counter() - started) * 1000:.0f}ms")
+                
+                preview = gift.copy()
+                preview['images'] = []
+                preview['amazon_link'] = generate_amazon_affiliate_link(gift.get('amazon_search_query', gift['title']))
+                preview.setdefault('price_range', 'Price varies')
+                
+                yield format_sse('gift', {"index": len(raw_gifts), "gift": preview})
+                raw_gifts.append(gift)
+                if app.config['OVERLAP_IMAGE_SEARCH']:
+                    enrichment.append(gift_enrichment_executor.submit(process_gift_with_images_and_links, gift))
+            
+            if not raw_gifts:
+                yield format_sse('error', {
+                    "error": "Invalid response from AI service",
+                    "code": "INVALID_AI_RESPONSE"
+                })
+                return
+            
+            if cached_gift_data is None:
+                gift_ideas_cache.set(cache_key, {"gift_ideas": copy.deepcopy(raw_gifts)})
+            
+            # Attach images and affiliate links (already under way when overlapping)
+            enrichment = submit_gift_enrichment(raw_gifts, enrichment)
+            deadline = time.time() + app.config['GIFT_ENRICHMENT_TIMEOUT']
+            enhanced_gifts = []
+            for i, gift in enumerate(raw_gifts):
+                enhanced_gift = enriched_gift_result(i, gift, enrichment[i], deadline)
+                enhanced_gifts.append(enhanced_gift)
+                yield format_sse('images', {
+                    "index": i,
+                    "images": enhanced_gift['images'],
+                    "amazon_link": enhanced_gift['amazon_link']
+                })
+            
+            result_id = store_result(data, enhanced_gifts)
+            yield format_sse('done', {
+                "success": True,
+                "result_id": result_id,
+                "result_url": f"/results/{result_id}",
+                "gift_count": len(enhanced_gifts),
+                "timestamp": datetime.utcnow().isoformat()
+            })
+            logger.info(f"Streamed {len(enhanced_gifts)} gifts in {(time.perf_counter() - started) * 1000:.0f}ms")
+        
+        except CircuitOpenError as e:
+            yield format_sse('error', {
+                "error": "AI service is temporarily unavailable. Please try again shortly.",
+                "code": "AI_SERVICE_UNAVAILABLE",
+                "retry_after": max(1, int(e.retry_after))
+            })
+        
+        except Exception as e:
+            logger.error(f"Error in generate_gifts_stream: {str(e)}")
+            error_code = "AI_SERVICE_ERROR" if "AI service" in str(e) else "INTERNAL_ERROR"
+            yield format_sse('error', {
+                "error": str(e) if error_code == "AI_SERVICE_ERROR" else "Internal server error occurred while generating gift ideas",
+                "code": error_code
+            })
+    
+    response = app.response_class(
+        stream_with_context(generate_events()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering so events arrive as they are sent
+        }
+    )
+    # The slot is held until the stream has been sent (or the client went away)
+    response.call_on_close(generation_slots.release)
+    return response
+
+def generate_batch_item(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate and store gift ideas for one questionnaire of a batch.
+    
+    Args:
+        data: Validated questionnaire
+        
+    Returns:
+        NDJSON result fields for the item (without its index)
+    """
+    sanitized_answers = {question: sanitize_input(answer) for question, answer in data.items()}
+    cache_key = questionnaire_cache_key(sanitized_answers)
+    
+    try:
+        gift_ideas, shared = run_gift_generation(sanitized_answers, cache_key)
+    except GiftGenerationError as e:
+        return {"success": False, "error": e.message, "code": e.code}
+    except CircuitOpenError as e:
+        return {
+            "success": False,
+            "error": "AI service is temporarily unavailable. Please try again shortly.",
+            "code": "AI_SERVICE_UNAVAILABLE",
+            "retry_after": max(1, int(e.retry_after))
+        }
+    
+    result_id = store_result(data, gift_ideas)
+    return {
+        "success": True,
+        "result_id": result_id,
+        "result_url": f"/results/{result_id}",
+        "gift_ideas": gift_ideas,
+        "shared": shared
+    }
+
+@app.route('/generate_gifts/batch', methods=['POST'])
+def generate_gifts_batch():
+    """
+    Generate gift ideas for many questionnaires, streaming results as NDJSON.
+    
+    Expected JSON payload:
+    {
+        "questionnaires": [{...same fields as /generate_gifts...}, ...],
+        "concurrency": 4,          (optional, capped at BATCH_MAX_CONCURRENCY)
+        "item_timeout": 120        (optional seconds, capped at BATCH_ITEM_TIMEOUT)
+    }
+    
+    Every questionnaire is validated before any generation starts; if one is
+    invalid the whole batch is rejected with a 400 listing the errors by index.
+    Otherwise one line is written per questionnaire as soon as it completes
+    (so lines arrive out of order), followed by a summary line:
+    
+        {"index": 2, "success": true, "result_id": ..., "result_url": ..., "gift_ideas": [...], "elapsed_ms": ...}
+        {"index": 0, "success": false, "error": ..., "code": ..., "elapsed_ms": ...}
+        {"done": true, "total": 3, "succeeded": 2, "failed": 1, "elapsed_ms": ...}
+    
+    An item that runs longer than its deadline is reported with code
+    ITEM_TIMEOUT; its generation is abandoned rather than interrupted, and keeps
+    its concurrency slot until it actually finishes. Items still queued when
+    the batch deadline (item timeout x rounds of concurrency) passes are not
+    started and are reported as ITEM_TIMEOUT too.
+    
+    Each questionnaire counts against the client's rate limit as it starts;
+    once the limit is reached, the remaining items fail with code RATE_LIMITED.
+    """
+    if not request.is_json:
+        logger.warning("Request missing JSON content-type")
+        return jsonify({
+            "success": False,
+            "error": "Request must contain JSON data",
+            "code": "INVALID_CONTENT_TYPE"
+        }), 400
+    
+    payload = request.get_json()
+    questionnaires = payload.get('questionnaires') if isinstance(payload, dict) else None
+    if not isinstance(questionnaires, list) or not questionnaires:
+        return jsonify({
+            "success": False,
+            "error": "questionnaires must be a non-empty list",
+            "code": "INVALID_INPUT"
+        }), 400
+    
+    max_items = app.config['BATCH_MAX_ITEMS']
+    if len(questionnaires) > max_items:
+        return jsonify({
+            "success": False,
+            "error": f"A batch can contain at most {max_items} questionnaires",
+            "code": "BATCH_TOO_LARGE"
+        }), 413
+    
+    try:
+        concurrency = int(payload.get('concurrency', app.config['BATCH_CONCURRENCY']))
+        item_timeout = float(payload.get('item_timeout', app.config['BATCH_ITEM_TIMEOUT']))
+    except (TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "concurrency and item_timeout must be numbers",
+            "code": "INVALID_INPUT"
+        }), 400
+    concurrency = max(1, min(concurrency, app.config['BATCH_MAX_CONCURRENCY'], len(questionnaires)))
+    item_timeout = max(1.0, min(item_timeout, app.config['BATCH_ITEM_TIMEOUT']))
+    
+    # Validate everything up front so a bad item does not leave a half-run batch
+    validation_errors = []
+    for index, data in enumerate(questionnaires):
+        is_valid, error_message = validate_questionnaire_data(data)
+        if not is_valid:
+            validation_errors.append({"index": index, "error": error_message})
+    
+    if validation_errors:
+        logger.warning(f"Rejected batch with {len(validation_errors)} invalid questionnaires")
+        return jsonify({
+            "success": False,
+            "error": "One or more questionnaires are invalid",
+            "code": "INVALID_INPUT",
+            "errors": validation_errors,
+            "required_fields": REQUIRED_QUESTIONS
+        }), 400
+    
+    # A batch occupies one slot per parallel generation. The first questionnaire is charged
+    # to the client's rate limit here and every other one as it starts, so batches get no
+    # more generations than the same questionnaires sent to /generate_gifts one by one.
+    client = client_identity()
+    rejection = admit_generation(slots=concurrency)
+    if rejection is not None:
+        return rejection
+    
+    logger.info(f"Starting batch of {len(questionnaires)} questionnaires (concurrency {concurrency}, item timeout {item_timeout:.0f}s)")
+    
+    started_at = {}
+    rate_limited = []  # Retry-After of the first item over the rate limit; the rest fail with it
+    
+    def run_item(index: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        started_at[index] = time.monotonic()
+        if index > 0:
+            retry_after = rate_limited[0] if rate_limited else check_client_rate(client)
+            if retry_after is not None:
+                rate_limited.append(retry_after)
+                return {
+                    "success": False,
+                    "error": "Too many requests. Please slow down.",
+                    "code": "RATE_LIMITED",
+                    "retry_after": max(1, int(retry_after + 0.999))
+                }
+        return generate_batch_item(data)
+    
+    batch_started = time.perf_counter()
+    # Long enough for every item to use its full timeout; items still queued after
+    # it (e.g. behind abandoned generations holding the workers) are never started
+    batch_deadline = time.monotonic() + item_timeout * -(-len(questionnaires) // concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='gift-batch')
+    futures = {executor.submit(run_item, index, data): index for index, data in enumerate(questionnaires)}
+    
+    def release_slots():
+        executor.shutdown(wait=False, cancel_futures=True)
+        # An abandoned generation keeps its slot until its worker actually finishes
+        running = 0
+        for future in futures:
+            if not future.done():
+                future.add_done_callback(lambda _: generation_slots.release(1))
+                running += 1
+        generation_slots.release(concurrency - running)
+    
+    def generate_lines():
+        pending = dict(futures)
+        succeeded = failed = 0
+        
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                
+                finished = []
+                for future in done:
+                    index = pending[future]
+                    try:
+                        line = future.result()
+                    except Exception as e:
+                        logger.error(f"Batch item {index} failed: {str(e)}")
+                        error_message, error_code = describe_generation_error(e)
+                        line = {"success": False, "error": error_message, "code": error_code}
+                    finished.append((index, line))
+                
+                for future, index in pending.items():
+                    if future in done:
+                        continue
+                    if index in started_at:
+                        if now - started_at[index] > item_timeout:
+                            finished.append((index, {
+                                "success": False,
+                                "error": f"Generation did not finish within {item_timeout:.0f}s",
+                                "code": "ITEM_TIMEOUT"
+                            }))
+                    elif now > batch_deadline and future.cancel():
+                        finished.append((index, {
+                            "success": False,
+                            "error": "Generation did not start before the batch deadline",
+                            "code": "ITEM_TIMEOUT"
+                        }))
+                
+                finished_indexes = {index for index, _ in finished}
+                pending = {future: index for future, index in pending.items() if index not in finished_indexes}
+                
+                for index, line in finished:
+                    if line['success']:
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    if index in started_at:
+                        line['elapsed_ms'] = round((now - started_at[index]) * 1000)
+                    yield json.dumps({"index": index, **line}) + '\n'
+            
+            elapsed_ms = round((time.perf_counter() - batch_started) * 1000)
+            logger.info(f"Batch finished: {succeeded} succeeded, {failed} failed in {elapsed_ms}ms")
+            yield json.dumps({
+                "done": True,
+                "total": len(questionnaires),
+                "succeeded": succeeded,
+                "failed": failed,
+                "elapsed_ms": elapsed_ms
+            }) + '\n'
+        
+        finally:
+            # Runs on normal completion and when the client disconnects part-way
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    response = Response(
+        stream_with_context(generate_lines()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+    # Also runs if the stream is closed before its first line
+    response.call_on_close(release_slots)
+    return response
+
 @app.route('/results/<result_id>')
 def view_results(result_id: str):
     """
@@ -2593,18 +4262,10 @@ def view_results(result_id: str):
             html_content = f.read()
         
         # Inject result data into the page for JavaScript to use
-        # Convert datetime objects to ISO strings for JSON serialization
-        serializable_data = {
-            'id': result_data['id'],
-            'gift_ideas': result_data['gift_ideas'],
-            'questions_answers': result_data['questions_answers'],
-            'created_at': result_data['created_at'].isoformat(),
-            'expires_at': result_data['expires_at'].isoformat()
-        }
-        
+        # The JSON document was serialized once when the result was stored
         script_injection = f"""
     <script>
-        window.RESULT_DATA = {json.dumps(serializable_data)};
+        window.RESULT_DATA = {result_data.document().decode('utf-8')};
         window.RESULT_ID = "{result_id}";
     </script>
         """
@@ -2622,11 +4283,31 @@ def view_results(result_id: str):
             "code": "RESULTS_PAGE_ERROR"
         }), 500
 
+def build_results_api_body(result_data) -> bytes:
+    """
+    Build the /api/results response body from a stored result.
+    
+    Splices the API envelope onto the pre-serialized result document, so
+    repeat fetches only concatenate bytes instead of re-running json.dumps.
+    
+    Args:
+        result_data: StoredResult returned by get_result
+        
+    Returns:
+        JSON response body
+    """
+    document = result_data.document()
+    envelope = '{"success": true, "result_id": %s, ' % json.dumps(result_data.id)
+    return envelope.encode('utf-8') + document[1:]
+
 @app.route('/api/results/<result_id>')
 def get_results_api(result_id: str):
     """
     API endpoint to get results data by ID.
     Used by JavaScript to load results dynamically.
+    
+    Results are immutable, so the response carries a strong ETag and
+    conditional requests with a matching If-None-Match get a 304.
     """
     try:
         result_data = get_result(result_id)
@@ -2638,14 +4319,18 @@ def get_results_api(result_id: str):
                 "code": "RESULTS_NOT_FOUND"
             }), 404
         
-        return jsonify({
-            "success": True,
-            "result_id": result_id,
-            "gift_ideas": result_data['gift_ideas'],
-            "questions_answers": result_data['questions_answers'],
-            "created_at": result_data['created_at'].isoformat(),
-            "expires_at": result_data['expires_at'].isoformat()
-        })
+        # Revalidation only needs the stored ETag - no decompression or serialization
+        if request.if_none_match.contains(result_data.etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(
+                build_results_api_body(result_data),
+                mimetype='application/json'
+            )
+        
+        response.set_etag(result_data.etag)
+        response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
         
     except Exception as e:
         logger.error(f"Error retrieving results {result_id}: {str(e)}")
@@ -2659,10 +4344,12 @@ def get_results_api(result_id: str):
 def manual_cleanup():
     """Manual cleanup endpoint for expired results (admin use)."""
     try:
-        cleanup_expired_results()
+        removed = cleanup_expired_results()
         return jsonify({
             "success": True,
-            "message": "Cleanup completed successfully"
+            "message": "Cleanup completed successfully",
+            "removed": removed,
+            "duration_ms": result_sweeper.last_run_ms
         })
     except Exception as e:
         logger.error(f"Error during manual cleanup: {str(e)}")
@@ -2672,6 +4359,100 @@ def manual_cleanup():
             "code": "CLEANUP_ERROR"
         }), 500
 
+def check_admin_token():
+    """
+    Authorize an admin request by its X-Admin-Token header.
+
+    Returns:
+        None if authorized, otherwise an error response tuple
+    """
+    admin_token = app.config.get('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({
+            "success": False,
+            "error": "Admin endpoints are disabled",
+            "code": "ADMIN_DISABLED"
+        }), 403
+
+    provided = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(provided.encode('utf-8'), admin_token.encode('utf-8')):
+        return jsonify({
+            "success": False,
+            "error": "Invalid admin token",
+            "code": "UNAUTHORIZED"
+        }), 401
+
+    return None
+
+@app.route('/admin/results/export', methods=['GET'])
+def export_results():
+    """Stream every unexpired result as NDJSON (one result document per line)."""
+    error_response = check_admin_token()
+    if error_response:
+        return error_response
+
+    filename = f"rubysgifts-results-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.ndjson"
+    logger.info(f"Exporting results from {results_store.backend_name} store")
+    return Response(
+        stream_with_context(export_ndjson(results_store)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/admin/results/import', methods=['POST'])
+def import_results():
+    """Import NDJSON results from the request body, streamed line by line."""
+    error_response = check_admin_token()
+    if error_response:
+        return error_response
+
+    try:
+        summary = import_ndjson(
+            results_store,
+            request.stream,
+            batch_size=app.config['RESULT_IMPORT_BATCH_SIZE']
+        )
+        logger.info(
+            f"Imported {summary['imported']} results "
+            f"({summary['expired']} expired, {summary['failed']} failed)"
+        )
+        return jsonify({"success": True, **summary})
+    except Exception as e:
+        logger.error(f"Error importing results: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": "Import failed",
+            "code": "IMPORT_ERROR"
+        }), 500
+
+@app.cli.command('export-results')
+@click.argument('output', type=click.File('wb'), default='-')
+def export_results_command(output):
+    """Write every unexpired result to OUTPUT (default stdout) as NDJSON."""
+    count = 0
+    for line in export_ndjson(results_store):
+        output.write(line)
+        count += 1
+    click.echo(f"Exported {count} results", err=True)
+
+@app.cli.command('import-results')
+@click.argument('source', type=click.File('rb'), default='-')
+@click.option('--batch-size', type=int, default=None, help='Records per batch write')
+def import_results_command(source, batch_size):
+    """Load NDJSON results from SOURCE (default stdin) into the configured store."""
+    summary = import_ndjson(
+        results_store,
+        source,
+        batch_size=batch_size or app.config['RESULT_IMPORT_BATCH_SIZE']
+    )
+    for error in summary['errors']:
+        click.echo(error, err=True)
+    click.echo(
+        f"Imported {summary['imported']} results "
+        f"({summary['expired']} expired, {summary['failed']} failed)",
+        err=True
+    )
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
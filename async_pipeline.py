@@ -0,0 +1,172 @@
+"""
+Async Generation Pipeline Runner
+================================
+
+Runs coroutines for the gift generation pipeline (the OpenAI call and the
+image provider cascades) on one long-lived event loop per worker process.
+All outbound I/O of a generation, and of every generation running at the
+same time, is multiplexed on that loop through one shared ``httpx.AsyncClient``
+instead of each request holding a thread per blocking call.
+
+Synchronous code (Flask views) submits work with ``AsyncPipelineRunner.run``
+and waits for the result.
+
+httpx is an optional dependency: without it ``HTTPX_AVAILABLE`` is False and
+callers should stay on the synchronous pipeline.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+
+    # Exception types for resilience.call_with_resilience_async
+    TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.NetworkError)
+    REQUEST_ERRORS = (httpx.HTTPError,)
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+    TRANSIENT_ERRORS = ()
+    REQUEST_ERRORS = ()
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineTimeoutError(Exception):
+    """Raised when a submitted coroutine does not finish within its timeout."""
+
+
+class AsyncPipelineRunner:
+    """
+    Background event loop thread owning a pooled async HTTP client.
+
+    Usage::
+
+        runner = AsyncPipelineRunner()
+        result = runner.run(lambda client: fetch_all(client), timeout=60)
+
+    The loop and client are created on first use, and again in a child
+    process after fork (neither survives a fork).
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 timeout: float = 15.0):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("AsyncPipelineRunner requires httpx (pip install httpx)")
+
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.in_flight = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop, self._client
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='async-pipeline', daemon=True)
+            thread.start()
+
+            async def create_client():
+                return httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections
+                    ),
+                    follow_redirects=True
+                )
+
+            self._client = asyncio.run_coroutine_threadsafe(create_client(), loop).result()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            logger.info(f"Started async pipeline loop (max {self.max_connections} connections)")
+            return self._loop, self._client
+
+    def run(self, coro_factory: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the pipeline loop and wait for its result.
+
+        Args:
+            coro_factory: Called on the loop with the shared ``httpx.AsyncClient``;
+                returns the coroutine to run
+            timeout: Seconds to wait before cancelling it (None = no limit)
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            PipelineTimeoutError: If the coroutine did not finish in time
+            Whatever the coroutine raised
+        """
+        loop, client = self._ensure_started()
+
+        async def runner():
+            return await coro_factory(client)
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+        future = asyncio.run_coroutine_threadsafe(runner(), loop)
+        try:
+            result = future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise PipelineTimeoutError(f"Gift generation timeout after {timeout:.0f}s")
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the loop thread."""
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop = self._client = self._thread = None
+            self._pid = None
+
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self._loop is not None and self._pid == os.getpid(),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'in_flight': self.in_flight,
+                'max_connections': self.max_connections
+            }
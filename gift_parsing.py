@@ -0,0 +1,237 @@
+"""
+Incremental Gift Parsing
+========================
+
+Parses the ``{"gift_ideas": [...]}`` JSON document produced by the model while
+it is still being streamed, so each gift can be used as soon as its object is
+complete instead of after the whole completion has arrived.
+
+The parser only tracks enough JSON structure to find the ``gift_ideas`` array
+and the boundaries of its elements (string/escape state and bracket depth);
+each completed element is then handed to ``json.loads``.
+
+extract_gift_json() applies the same machinery to a complete reply that
+``json.loads`` rejects: prose or a Markdown code fence around the JSON, or a
+reply cut off at ``max_tokens`` whose finished gifts can still be salvaged.
+"""
+
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GIFT_ARRAY_PATTERN = re.compile(r'"gift_ideas"\s*:\s*\[')
+CODE_FENCE_PATTERN = re.compile(r'```[A-Za-z]*\s*\n?(.*?)```', re.DOTALL)
+
+
+class IncrementalGiftParser:
+    """
+    Incremental parser for the elements of a streamed ``gift_ideas`` array.
+
+    Usage::
+
+        parser = IncrementalGiftParser()
+        for chunk in stream:
+            for gift in parser.feed(chunk):
+                ...
+        parser.text  # full completion, for logging or a fallback parse
+
+    Every character is scanned once, however the text is split into chunks,
+    and only the gift being parsed is kept for scanning, so feeding a reply
+    takes time linear in its length.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []   # Full completion received so far, joined on demand
+        self._buffer = ''              # Unconsumed tail of the completion
+        self._pos = 0                  # Next index of self._buffer to scan
+        self._in_array = False
+        self._depth = 0                # Nesting depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self._element_start: Optional[int] = None
+
+        self.closed = False            # True once the array's closing bracket was seen
+        self.gifts: List[Dict[str, Any]] = []
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Add streamed text and return the gifts completed by it.
+
+        Args:
+            chunk: Next piece of the completion text
+
+        Returns:
+            Newly completed gift dictionaries, in order
+        """
+        if not chunk:
+            return []
+
+        self._chunks.append(chunk)
+        if self.closed:
+            return []
+
+        text = self._buffer + chunk
+        if not self._in_array:
+            match = GIFT_ARRAY_PATTERN.search(text, max(0, self._pos - 32))
+            if not match:
+                # Keep a tail to rescan in case the key is split across chunks
+                self._buffer = text[-32:]
+                self._pos = len(self._buffer)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        completed = []
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # Closing bracket of the gift_ideas array itself
+                    self.closed = True
+                    self._buffer = ''
+                    self._pos = 0
+                    return completed
+
+                self._depth -= 1
+                if self._depth == 0 and self._element_start is not None:
+                    gift = self._parse_element(text[self._element_start:i + 1])
+                    self._element_start = None
+                    if gift is not None:
+                        self.gifts.append(gift)
+                        completed.append(gift)
+
+        # Drop what was scanned, except the start of an unfinished gift
+        keep_from = self._element_start if self._element_start is not None else len(text)
+        self._buffer = text[keep_from:]
+        self._pos = len(text) - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+        return completed
+
+    @property
+    def text(self) -> str:
+        """Full completion received so far."""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def _parse_element(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            element = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            logger.warning(f"Skipping unparseable streamed gift: {e}")
+            return None
+
+        if not isinstance(element, dict):
+            self.errors += 1
+            logger.warning("Skipping streamed gift that is not a JSON object")
+            return None
+        return element
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the contents of the first Markdown code fence, or ``text`` unchanged."""
+    match = CODE_FENCE_PATTERN.search(text)
+    if match:
+        return match.group(1)
+    # An opening fence whose closing fence was cut off
+    if text.lstrip().startswith('```'):
+        return text.lstrip()[3:].split('\n', 1)[-1]
+    return text
+
+
+def find_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced top-level ``{...}`` in ``text``.
+
+    Braces inside JSON strings are ignored. Returns None if no object is
+    closed (for example because the text was truncated).
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def extract_gift_json(text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Extract the ``{"gift_ideas": [...]}`` document from a model reply.
+
+    Tries, in order: the reply as-is, the outermost JSON object inside any
+    code fence or surrounding prose, and finally salvaging the complete gift
+    objects from a ``gift_ideas`` array that was cut off.
+
+    Args:
+        text: Full completion text
+
+    Returns:
+        Tuple of (gift data or None, complete); ``complete`` is False when
+        the gifts were salvaged from a truncated reply
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data, True
+    except json.JSONDecodeError:
+        pass
+
+    unfenced = strip_code_fences(text)
+    candidate = find_json_object(unfenced)
+    if candidate is not None:
+        try:
+            data = json.loads(candidate)
+            if isinstance(data, dict):
+                logger.info("Extracted gift JSON from surrounding text")
+                return data, True
+        except json.JSONDecodeError:
+            pass
+
+    parser = IncrementalGiftParser()
+    parser.feed(unfenced)
+    if parser.gifts:
+        logger.warning(f"Salvaged {len(parser.gifts)} complete gifts from a truncated reply")
+        return {'gift_ideas': parser.gifts}, False
+
+    return None, False
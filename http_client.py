@@ -0,0 +1,297 @@
+"""
+Pooled Outbound HTTP Client
+===========================
+
+One client for every synchronous outbound HTTP call (OpenAI and the image
+providers), so connections are kept alive and reused instead of paying TCP
+and TLS setup on every upstream hit.
+
+- One ``requests.Session`` per upstream host, each with its own keep-alive
+  connection pool of ``pool_maxsize`` connections
+- Separate connect and read timeouts: a bare number passed as ``timeout``
+  is taken as the read timeout
+- Default headers per provider, merged under the headers of each call
+- Per-host metrics: requests, errors, timeouts, status classes, latency and
+  connections opened (fewer connections than requests means reuse)
+- Optional request budgets per host (token buckets shared by all threads):
+  a request only waits when the recent request rate to its host would
+  exceed the budget, and fails instead of waiting longer than
+  ``max_throttle_wait``
+
+Sessions do not keep cookies, so pooling never carries state from one
+user's request to another's. Retries are left to the caller (see
+resilience.py).
+"""
+
+import os
+import time
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+
+class UpstreamBudgetExceeded(requests.exceptions.RequestException):
+    """Raised instead of sending a request that would wait too long for its host's budget."""
+
+
+class _NoCookies(DefaultCookiePolicy):
+    """Cookie policy that never stores a cookie."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class _HostStats:
+    """Counters for one upstream host."""
+
+    __slots__ = ('requests', 'errors', 'timeouts', 'statuses', 'total_ms', 'max_ms',
+                 'throttled', 'throttle_ms', 'over_budget')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.statuses: Dict[str, int] = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.throttled = 0
+        self.throttle_ms = 0.0
+        self.over_budget = 0
+
+
+class HTTPClient:
+    """
+    Thread-safe pooled HTTP client.
+
+    Usage::
+
+        client = HTTPClient(pool_maxsize=20, connect_timeout=3.05, read_timeout=15)
+        client.register_provider('pixabay', {'Accept': 'application/json'})
+        client.limit_rate(['https://www.bing.com'], rate=2, burst=4)
+        response = client.get(url, provider='pixabay', params=params, timeout=10)
+
+    Sessions are created per host on first use, and again in a child process
+    after fork (pooled sockets must not be shared between processes).
+    """
+
+    def __init__(self, pool_maxsize: int = 20, connect_timeout: float = 3.05, read_timeout: float = 15.0,
+                 max_throttle_wait: float = 10.0):
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_throttle_wait = max_throttle_wait
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._sessions: Dict[str, Tuple[requests.Session, HTTPAdapter]] = {}
+        self._provider_headers: Dict[str, Dict[str, str]] = {}
+        self._stats: Dict[str, _HostStats] = {}
+        self._budgets: Dict[str, TokenBucket] = {}
+
+    def register_provider(self, name: str, headers: Dict[str, str]) -> None:
+        """Set the default headers sent with every request made for ``name``."""
+        with self._lock:
+            self._provider_headers[name] = dict(headers)
+
+    def limit_rate(self, urls: Iterable[str], rate: float, burst: float) -> None:
+        """
+        Share one request budget between the hosts of ``urls``.
+
+        Args:
+            urls: URLs (or base URLs) of the hosts to limit
+            rate: Sustained requests per second across all threads
+            burst: Requests allowed back to back before the rate applies
+        """
+        bucket = TokenBucket(rate, burst)
+        with self._lock:
+            for url in urls:
+                self._budgets[self._host(url)] = bucket
+
+    def reserve(self, url: str) -> float:
+        """
+        Take one request from the budget of ``url``'s host without waiting.
+
+        For callers that wait themselves (e.g. with ``asyncio.sleep``);
+        ``request`` does this and sleeps as needed.
+
+        Returns:
+            Seconds to wait before sending the request (0 for unlimited hosts)
+
+        Raises:
+            UpstreamBudgetExceeded: If the wait would exceed ``max_throttle_wait``
+        """
+        host = self._host(url)
+        bucket = self._budgets.get(host)
+        if bucket is None:
+            return 0.0
+
+        wait = bucket.reserve(1, self.max_throttle_wait)
+        with self._lock:
+            stats = self._stats.setdefault(host, _HostStats())
+            if wait is None:
+                stats.over_budget += 1
+            elif wait > 0:
+                stats.throttled += 1
+                stats.throttle_ms += wait * 1000
+        if wait is None:
+            raise UpstreamBudgetExceeded(f"Request budget for {host} exhausted")
+        return wait
+
+    def throttle(self, url: str) -> None:
+        """Wait until the budget of ``url``'s host allows one more request."""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def session(self, url: str) -> requests.Session:
+        """
+        Pooled session for the host of ``url``.
+
+        Returns:
+            The host's ``requests.Session`` (shared by all threads)
+        """
+        return self._session_for(self._host(url))[0]
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _session_for(self, host: str) -> Tuple[requests.Session, HTTPAdapter]:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._sessions = {}
+
+            entry = self._sessions.get(host)
+            if entry is None:
+                session = requests.Session()
+                session.cookies.set_policy(_NoCookies())
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount(host, adapter)
+                entry = self._sessions[host] = (session, adapter)
+                self._stats.setdefault(host, _HostStats())
+                logger.info(f"Opened HTTP connection pool for {host} (max {self.pool_maxsize} connections)")
+            return entry
+
+    def _timeout(self, timeout: Timeout) -> Tuple[float, float]:
+        if timeout is None:
+            return self.connect_timeout, self.read_timeout
+        if isinstance(timeout, tuple):
+            return timeout
+        return self.connect_timeout, timeout
+
+    def request(self, method: str, url: str, provider: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: Timeout = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request through the host's pooled session.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            provider: Name whose registered default headers are applied
+            headers: Per-call headers (take precedence over provider defaults)
+            timeout: Read timeout in seconds, a (connect, read) tuple, or None
+                for the client defaults
+            **kwargs: Passed on to ``requests.Session.request``
+
+        Returns:
+            The response
+
+        Raises:
+            UpstreamBudgetExceeded: If the host's request budget is exhausted
+            requests.exceptions.RequestException: If the request failed
+        """
+        host = self._host(url)
+        session, _ = self._session_for(host)
+        self.throttle(url)
+
+        merged_headers = dict(self._provider_headers.get(provider, {})) if provider else {}
+        if headers:
+            merged_headers.update(headers)
+
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, headers=merged_headers or None,
+                                       timeout=self._timeout(timeout), **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record(host, started, error=e)
+            raise
+        self._record(host, started, status=response.status_code)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, host: str, started: float, status: Optional[int] = None,
+                error: Optional[BaseException] = None) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._stats.setdefault(host, _HostStats())
+            stats.requests += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error is not None:
+                stats.errors += 1
+                if isinstance(error, requests.exceptions.Timeout):
+                    stats.timeouts += 1
+            else:
+                status_class = f"{status // 100}xx"
+                stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+
+    @staticmethod
+    def _connections_opened(adapter: HTTPAdapter) -> int:
+        pools = adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {}
+            for host, stats in self._stats.items():
+                entry = self._sessions.get(host)
+                hosts[host] = {
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'timeouts': stats.timeouts,
+                    'statuses': dict(stats.statuses),
+                    'avg_ms': round(stats.total_ms / stats.requests, 1) if stats.requests else 0.0,
+                    'max_ms': round(stats.max_ms, 1),
+                    'connections_opened': self._connections_opened(entry[1]) if entry is not None else 0,
+                    'throttled': stats.throttled,
+                    'throttle_ms': round(stats.throttle_ms, 1),
+                    'over_budget': stats.over_budget
+                }
+                if host in self._budgets:
+                    hosts[host]['budget'] = {
+                        'rate_per_second': self._budgets[host].rate,
+                        'burst': self._budgets[host].burst
+                    }
+            return {
+                'pool_maxsize': self.pool_maxsize,
+                'connect_timeout': self.connect_timeout,
+                'read_timeout': self.read_timeout,
+                'max_throttle_wait': self.max_throttle_wait,
+                'hosts': hosts
+            }
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session, _ in sessions.values():
+            session.close()
@@ -0,0 +1,225 @@
+"""
+Image Search Cache
+==================
+
+Results of image searches, keyed on the cleaned search terms and the number
+of images asked for, so product terms the AI suggests again and again
+(e.g. "kindle paperwhite") skip the provider cascade.
+
+- Memory tier: a ttl_cache.TTLCache (bounded LRU with per-entry TTLs)
+- Disk tier (optional): a SQLite table shared by worker processes that
+  survives restarts; disk hits are copied back into the memory tier
+
+Each entry carries its own TTL, chosen by the caller from where its images
+came from (curated images can be kept far longer than scraped ones). Hit
+ratio and the provider calls saved by hits are tracked for /health.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteImageCache:
+    """
+    Disk tier: cached image lists in a SQLite table.
+
+    Expired rows are skipped on read and deleted now and then on write.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS image_search_cache ("
+        " key TEXT PRIMARY KEY,"
+        " images TEXT NOT NULL,"
+        " upstream_calls INTEGER NOT NULL,"
+        " expires_at REAL NOT NULL"
+        ")"
+    )
+
+    SQL_GET = "SELECT images, upstream_calls, expires_at FROM image_search_cache WHERE key = ? AND expires_at > ?"
+    SQL_PUT = ("INSERT OR REPLACE INTO image_search_cache (key, images, upstream_calls, expires_at) "
+               "VALUES (?, ?, ?, ?)")
+    SQL_PRUNE = "DELETE FROM image_search_cache WHERE expires_at <= ?"
+    SQL_COUNT = "SELECT COUNT(*) FROM image_search_cache"
+
+    PRUNE_EVERY = 500  # Writes between prunes of expired rows
+
+    def __init__(self, path: str, busy_timeout_ms: int = 2000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._local = threading.local()
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        conn = self._connection()
+        conn.execute(self.SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; connections inherited across fork are dropped
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Dict with 'images', 'upstream_calls' and 'ttl' (seconds left), or None
+        """
+        now = time.time()
+        row = self._connection().execute(self.SQL_GET, (key, now)).fetchone()
+        if row is None:
+            return None
+        return {'images': json.loads(row[0]), 'upstream_calls': row[1], 'ttl': row[2] - now}
+
+    def set(self, key: str, images: List[Dict[str, Any]], upstream_calls: int, ttl: float) -> None:
+        now = time.time()
+        conn = self._connection()
+        conn.execute(self.SQL_PUT, (key, json.dumps(images), upstream_calls, now + ttl))
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            conn.execute(self.SQL_PRUNE, (now,))
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'entries': self._connection().execute(self.SQL_COUNT).fetchone()[0]
+        }
+
+
+class ImageSearchCache:
+    """
+    Two-tier cache of image search results.
+
+    Usage::
+
+        cache = ImageSearchCache(max_entries=2048, max_ttl=604800)
+        images = cache.get(cleaned_terms, count)
+        if images is None:
+            images = search(...)
+            cache.set(cleaned_terms, count, images, ttl=21600, upstream_calls=3)
+
+    Cached lists are copied on the way in and out, so callers may modify
+    the images they get back.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_ttl: float = 604800.0,
+                 disk: Optional[SQLiteImageCache] = None):
+        self.memory = TTLCache(max_entries=max_entries, ttl=max_ttl)
+        self.disk = disk
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_upstream_calls = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.enabled
+
+    @staticmethod
+    def key(cleaned_terms: str, count: int) -> str:
+        return f"{count}:{' '.join(cleaned_terms.lower().split())}"
+
+    def get(self, cleaned_terms: str, count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up the images of an earlier search.
+
+        Returns:
+            A copy of the cached images, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = self.key(cleaned_terms, count)
+        entry = self.memory.get(key)
+        from_disk = False
+
+        if entry is None and self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Image cache disk read failed: {str(e)}")
+                entry = None
+            if entry is not None:
+                from_disk = True
+                self.memory.set(key, {'images': entry['images'], 'upstream_calls': entry['upstream_calls']},
+                                ttl=entry['ttl'])
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if from_disk:
+                self.disk_hits += 1
+            self.saved_upstream_calls += entry['upstream_calls']
+
+        return json.loads(json.dumps(entry['images']))
+
+    def set(self, cleaned_terms: str, count: int, images: List[Dict[str, Any]], ttl: float,
+            upstream_calls: int = 0) -> None:
+        """
+        Store the images found by a search.
+
+        Args:
+            cleaned_terms: clean_search_terms() output
+            count: Number of images that were asked for
+            images: Images the search returned
+            ttl: Seconds to keep them (0 skips caching)
+            upstream_calls: Provider calls the search made (counted as saved on each hit)
+        """
+        if not self.enabled or ttl <= 0:
+            return
+
+        key = self.key(cleaned_terms, count)
+        images = json.loads(json.dumps(images))
+        self.memory.set(key, {'images': images, 'upstream_calls': upstream_calls}, ttl=ttl)
+
+        if self.disk is not None:
+            try:
+                self.disk.set(key, images, upstream_calls, ttl)
+            except sqlite3.Error as e:
+                logger.warning(f"Image cache disk write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'saved_upstream_calls': self.saved_upstream_calls,
+                'memory': self.memory.stats()
+            }
+        if self.disk is not None:
+            try:
+                stats['disk'] = self.disk.stats()
+            except sqlite3.Error as e:
+                stats['disk'] = {'error': str(e)}
+        return stats
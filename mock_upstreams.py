@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Mock Upstream Server for Offline Load Testing
+=============================================
+
+A local stand-in for every external service the gift pipeline calls, so
+/generate_gifts can be benchmarked without spending OpenAI tokens or being
+rate limited by the image search providers:
+
+- OpenAI      POST /v1/chat/completions  (regular and ``stream: true``)
+- Bing        GET  /images/search
+- DuckDuckGo  GET  /  (vqd page, or the instant answer API with format=json),
+              GET  /i.js, GET /html/
+- Pexels      GET  /v1/search
+- Pixabay     GET  /api/  (last-resort provider in the image cascade)
+
+Responses are built from fixture data shaped like the real payloads. Each
+upstream has its own latency distribution, error rate and timeout rate,
+configurable at startup or at runtime through ``/_mock/config``.
+
+Usage:
+    python mock_upstreams.py --port 8090 \\
+        --latency openai=lognormal:1.2:0.4 --latency bing=uniform:0.1:0.6 \\
+        --error-rate openai=0.05 --timeout-rate bing=0.02
+
+Then point the app at it (see .env.example):
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1
+    BING_BASE_URL=http://127.0.0.1:8090
+    DUCKDUCKGO_BASE_URL=http://127.0.0.1:8090
+    DUCKDUCKGO_HTML_BASE_URL=http://127.0.0.1:8090
+    DUCKDUCKGO_API_BASE_URL=http://127.0.0.1:8090
+    PEXELS_BASE_URL=http://127.0.0.1:8090/v1
+    PIXABAY_BASE_URL=http://127.0.0.1:8090
+"""
+
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from typing import Any, Dict, List
+
+from flask import Flask, Response, request, jsonify
+
+UPSTREAMS = ('openai', 'bing', 'duckduckgo', 'pexels', 'pixabay')
+
+# Fixture gift ideas the mock completion picks from (3 per response)
+GIFT_FIXTURES = [
+    {
+        "title": "Personalized Leather Journal",
+        "description": "They keep mentioning wanting to write more; a journal with their nickname embossed makes it personal without being sentimental.",
+        "starter": "Hand it over with the first page already filled with an inside joke.",
+        "reaction": "A surprised laugh, then they'll flip through every page.",
+        "image_search_terms": "leather journal personalized",
+        "amazon_search_query": "personalized leather journal A5",
+        "price_range": "₹800-1,500"
+    },
+    {
+        "title": "Noise-Cancelling Earbuds",
+        "description": "Their commute complaints point to a daily pain point; quiet is a gift they will use twice a day.",
+        "starter": "Tell them it's an apology from the universe for every traffic jam.",
+        "reaction": "Immediate pairing and a quiet 'okay, this is great'.",
+        "image_search_terms": "noise cancelling earbuds",
+        "amazon_search_query": "noise cancelling wireless earbuds",
+        "price_range": "₹2,000-4,500"
+    },
+    {
+        "title": "Indoor Herb Garden Kit",
+        "description": "Low effort, visibly alive, and it answers the 'plants always die on me' complaint.",
+        "starter": "Give it with a promise to be the designated plant-sitter.",
+        "reaction": "They'll name every plant within the week.",
+        "image_search_terms": "indoor herb garden kit",
+        "amazon_search_query": "indoor herb garden starter kit",
+        "price_range": "₹900-1,800"
+    },
+    {
+        "title": "Specialty Coffee Sampler",
+        "description": "Previous coffee gifts landed well; a sampler turns a habit into a small weekly adventure.",
+        "starter": "Brew the first cup for them.",
+        "reaction": "Detailed opinions on each roast, unprompted.",
+        "image_search_terms": "specialty coffee sampler box",
+        "amazon_search_query": "single origin coffee sampler",
+        "price_range": "₹700-1,400"
+    },
+    {
+        "title": "Weighted Blanket",
+        "description": "Stress at work keeps coming up; a weighted blanket is comfort they don't have to ask for.",
+        "starter": "Drape it over them mid-complaint.",
+        "reaction": "Silence, followed by refusing to get up.",
+        "image_search_terms": "weighted blanket",
+        "amazon_search_query": "weighted blanket 5kg",
+        "price_range": "₹2,500-4,000"
+    },
+    {
+        "title": "Board Game Night Bundle",
+        "description": "They complain about never seeing friends; this turns the gift into a standing plan.",
+        "starter": "Include a handwritten invite for the first game night.",
+        "reaction": "An instant group chat message to schedule it.",
+        "image_search_terms": "party board game",
+        "amazon_search_query": "party board game for adults",
+        "price_range": "₹1,000-2,500"
+    }
+]
+
+IMAGE_HOSTS = ['m.media-amazon.com/images/I', 'i.ebayimg.com/images/g', 'i.etsystatic.com/il']
+
+
+class UpstreamProfile:
+    """Latency, error and timeout behaviour of one mocked upstream."""
+
+    def __init__(self, latency: str = 'fixed:0', error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 timeout_seconds: float = 60.0, token_delay: float = 0.02):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.token_delay = token_delay  # Seconds between streamed chunks (OpenAI only)
+
+    def sample_latency(self) -> float:
+        """
+        Draw a response delay from the latency spec.
+
+        Specs: ``fixed:S``, ``uniform:LO:HI``, ``normal:MEAN:STDDEV``,
+        ``lognormal:MEDIAN:SIGMA`` (seconds).
+        """
+        kind, *params = self.latency.split(':')
+        values = [float(p) for p in params]
+        if kind == 'fixed':
+            return values[0]
+        if kind == 'uniform':
+            return random.uniform(values[0], values[1])
+        if kind == 'normal':
+            return max(0.0, random.gauss(values[0], values[1]))
+        if kind == 'lognormal':
+            return random.lognormvariate(0, values[1]) * values[0]
+        raise ValueError(f"Unknown latency distribution: {kind}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+app = Flask(__name__)
+profiles = {name: UpstreamProfile() for name in UPSTREAMS}
+counters_lock = threading.Lock()
+counters = {name: {'requests': 0, 'errors': 0, 'timeouts': 0} for name in UPSTREAMS}
+
+
+def inject_faults(upstream: str):
+    """
+    Apply the upstream's latency and maybe fail the request.
+
+    Returns:
+        An error response to send instead of the real one, or None
+    """
+    profile = profiles[upstream]
+    roll = random.random()
+
+    with counters_lock:
+        counters[upstream]['requests'] += 1
+        if roll < profile.timeout_rate:
+            counters[upstream]['timeouts'] += 1
+        elif roll < profile.timeout_rate + profile.error_rate:
+            counters[upstream]['errors'] += 1
+
+    if roll < profile.timeout_rate:
+        # Hold the connection past any sane client timeout
+        time.sleep(profile.timeout_seconds)
+        return jsonify({"error": {"message": "Mock timeout", "type": "timeout"}}), 504
+
+    time.sleep(profile.sample_latency())
+
+    if roll < profile.timeout_rate + profile.error_rate:
+        if random.random() < 0.5:
+            response = jsonify({"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}})
+            response.headers['Retry-After'] = '1'
+            return response, 429
+        return jsonify({"error": {"message": "The server is overloaded (mock)", "type": "server_error"}}), 503
+
+    return None
+
+
+def seeded_random(text: str) -> random.Random:
+    """Deterministic RNG per query so identical requests get identical fixtures."""
+    return random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+
+
+def fixture_images(query: str, count: int) -> List[Dict[str, Any]]:
+    rng = seeded_random(query)
+    slug = '-'.join(query.lower().split())[:40] or 'product'
+    images = []
+    for i in range(count):
+        host = rng.choice(IMAGE_HOSTS)
+        image_id = f"{slug}-{rng.randrange(10 ** 8):08d}"
+        images.append({
+            'image': f"https://{host}/{image_id}-large.jpg",
+            'thumbnail': f"https://{host}/{image_id}-small.jpg",
+            'title': f"{query.title()} #{i + 1}",
+            'url': f"https://shop.example.com/products/{image_id}",
+            'width': rng.choice([600, 800, 1000]),
+            'height': rng.choice([400, 600, 800])
+        })
+    return images
+
+
+# -- OpenAI -------------------------------------------------------------------
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    error = inject_faults('openai')
+    if error:
+        return error
+
+    body = request.get_json(silent=True) or {}
+    prompt = json.dumps(body.get('messages', []))
+    gifts = seeded_random(prompt).sample(GIFT_FIXTURES, 3)
+    content = json.dumps({"gift_ideas": gifts}, ensure_ascii=False)
+    completion_id = f"chatcmpl-mock{random.randrange(10 ** 12)}"
+    model = body.get('model', 'gpt-3.5-turbo')
+
+    if not body.get('stream'):
+        return jsonify({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4}
+        })
+
+    token_delay = profiles['openai'].token_delay
+
+    def generate():
+        # Roughly token-sized deltas, like the real API
+        for start in range(0, len(content), 4):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + 4]}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            time.sleep(token_delay)
+        yield "data: [DONE]\n\n"
+
+    return Response(generate(), mimetype='text/event-stream')
+
+
+# -- Bing ---------------------------------------------------------------------
+
+@app.route('/images/search')
+def bing_images():
+    error = inject_faults('bing')
+    if error:
+        return error
+
+    query = request.args.get('q', '')
+    # Bing embeds result metadata as JSON with escaped slashes inside the page
+    items = []
+    for img in fixture_images(query, 12):
+        metadata = json.dumps({"murl": img['image'], "turl": img['thumbnail']}, separators=(',', ':')).replace('/', '\\u002f')
+        items.append(f'<a class="iusc" m=\'{metadata}\'></a>')
+    return f"<html><body>{''.join(items)}</body></html>"
+
+
+# -- DuckDuckGo ---------------------------------------------------------------
+
+@app.route('/')
+def duckduckgo_page():
+    error = inject_faults('duckduckgo')
+    if error:
+        return error
+
+    query = request.args.get('q', '')
+    if request.args.get('format') == 'json':
+        # Instant answer API
+        image = fixture_images(query, 1)[0]
+        return jsonify({"Heading": query.title(), "Image": image['image'], "FirstURL": image['url']})
+
+    vqd = f"4-{seeded_random(query).randrange(10 ** 30)}"
+    return f'<html><script>var vqd="{vqd}";</script><body>{query}</body></html>'
+
+
+@app.route('/i.js')
+def duckduckgo_images():
+    error = inject_faults('duckduckgo')
+    if error:
+        return error
+
+    query = request.args.get('q', '')
+    return jsonify({"query": query, "results": fixture_images(query, 20), "next": "i.js?s=100"})
+
+
+@app.route('/html/')
+def duckduckgo_html():
+    error = inject_faults('duckduckgo')
+    if error:
+        return error
+
+    query = request.args.get('q', '')
+    results = ''.join(f'<div class="result"><img src="{img["image"]}"></div>' for img in fixture_images(query, 6))
+    return f"<html><body>{results}</body></html>"
+
+
+# -- Pexels -------------------------------------------------------------------
+
+@app.route('/v1/search')
+def pexels_search():
+    error = inject_faults('pexels')
+    if error:
+        return error
+
+    query = request.args.get('query', '')
+    per_page = min(int(request.args.get('per_page', 15)), 80)
+    photos = []
+    for i, img in enumerate(fixture_images(query, per_page)):
+        photos.append({
+            "id": 1000 + i,
+            "width": img['width'],
+            "height": img['height'],
+            "alt": img['title'],
+            "photographer": "Mock Photographer",
+            "photographer_url": "https://www.pexels.com/@mock",
+            "src": {"large": img['image'], "medium": img['image'], "small": img['thumbnail']}
+        })
+    return jsonify({"page": 1, "per_page": per_page, "photos": photos, "total_results": len(photos)})
+
+
+@app.route('/api/')
+def pixabay_search():
+    error = inject_faults('pixabay')
+    if error:
+        return error
+
+    query = request.args.get('q', '')
+    per_page = min(int(request.args.get('per_page', 20)), 200)
+    hits = []
+    for i, img in enumerate(fixture_images(query, per_page)):
+        hits.append({
+            "id": 2000 + i,
+            "tags": query,
+            "webformatURL": img['image'],
+            "webformatWidth": img['width'],
+            "webformatHeight": img['height'],
+            "previewURL": img['thumbnail'],
+            "user": "mockuser",
+            "user_id": 42
+        })
+    return jsonify({"total": len(hits), "totalHits": len(hits), "hits": hits})
+
+
+# -- Control ------------------------------------------------------------------
+
+@app.route('/_mock/config', methods=['GET', 'POST'])
+def mock_config():
+    """Inspect or change upstream profiles, e.g. {"openai": {"error_rate": 0.2}}."""
+    if request.method == 'POST':
+        updates = request.get_json(silent=True) or {}
+        for upstream, settings in updates.items():
+            if upstream not in profiles:
+                return jsonify({"success": False, "error": f"Unknown upstream: {upstream}"}), 400
+            for key, value in settings.items():
+                if not hasattr(profiles[upstream], key):
+                    return jsonify({"success": False, "error": f"Unknown setting: {key}"}), 400
+                setattr(profiles[upstream], key, value)
+
+    with counters_lock:
+        stats = {name: dict(values) for name, values in counters.items()}
+    return jsonify({
+        "success": True,
+        "profiles": {name: profile.as_dict() for name, profile in profiles.items()},
+        "counters": stats
+    })
+
+
+def parse_assignments(values: List[str], option: str) -> Dict[str, str]:
+    """Parse repeated ``upstream=value`` options (``all=`` applies to every upstream)."""
+    parsed = {}
+    for value in values or []:
+        upstream, _, setting = value.partition('=')
+        targets = UPSTREAMS if upstream == 'all' else [upstream]
+        if not setting or any(target not in UPSTREAMS for target in targets):
+            sys.exit(f"Invalid {option} value: {value!r} (expected upstream=value)")
+        for target in targets:
+            parsed[target] = setting
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Bing/DuckDuckGo/Pexels/Pixabay server for load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', action='append', metavar='UPSTREAM=SPEC',
+                        help="e.g. openai=lognormal:1.2:0.4, bing=uniform:0.1:0.6, all=fixed:0.05")
+    parser.add_argument('--error-rate', action='append', metavar='UPSTREAM=RATE')
+    parser.add_argument('--timeout-rate', action='append', metavar='UPSTREAM=RATE')
+    parser.add_argument('--timeout-seconds', type=float, default=60.0)
+    parser.add_argument('--token-delay', type=float, default=0.02,
+                        help="Seconds between streamed completion chunks")
+    args = parser.parse_args()
+
+    for upstream, spec in parse_assignments(args.latency, '--latency').items():
+        profiles[upstream].latency = spec
+        profiles[upstream].sample_latency()  # Validate early
+    for upstream, rate in parse_assignments(args.error_rate, '--error-rate').items():
+        profiles[upstream].error_rate = float(rate)
+    for upstream, rate in parse_assignments(args.timeout_rate, '--timeout-rate').items():
+        profiles[upstream].timeout_rate = float(rate)
+    for profile in profiles.values():
+        profile.timeout_seconds = args.timeout_seconds
+    profiles['openai'].token_delay = args.token_delay
+
+    print(f"Mock upstreams listening on http://{args.host}:{args.port}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
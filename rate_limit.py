@@ -0,0 +1,297 @@
+"""
+Admission Control
+=================
+
+Cheap checks run before expensive work is started, so overload is turned away
+with a 429 instead of queueing behind workers tied up for tens of seconds.
+
+- TokenBucket: rate limiter with a sustained rate and a burst allowance,
+  either refusing calls over budget or telling them how long to wait
+- KeyedRateLimiter: one token bucket per client key, bounded LRU of keys
+- SQLiteRateLimiter: the same, with bucket state shared between worker
+  processes through a SQLite table
+- ConcurrencyLimiter: non-blocking cap on work in flight at once
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Holds up to ``burst`` tokens and refills at ``rate`` tokens per second.
+    Each admitted call takes ``cost`` tokens; a call that finds too few is
+    rejected with the time until enough will have refilled.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        # Caller holds self._lock
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens if available.
+
+        Returns:
+            Tuple of (admitted, seconds until the call would be admitted)
+        """
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= cost:
+                self._tokens -= cost
+                return True, 0.0
+            if cost > self.burst or self.rate <= 0:
+                return False, float('inf')
+            return False, (cost - self._tokens) / self.rate
+
+    def reserve(self, cost: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take ``cost`` tokens now, borrowing against future refills if needed.
+
+        Unlike ``try_acquire`` the call is never refused outright: the caller
+        is told how long to wait before going ahead, and callers reserving
+        after it queue up behind that wait.
+
+        Args:
+            cost: Tokens to take
+            max_wait: Longest acceptable wait; if exceeded nothing is taken
+
+        Returns:
+            Seconds to wait before proceeding (0 if tokens were available),
+            or None if the wait would exceed ``max_wait``
+        """
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= cost:
+                wait = 0.0
+            elif self.rate <= 0:
+                return None
+            else:
+                wait = (cost - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= cost
+            return wait
+
+
+class KeyedRateLimiter:
+    """
+    Per-key token buckets (e.g. one per client IP or API key).
+
+    At most ``max_keys`` buckets are kept; the least recently used bucket is
+    dropped beyond that, which only ever resets a client to a full burst.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def check(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Charge ``cost`` tokens to ``key``.
+
+        Returns:
+            Tuple of (admitted, seconds until the call would be admitted)
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, self._clock)
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+        admitted, retry_after = bucket.try_acquire(cost)
+        with self._lock:
+            if admitted:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        return admitted, retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'rate_per_second': self.rate,
+                'burst': self.burst,
+                'tracked_keys': len(self._buckets),
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+class SQLiteRateLimiter:
+    """
+    Per-key token buckets stored in SQLite, shared by all worker processes.
+
+    Each check is one short ``BEGIN IMMEDIATE`` transaction that reads the
+    key's bucket, refills it for the time elapsed and writes it back. Rows
+    idle long enough to have refilled completely are pruned now and then.
+    Wall-clock time is used since monotonic clocks are not comparable
+    across processes.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS rate_buckets ("
+        " key TEXT PRIMARY KEY,"
+        " tokens REAL NOT NULL,"
+        " updated REAL NOT NULL"
+        ")"
+    )
+
+    SQL_GET = "SELECT tokens, updated FROM rate_buckets WHERE key = ?"
+    SQL_PUT = "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)"
+    SQL_PRUNE = "DELETE FROM rate_buckets WHERE updated < ?"
+
+    PRUNE_EVERY = 1000  # Checks between prunes of idle rows
+
+    def __init__(self, path: str, rate: float, burst: float, busy_timeout_ms: int = 2000):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._local = threading.local()
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.rejected = 0
+        self._checks = 0
+
+        conn = self._connection()
+        conn.execute(self.SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; connections inherited across fork are dropped
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def check(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Charge ``cost`` tokens to ``key``.
+
+        Returns:
+            Tuple of (admitted, seconds until the call would be admitted)
+        """
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(self.SQL_GET, (key,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+
+            admitted = tokens >= cost
+            if admitted:
+                tokens -= cost
+            conn.execute(self.SQL_PUT, (key, tokens, now))
+
+            with self._lock:
+                self._checks += 1
+                prune = self._checks % self.PRUNE_EVERY == 0
+            if prune and self.rate > 0:
+                conn.execute(self.SQL_PRUNE, (now - self.burst / self.rate,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            if admitted:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+
+        if admitted:
+            return True, 0.0
+        if cost > self.burst or self.rate <= 0:
+            return False, float('inf')
+        return False, (cost - tokens) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'rate_per_second': self.rate,
+                'burst': self.burst,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+class ConcurrencyLimiter:
+    """
+    Non-blocking cap on concurrent work.
+
+    ``try_acquire`` either takes slots immediately or fails; it never
+    queues. A ``limit`` of 0 disables the cap.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.rejected = 0
+
+    def try_acquire(self, slots: int = 1) -> bool:
+        with self._lock:
+            if self.limit and self.in_flight + slots > self.limit:
+                self.rejected += 1
+                return False
+            self.in_flight += slots
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def release(self, slots: int = 1) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - slots)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'peak': self.peak,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,347 @@
+"""
+Upstream Call Resilience
+========================
+
+Retry and circuit-breaking for calls to external HTTP APIs (OpenAI).
+
+- RetryPolicy: jittered exponential backoff that honours ``Retry-After``,
+  bounded by a total time budget
+- CircuitBreaker: per-process breaker that opens after repeated failures,
+  fails fast while open and lets a limited number of half-open probes
+  through once the recovery timeout has passed
+- call_with_resilience: runs one HTTP request under both
+- call_with_resilience_async: the same for coroutine-based HTTP clients
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limiting and transient server-side failures
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date) into seconds.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attempt ``n`` (0-based) waits a random time in
+    ``[0, min(max_delay, base_delay * 2**n)]``, or the upstream's full
+    ``Retry-After`` when given (retrying earlier would only be refused
+    again). No retry is started that could not finish waiting within
+    ``budget`` seconds of the first attempt.
+    """
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.5, max_delay: float = 8.0,
+                 budget: float = 40.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    States:
+        closed     calls flow; ``failure_threshold`` consecutive failures open it
+        open       calls fail fast with CircuitOpenError for ``recovery_timeout`` seconds
+        half_open  up to ``half_open_max_calls`` probes are let through; a success
+                   closes the circuit, a failure re-opens it
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+        self.transitions: Dict[str, int] = {}
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    def _transition(self, state: str) -> None:
+        # Caller holds self._lock
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Circuit {self.name}: {self.state} -> {state}")
+
+        self.state = state
+        if state == self.OPEN:
+            self._opened_at = self._clock()
+        self._probes_in_flight = 0
+
+    def before_call(self) -> None:
+        """
+        Reserve permission for one call.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with all probes taken)
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.recovery_timeout - self._clock()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(self.HALF_OPEN)
+
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.recovery_timeout)
+                self._probes_in_flight += 1
+
+    def release(self) -> None:
+        """Give back a call reserved by before_call without recording an outcome."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._transition(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._consecutive_failures,
+                'successes': self.successes,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'transitions': dict(self.transitions)
+            }
+
+
+def call_with_resilience(send: Callable[[], requests.Response], policy: RetryPolicy,
+                         breaker: Optional[CircuitBreaker] = None,
+                         name: str = 'upstream') -> requests.Response:
+    """
+    Send an HTTP request, retrying transient failures under a circuit breaker.
+
+    Timeouts, connection errors and RETRYABLE_STATUS_CODES count as failures
+    and are retried; any other response (including 4xx) is returned to the
+    caller as-is. The last failing response is returned (or its exception
+    re-raised) once retries or the time budget run out, or once another call
+    has opened the circuit. The breaker sees the whole call as one success or
+    failure, however many attempts it took.
+
+    Args:
+        send: Zero-argument callable performing the request
+        policy: Retry policy
+        breaker: Circuit breaker guarding the upstream (optional)
+        name: Upstream name for log messages
+
+    Returns:
+        The final response
+
+    Raises:
+        CircuitOpenError: If the breaker rejects the call
+        requests.exceptions.RequestException: If the final attempt raised
+    """
+    if breaker is not None:
+        breaker.before_call()
+
+    started = time.monotonic()
+    attempt = 0
+    settled = False  # The breaker has been told the outcome of this call
+
+    try:
+        while True:
+            retry_after = None
+            try:
+                response = send()
+            except requests.exceptions.RequestException as e:
+                if not isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+                    if breaker is not None:
+                        breaker.record_failure()
+                    settled = True
+                    raise
+                response, error = None, e
+            else:
+                error = None
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if breaker is not None:
+                        breaker.record_success()
+                    settled = True
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            delay = policy.delay(attempt, retry_after)
+            out_of_budget = time.monotonic() - started + delay > policy.budget
+            circuit_opened = breaker is not None and breaker.state == CircuitBreaker.OPEN
+            if attempt >= policy.max_retries or out_of_budget or circuit_opened:
+                # One failure per call, however many attempts it made
+                if breaker is not None:
+                    breaker.record_failure()
+                settled = True
+                if error is not None:
+                    raise error
+                return response
+
+            reason = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+            logger.warning(f"{name} call failed ({reason}); retry {attempt + 1}/{policy.max_retries} in {delay:.2f}s")
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+    finally:
+        # Not an upstream failure (e.g. a bug in send): a half-open probe must not stay taken
+        if breaker is not None and not settled:
+            breaker.release()
+
+
+async def call_with_resilience_async(send: Callable[[], Awaitable[Any]], policy: RetryPolicy,
+                                     breaker: Optional[CircuitBreaker] = None, name: str = 'upstream',
+                                     retry_on: Tuple[Type[BaseException], ...] = (),
+                                     fail_on: Tuple[Type[BaseException], ...] = ()) -> Any:
+    """
+    Coroutine version of call_with_resilience for async HTTP clients.
+
+    The client library is not imported here, so its exception types are
+    passed in: ``retry_on`` are transient transport errors (retried, like
+    timeouts and connection errors above) and ``fail_on`` are all other
+    request errors (counted as a failure and re-raised). Responses need
+    ``status_code``, ``headers`` and an ``aclose()`` coroutine.
+
+    Args:
+        send: Zero-argument callable returning an awaitable response
+        policy: Retry policy
+        breaker: Circuit breaker guarding the upstream (optional)
+        name: Upstream name for log messages
+        retry_on: Exception types worth retrying
+        fail_on: Exception types that count as an upstream failure
+
+    Returns:
+        The final response
+
+    Raises:
+        CircuitOpenError: If the breaker rejects the call
+        Exception: If the final attempt raised one of ``retry_on``/``fail_on``
+    """
+    if breaker is not None:
+        breaker.before_call()
+
+    started = time.monotonic()
+    attempt = 0
+    settled = False  # The breaker has been told the outcome of this call
+
+    try:
+        while True:
+            retry_after = None
+            try:
+                response = await send()
+            except retry_on + fail_on as e:
+                if not isinstance(e, retry_on):
+                    if breaker is not None:
+                        breaker.record_failure()
+                    settled = True
+                    raise
+                response, error = None, e
+            else:
+                error = None
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if breaker is not None:
+                        breaker.record_success()
+                    settled = True
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            delay = policy.delay(attempt, retry_after)
+            out_of_budget = time.monotonic() - started + delay > policy.budget
+            circuit_opened = breaker is not None and breaker.state == CircuitBreaker.OPEN
+            if attempt >= policy.max_retries or out_of_budget or circuit_opened:
+                # One failure per call, however many attempts it made
+                if breaker is not None:
+                    breaker.record_failure()
+                settled = True
+                if error is not None:
+                    raise error
+                return response
+
+            reason = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+            logger.warning(f"{name} call failed ({reason}); retry {attempt + 1}/{policy.max_retries} in {delay:.2f}s")
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+    finally:
+        # Not an upstream failure (e.g. cancellation): a half-open probe must not stay taken
+        if breaker is not None and not settled:
+            breaker.release()
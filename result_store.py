@@ -0,0 +1,1663 @@
+"""
+Result Storage Backends
+=======================
+
+Pluggable storage for the shareable gift results served at ``/results/<id>``.
+
+Every backend implements the ``ResultStore`` interface and stores plain result
+records of the form::
+
+    {
+        'id': 'ab12cd34',
+        'questions_answers': {...},
+        'gift_ideas': [...],
+        'created_at': datetime,
+        'expires_at': datetime
+    }
+
+Records are serialized once, when stored, into a ``StoredResult`` holding the
+JSON document served by the results endpoints together with its ETag. With
+``compression_level`` > 0 that document is kept zlib-compressed; only ``id``,
+``created_at`` and ``expires_at`` stay uncompressed, and the payload is
+decompressed on first access.
+
+Backends:
+- MemoryResultStore: per-process dictionary (development default)
+- SQLiteResultStore: SQLite database in WAL mode, shared by every worker
+  process on the same host and persistent across restarts
+- LogResultStore: append-only segment files with an in-memory offset index
+  and mmap'd reads, for durable single-process deployments without SQLite
+"""
+
+import os
+import sys
+import mmap
+import struct
+import json
+import time
+import random
+import hashlib
+import zlib
+import heapq
+import itertools
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping as MappingABC
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple, Mapping, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the in-memory footprint of a stored value in bytes.
+
+    Walks dicts, lists and tuples recursively and sums ``sys.getsizeof`` of
+    every container, key and leaf, which is close enough for cache sizing.
+    """
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+
+    return size
+
+
+class CompressionStats:
+    """Counters for payload compression, used to tune the level against CPU cost."""
+
+    def __init__(self, level: int):
+        self.level = level
+        self.compressions = 0
+        self.decompressions = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    def record_compress(self, raw_size: int, compressed_size: int, seconds: float) -> None:
+        self.compressions += 1
+        self.raw_bytes += raw_size
+        self.compressed_bytes += compressed_size
+        self.compress_seconds += seconds
+
+    def record_decompress(self, seconds: float) -> None:
+        self.decompressions += 1
+        self.decompress_seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'level': self.level,
+            'compressions': self.compressions,
+            'decompressions': self.decompressions,
+            'raw_bytes': self.raw_bytes,
+            'compressed_bytes': self.compressed_bytes,
+            'ratio': round(self.raw_bytes / self.compressed_bytes, 2) if self.compressed_bytes else None,
+            'compress_ms': round(self.compress_seconds * 1000, 2),
+            'decompress_ms': round(self.decompress_seconds * 1000, 2)
+        }
+
+
+def split_result_fragments(record: Mapping[str, Any]) -> List[Optional[bytes]]:
+    """
+    Serialize a record's payload into independently shareable JSON fragments.
+
+    Returns a flat list ``[questions_answers, gift_1, images_1, gift_2, ...]``
+    where each gift fragment excludes its ``images`` list, which is serialized
+    separately (``None`` when the gift has no images key).
+    """
+    fragments = [json.dumps(record['questions_answers']).encode('utf-8')]
+
+    for gift in record['gift_ideas']:
+        gift_fields = {key: value for key, value in gift.items() if key != 'images'}
+        fragments.append(json.dumps(gift_fields).encode('utf-8'))
+        fragments.append(json.dumps(gift['images']).encode('utf-8') if 'images' in gift else None)
+
+    return fragments
+
+
+def assemble_result_document(result_id: str, created_at: datetime, expires_at: datetime,
+                             fragments: List[Optional[bytes]]) -> bytes:
+    """Join serialized fragments (see split_result_fragments) into the result document."""
+    gifts = []
+    for gift, images in zip(fragments[1::2], fragments[2::2]):
+        if images is not None:
+            separator = b'' if gift == b'{}' else b', '
+            gift = gift[:-1] + separator + b'"images": ' + images + b'}'
+        gifts.append(gift)
+
+    return b''.join([
+        b'{"id": ', json.dumps(result_id).encode('utf-8'),
+        b', "gift_ideas": [', b', '.join(gifts),
+        b'], "questions_answers": ', fragments[0],
+        b', "created_at": "', created_at.isoformat().encode('ascii'),
+        b'", "expires_at": "', expires_at.isoformat().encode('ascii'),
+        b'"}'
+    ])
+
+
+def serialize_result_document(record: Mapping[str, Any]) -> bytes:
+    """
+    Serialize a result record to its JSON document.
+
+    The document is what ``/results/<id>`` injects as ``window.RESULT_DATA``
+    and what ``/api/results/<id>`` wraps, so it is produced once at store time.
+    """
+    return assemble_result_document(
+        record['id'], record['created_at'], record['expires_at'], split_result_fragments(record)
+    )
+
+
+class StoredResult(MappingABC):
+    """
+    Read-only stored result: plain metadata plus a pre-serialized JSON document.
+
+    ``id``, ``created_at``, ``expires_at`` and the document's strong ``etag``
+    are kept as plain attributes. The document itself is held as bytes (or a
+    zero-copy memoryview into a mapped log segment), zlib-compressed when the
+    store has a compression level set.
+
+    Behaves like the plain record dict. Metadata keys are served directly;
+    ``questions_answers`` and ``gift_ideas`` trigger a single decompress and
+    parse that is memoized on this instance. Stores hand out ``detached()``
+    copies so the parsed payload is never kept alive by the store itself.
+    """
+
+    __slots__ = ('id', 'created_at', 'expires_at', 'etag', 'blob', 'compressed',
+                 'raw_size', '_stats', '_payload')
+
+    META_FIELDS = ('id', 'created_at', 'expires_at')
+    PAYLOAD_FIELDS = ('questions_answers', 'gift_ideas')
+
+    def __init__(self, result_id: str, created_at: datetime, expires_at: datetime, etag: str,
+                 blob: bytes, compressed: bool, raw_size: int,
+                 stats: Optional[CompressionStats] = None):
+        self.id = result_id
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.etag = etag
+        self.blob = blob
+        self.compressed = compressed
+        self.raw_size = raw_size
+        self._stats = stats
+        self._payload = None
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any], level: int = 0,
+                    stats: Optional[CompressionStats] = None) -> 'StoredResult':
+        """Serialize (and optionally compress) a plain result record."""
+        document = serialize_result_document(record)
+        etag = hashlib.sha256(document).hexdigest()[:32]
+        blob = document
+
+        if level:
+            started = time.perf_counter()
+            blob = zlib.compress(document, level)
+            if stats:
+                stats.record_compress(len(document), len(blob), time.perf_counter() - started)
+
+        return cls(record['id'], record['created_at'], record['expires_at'], etag,
+                   blob, bool(level), len(document), stats)
+
+    def document(self) -> bytes:
+        """Return the serialized JSON document, decompressing if necessary."""
+        if not self.compressed:
+            return bytes(self.blob)
+
+        started = time.perf_counter()
+        document = zlib.decompress(self.blob)
+        if self._stats:
+            self._stats.record_decompress(time.perf_counter() - started)
+        return document
+
+    def payload(self) -> Dict[str, Any]:
+        """Parse (once) and return the payload fields."""
+        if self._payload is None:
+            document = json.loads(self.document())
+            self._payload = {field: document[field] for field in self.PAYLOAD_FIELDS}
+        return self._payload
+
+    def detached(self) -> 'StoredResult':
+        """Return a fresh view sharing the blob but not any parsed payload."""
+        return StoredResult(self.id, self.created_at, self.expires_at, self.etag,
+                            self.blob, self.compressed, self.raw_size, self._stats)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.META_FIELDS:
+            return getattr(self, key)
+        if key in self.PAYLOAD_FIELDS:
+            return self.payload()[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.META_FIELDS + self.PAYLOAD_FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.META_FIELDS) + len(self.PAYLOAD_FIELDS)
+
+    def __sizeof__(self) -> int:
+        return (object.__sizeof__(self) + sys.getsizeof(self.blob) + sys.getsizeof(self.id)
+                + sys.getsizeof(self.etag) + sys.getsizeof(self.created_at)
+                + sys.getsizeof(self.expires_at))
+
+
+class BlobPool:
+    """
+    Content-addressed pool of immutable serialized fragments.
+
+    Fragments are keyed by their SHA-256 digest and reference counted, so a
+    questionnaire, gift or image list shared by many results is stored once.
+    Fragments of at least ``min_compress_size`` bytes are zlib-compressed when
+    a compression level is set; smaller ones would only grow.
+
+    The pool is split into lock stripes by digest so concurrent stores only
+    contend when they touch fragments in the same stripe; compression happens
+    outside the locks.
+    """
+
+    def __init__(self, compression_level: int = 0, stats: Optional[CompressionStats] = None,
+                 min_compress_size: int = 256, stripes: int = 16):
+        self.compression_level = compression_level
+        self.min_compress_size = min_compress_size
+        self._stats = stats
+        self._stripes = [_BlobStripe() for _ in range(max(1, stripes))]
+
+    def _stripe(self, digest: bytes) -> '_BlobStripe':
+        return self._stripes[digest[0] % len(self._stripes)]
+
+    def _encode(self, raw: bytes) -> Tuple[bytes, bool]:
+        if self.compression_level and len(raw) >= self.min_compress_size:
+            started = time.perf_counter()
+            data = zlib.compress(raw, self.compression_level)
+            if self._stats:
+                self._stats.record_compress(len(raw), len(data), time.perf_counter() - started)
+            return data, True
+        return raw, False
+
+    def acquire(self, raw: bytes) -> Tuple[bytes, Tuple[bytes, bool]]:
+        """
+        Take a reference to a fragment, storing it if it is new.
+
+        Returns:
+            Tuple of (digest, (data, compressed)); the data tuple is shared by
+            every holder of the same fragment
+        """
+        digest = hashlib.sha256(raw).digest()
+        stripe = self._stripe(digest)
+
+        with stripe.lock:
+            stripe.acquired += 1
+            entry = stripe.blobs.get(digest)
+            if entry is not None:
+                entry[1] += 1
+                stripe.deduplicated += 1
+                return digest, entry[0]
+
+        blob = self._encode(raw)
+        size = sys.getsizeof(blob[0]) + sys.getsizeof(digest) + 150  # dict slot, entry list and tuple
+
+        with stripe.lock:
+            # Another thread may have stored the same fragment while we were compressing
+            entry = stripe.blobs.get(digest)
+            if entry is not None:
+                entry[1] += 1
+                stripe.deduplicated += 1
+                return digest, entry[0]
+
+            stripe.blobs[digest] = [blob, 1, size]
+            stripe.bytes_used += size
+            return digest, blob
+
+    def release(self, digest: bytes) -> None:
+        """Drop a reference; the fragment is freed when no result uses it."""
+        stripe = self._stripe(digest)
+        with stripe.lock:
+            entry = stripe.blobs[digest]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del stripe.blobs[digest]
+                stripe.bytes_used -= entry[2]
+
+    @property
+    def bytes_used(self) -> int:
+        return sum(stripe.bytes_used for stripe in self._stripes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'blobs': len(self),
+            'bytes_used': self.bytes_used,
+            'references': sum(stripe.acquired for stripe in self._stripes),
+            'deduplicated': sum(stripe.deduplicated for stripe in self._stripes)
+        }
+
+    def __len__(self) -> int:
+        return sum(len(stripe.blobs) for stripe in self._stripes)
+
+
+class _BlobStripe:
+    """One lock stripe of a BlobPool."""
+
+    __slots__ = ('lock', 'blobs', 'bytes_used', 'acquired', 'deduplicated')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # digest -> [(data, compressed), refcount, charged bytes]
+        self.blobs: Dict[bytes, list] = {}
+        self.bytes_used = 0
+        self.acquired = 0
+        self.deduplicated = 0
+
+
+class PooledResult(StoredResult):
+    """
+    StoredResult whose document is assembled from shared BlobPool fragments.
+
+    Holds direct references to the pooled fragment data (plus their digests
+    for release), so reading a result never has to go back to the pool.
+    """
+
+    __slots__ = ('fragments', 'digests')
+
+    def __init__(self, result_id: str, created_at: datetime, expires_at: datetime, etag: str,
+                 fragments: Tuple[Optional[Tuple[bytes, bool]], ...],
+                 digests: Tuple[Optional[bytes], ...], raw_size: int,
+                 stats: Optional[CompressionStats] = None):
+        super().__init__(result_id, created_at, expires_at, etag, b'', False, raw_size, stats)
+        self.fragments = fragments
+        self.digests = digests
+
+    @classmethod
+    def from_pool(cls, record: Mapping[str, Any], pool: BlobPool,
+                  stats: Optional[CompressionStats] = None) -> 'PooledResult':
+        """Split a plain record into fragments and take pool references for them."""
+        raw_fragments = split_result_fragments(record)
+        document = assemble_result_document(
+            record['id'], record['created_at'], record['expires_at'], raw_fragments
+        )
+
+        fragments, digests = [], []
+        for raw in raw_fragments:
+            if raw is None:
+                fragments.append(None)
+                digests.append(None)
+                continue
+            digest, blob = pool.acquire(raw)
+            fragments.append(blob)
+            digests.append(digest)
+
+        return cls(record['id'], record['created_at'], record['expires_at'],
+                   hashlib.sha256(document).hexdigest()[:32],
+                   tuple(fragments), tuple(digests), len(document), stats)
+
+    def release(self, pool: BlobPool) -> None:
+        """Return this result's fragment references to the pool."""
+        for digest in self.digests:
+            if digest is not None:
+                pool.release(digest)
+
+    def document(self) -> bytes:
+        started = time.perf_counter()
+        decompressed = False
+        raw_fragments = []
+
+        for blob in self.fragments:
+            if blob is None:
+                raw_fragments.append(None)
+            elif blob[1]:
+                raw_fragments.append(zlib.decompress(blob[0]))
+                decompressed = True
+            else:
+                raw_fragments.append(blob[0])
+
+        if decompressed and self._stats:
+            self._stats.record_decompress(time.perf_counter() - started)
+
+        return assemble_result_document(self.id, self.created_at, self.expires_at, raw_fragments)
+
+    def detached(self) -> 'PooledResult':
+        return PooledResult(self.id, self.created_at, self.expires_at, self.etag,
+                            self.fragments, self.digests, self.raw_size, self._stats)
+
+    def __sizeof__(self) -> int:
+        # Fragment data is owned (and charged) by the pool; only count this result's own references
+        return (object.__sizeof__(self) + sys.getsizeof(self.id) + sys.getsizeof(self.etag)
+                + sys.getsizeof(self.created_at) + sys.getsizeof(self.expires_at)
+                + sys.getsizeof(self.fragments) + sys.getsizeof(self.digests))
+
+
+class ResultStore:
+    """Interface implemented by every result storage backend."""
+
+    backend_name = 'base'
+
+    def __init__(self, compression_level: int = 0):
+        self.compression_level = compression_level  # 0 stores payloads uncompressed
+        self._compression = CompressionStats(compression_level)
+
+    def _prepare(self, record: Mapping[str, Any]) -> StoredResult:
+        """Serialize (and compress, if configured) a record into its at-rest form."""
+        if isinstance(record, StoredResult):
+            return record
+        return StoredResult.from_record(record, self.compression_level, self._compression)
+
+    def put(self, record: Mapping[str, Any]) -> None:
+        """
+        Insert or replace a result record (serialized once, at store time).
+
+        Raises:
+            ValueError: If the backend cannot store the record (LogResultStore
+                limits IDs to 255 UTF-8 bytes)
+        """
+        raise NotImplementedError
+
+    def put_many(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Insert or replace a batch of result records.
+
+        Backends override this when they can write a batch more cheaply than
+        one record at a time.
+
+        Returns:
+            Number of records written
+        """
+        count = 0
+        for record in records:
+            self.put(record)
+            count += 1
+        return count
+
+    def get(self, result_id: str, now: Optional[datetime] = None) -> Optional[StoredResult]:
+        """
+        Retrieve a result record by ID.
+
+        Args:
+            result_id: Short result ID
+            now: Reference time for the expiry check (defaults to utcnow)
+
+        Returns:
+            The StoredResult, or None if it is missing or expired
+        """
+        raise NotImplementedError
+
+    def delete(self, result_id: str) -> bool:
+        """Delete a result record. Returns True if it existed."""
+        raise NotImplementedError
+
+    def cleanup_expired(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        """
+        Remove expired records.
+
+        Args:
+            now: Reference time for the expiry check (defaults to utcnow)
+            limit: Remove at most this many records (None removes all due ones)
+
+        Returns:
+            Number of records removed
+        """
+        raise NotImplementedError
+
+    def iter_results(self, now: Optional[datetime] = None) -> Iterator[StoredResult]:
+        """
+        Iterate over every unexpired result, one at a time.
+
+        Results stored or deleted while the iteration runs may or may not be
+        seen. Payloads stay serialized, so a full scan holds at most one
+        document (or one page of documents) at a time.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics for health/monitoring endpoints."""
+        stats = {'backend': self.backend_name, 'entries': len(self)}
+        if self.compression_level:
+            stats['compression'] = self._compression.as_dict()
+        return stats
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+    def __contains__(self, result_id: str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryResultStore(ResultStore):
+    """
+    In-process dictionary store.
+
+    Results only live as long as the worker process and are not shared between
+    workers, so this backend is meant for development and single-process use.
+
+    The store is split into ``stripes`` shards by result ID, each with its own
+    lock, LRU order, expiry heap and byte accounting, so request threads (or
+    greenlets) and the background sweeper only contend when they touch the
+    same shard. Sweeps walk the shards one at a time.
+
+    Expiry is tracked in a min-heap of ``(expires_at, result_id)`` per shard so
+    a cleanup sweep only pops entries that are actually due instead of
+    scanning every stored result. Heap entries for results that were deleted
+    or replaced are skipped lazily, and a heap is rebuilt once stale entries
+    dominate it.
+
+    Memory use is bounded by ``max_bytes``: every record is charged its
+    estimated in-memory size, and once the store-wide total goes over the cap
+    the least recently used results of any shard are evicted, independently
+    of their TTL. Each record carries a store-wide use stamp, so the next
+    victim is the shard head with the oldest stamp.
+
+    Payloads are deduplicated through a ``BlobPool``: questionnaires, gifts and
+    image lists are stored once per distinct content and shared between
+    results, so memory grows with the number of distinct payloads rather than
+    the number of results. Shared fragments are charged to the pool once.
+    """
+
+    backend_name = 'memory'
+
+    def __init__(self, max_bytes: int = 0, compression_level: int = 0, stripes: int = 16):
+        super().__init__(compression_level)
+        self.max_bytes = max_bytes  # 0 disables the memory cap
+
+        self._shards = [_ResultShard() for _ in range(max(1, stripes))]
+        self._pool = BlobPool(compression_level, self._compression, stripes=stripes)
+        self._clock = itertools.count()  # Use stamps, comparable across shards
+        self._evict_lock = threading.Lock()
+
+    def _shard(self, result_id: str) -> '_ResultShard':
+        return self._shards[hash(result_id) % len(self._shards)]
+
+    def _prepare(self, record: Mapping[str, Any]) -> PooledResult:
+        return PooledResult.from_pool(record, self._pool, self._compression)
+
+    def put(self, record: Mapping[str, Any]) -> None:
+        result_id = record['id']
+        shard = self._shard(result_id)
+
+        # Serialize and intern fragments before taking the shard lock
+        prepared = self._prepare(record)
+        size = estimate_size(prepared)
+
+        with shard.lock:
+            if result_id in shard.results:
+                # Replacing: drop the old record's accounting (its heap entry goes stale)
+                self._remove(shard, result_id)
+
+            shard.results[result_id] = prepared
+            shard.sizes[result_id] = size
+            shard.last_used[result_id] = next(self._clock)
+            shard.bytes_used += size
+            heapq.heappush(shard.expiry_heap, (prepared.expires_at, result_id))
+
+        # Outside the shard lock: eviction locks other shards, one at a time
+        self._enforce_memory_cap(keep=result_id)
+
+    def get(self, result_id: str, now: Optional[datetime] = None) -> Optional[PooledResult]:
+        shard = self._shard(result_id)
+
+        with shard.lock:
+            record = shard.results.get(result_id)
+
+            if not record:
+                return None
+
+            # Expired results are removed on access
+            if (now or datetime.utcnow()) > record.expires_at:
+                self._remove(shard, result_id)
+                shard.expirations += 1
+                logger.info(f"Expired result {result_id} removed from storage")
+                return None
+
+            shard.results.move_to_end(result_id)
+            shard.last_used[result_id] = next(self._clock)
+            return record.detached()
+
+    def delete(self, result_id: str) -> bool:
+        shard = self._shard(result_id)
+
+        with shard.lock:
+            if result_id not in shard.results:
+                return False
+            self._remove(shard, result_id)
+            return True
+
+    def cleanup_expired(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        now = now or datetime.utcnow()
+        removed = 0
+
+        # One shard at a time, so a sweep never holds more than one lock
+        for shard in self._shards:
+            if limit is not None and removed >= limit:
+                break
+
+            with shard.lock:
+                removed_here = 0
+                heap = shard.expiry_heap
+
+                while heap and now > heap[0][0] and (limit is None or removed + removed_here < limit):
+                    expires_at, result_id = heapq.heappop(heap)
+                    record = shard.results.get(result_id)
+
+                    if record is None or record.expires_at != expires_at:
+                        # Entry was deleted or replaced after this heap item was pushed
+                        shard.stale_heap_entries -= 1
+                        continue
+
+                    self._discard(shard, result_id)
+                    removed_here += 1
+                    logger.debug(f"Cleaned up expired result: {result_id}")
+
+                shard.expirations += removed_here
+                removed += removed_here
+
+        return removed
+
+    def iter_results(self, now: Optional[datetime] = None) -> Iterator[PooledResult]:
+        now = now or datetime.utcnow()
+        for shard in self._shards:
+            # Snapshot IDs only; each record is looked up (and detached) as it is yielded
+            with shard.lock:
+                result_ids = list(shard.results)
+
+            for result_id in result_ids:
+                with shard.lock:
+                    record = shard.results.get(result_id)
+                    if record is None or now > record.expires_at:
+                        continue
+                    record = record.detached()
+                yield record
+
+    def _oldest_result(self, keep: str) -> Optional[Tuple[int, '_ResultShard', str]]:
+        """Least recently used result of the whole store (other than ``keep``) as (stamp, shard, id)."""
+        oldest = None
+        for shard in self._shards:
+            with shard.lock:
+                for result_id in shard.results:
+                    if result_id != keep:
+                        stamp = shard.last_used[result_id]
+                        if oldest is None or stamp < oldest[0]:
+                            oldest = (stamp, shard, result_id)
+                        break
+        return oldest
+
+    def _enforce_memory_cap(self, keep: str) -> None:
+        """Evict the store's least recently used results while it exceeds max_bytes."""
+        if not self.max_bytes:
+            return
+
+        # Caller holds no shard lock. Always keep the newest record, even if it alone exceeds the cap
+        with self._evict_lock:
+            while self.bytes_used > self.max_bytes:
+                oldest = self._oldest_result(keep)
+                if oldest is None:
+                    break
+
+                stamp, shard, result_id = oldest
+                with shard.lock:
+                    if shard.last_used.get(result_id) != stamp:
+                        continue  # Used, replaced or removed since it was picked
+                    before = self.bytes_used
+                    self._remove(shard, result_id)
+                    freed = before - self.bytes_used  # Includes fragments no other result shares
+                    shard.evictions += 1
+                    shard.evicted_bytes += freed
+                logger.info(f"Evicted result {result_id} ({freed} bytes) to stay under memory cap")
+
+    @property
+    def bytes_used(self) -> int:
+        """Estimated memory held by results plus their pooled fragments."""
+        return sum(shard.bytes_used for shard in self._shards) + self._pool.bytes_used
+
+    def _discard(self, shard: '_ResultShard', result_id: str) -> None:
+        """Delete a record, its byte accounting and its fragment references."""
+        shard.results.pop(result_id).release(self._pool)
+        shard.bytes_used -= shard.sizes.pop(result_id)
+        del shard.last_used[result_id]
+
+    def _remove(self, shard: '_ResultShard', result_id: str) -> None:
+        """Delete a record and account for its now-stale expiry heap entry."""
+        self._discard(shard, result_id)
+        shard.stale_heap_entries += 1
+
+        # Rebuild the heap when most of it points at results that are gone
+        if shard.stale_heap_entries > 64 and shard.stale_heap_entries > len(shard.results):
+            shard.expiry_heap = [
+                (record.expires_at, record_id) for record_id, record in shard.results.items()
+            ]
+            heapq.heapify(shard.expiry_heap)
+            shard.stale_heap_entries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            'stripes': len(self._shards),
+            'expiry_index_size': sum(len(shard.expiry_heap) for shard in self._shards),
+            'bytes_used': self.bytes_used,
+            'max_bytes': self.max_bytes,
+            'blob_pool': self._pool.stats(),
+            'evictions': sum(shard.evictions for shard in self._shards),
+            'evicted_bytes': sum(shard.evicted_bytes for shard in self._shards),
+            'expirations': sum(shard.expirations for shard in self._shards)
+        })
+        return stats
+
+    def __contains__(self, result_id: str) -> bool:
+        shard = self._shard(result_id)
+        with shard.lock:
+            return result_id in shard.results
+
+    def __len__(self) -> int:
+        return sum(len(shard.results) for shard in self._shards)
+
+
+class _ResultShard:
+    """One lock stripe of a MemoryResultStore."""
+
+    __slots__ = ('lock', 'results', 'sizes', 'last_used', 'bytes_used', 'expiry_heap', 'stale_heap_entries',
+                 'evictions', 'evicted_bytes', 'expirations')
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.results: 'OrderedDict[str, PooledResult]' = OrderedDict()
+        self.sizes: Dict[str, int] = {}
+        self.last_used: Dict[str, int] = {}  # MemoryResultStore._clock stamp of the last put or get
+        self.bytes_used = 0  # Per-result overhead; fragment bytes are tracked by the pool
+        self.expiry_heap: List[Tuple[datetime, str]] = []
+        self.stale_heap_entries = 0
+
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expirations = 0
+
+
+class SQLiteResultStore(ResultStore):
+    """
+    SQLite-backed store running in WAL mode.
+
+    WAL lets any number of readers run concurrently with a single writer, so
+    reads use one connection per thread while all writes in a process are
+    serialized through one shared writer connection. Several worker processes
+    can point at the same database file; SQLite's own file locking (with a
+    busy timeout) arbitrates between their writers.
+
+    All SQL is issued through fixed parameterized statements, which sqlite3
+    compiles once per connection and keeps in its statement cache.
+    """
+
+    backend_name = 'sqlite'
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS results ("
+        " id TEXT PRIMARY KEY,"
+        " document BLOB NOT NULL,"
+        " compressed INTEGER NOT NULL,"
+        " etag TEXT NOT NULL,"
+        " raw_size INTEGER NOT NULL,"
+        " created_at TEXT NOT NULL,"
+        " expires_at TEXT NOT NULL"
+        ")",
+        "CREATE INDEX IF NOT EXISTS idx_results_expires_at ON results (expires_at)",
+    )
+
+    SQL_UPSERT = (
+        "INSERT OR REPLACE INTO results (id, document, compressed, etag, raw_size, created_at, expires_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    SQL_SELECT = (
+        "SELECT id, document, compressed, etag, raw_size, created_at, expires_at"
+        " FROM results WHERE id = ? AND expires_at > ?"
+    )
+    SQL_SELECT_PAGE = (
+        "SELECT id, document, compressed, etag, raw_size, created_at, expires_at"
+        " FROM results WHERE id > ? AND expires_at > ? ORDER BY id LIMIT ?"
+    )
+    SQL_EXISTS = "SELECT 1 FROM results WHERE id = ?"
+    SQL_DELETE = "DELETE FROM results WHERE id = ?"
+    SQL_DELETE_EXPIRED = "DELETE FROM results WHERE expires_at <= ?"
+    SQL_DELETE_EXPIRED_BATCH = (
+        "DELETE FROM results WHERE id IN"
+        " (SELECT id FROM results WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)"
+    )
+    SQL_COUNT = "SELECT COUNT(*) FROM results"
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000, compression_level: int = 0):
+        super().__init__(compression_level)
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._pid = None
+
+        # Create the schema eagerly so configuration errors surface at startup
+        with self._write_lock:
+            conn = self._writer_connection()
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+
+        logger.info(f"SQLite result store ready at {self.path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=64
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _check_fork(self) -> None:
+        """Drop connections inherited from a parent process (e.g. gunicorn --preload)."""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._writer = None
+            self._local = threading.local()
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        # Caller must hold self._write_lock
+        self._check_fork()
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    def _reader_connection(self) -> sqlite3.Connection:
+        self._check_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=1")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _format_time(value: datetime) -> str:
+        # Fixed-width ISO timestamps sort correctly as text, which the expires_at index relies on
+        return value.isoformat(timespec='microseconds')
+
+    def _upsert_params(self, record: StoredResult) -> tuple:
+        return (
+            record.id,
+            record.blob,
+            int(record.compressed),
+            record.etag,
+            record.raw_size,
+            self._format_time(record.created_at),
+            self._format_time(record.expires_at)
+        )
+
+    def put(self, record: Mapping[str, Any]) -> None:
+        params = self._upsert_params(self._prepare(record))
+
+        with self._write_lock:
+            conn = self._writer_connection()
+            conn.execute(self.SQL_UPSERT, params)
+            conn.commit()
+
+    def put_many(self, records: Iterable[Mapping[str, Any]]) -> int:
+        params = [self._upsert_params(self._prepare(record)) for record in records]
+        if not params:
+            return 0
+
+        # One transaction for the whole batch instead of a commit per record
+        with self._write_lock:
+            conn = self._writer_connection()
+            conn.executemany(self.SQL_UPSERT, params)
+            conn.commit()
+        return len(params)
+
+    def get(self, result_id: str, now: Optional[datetime] = None) -> Optional[StoredResult]:
+        now = now or datetime.utcnow()
+        row = self._reader_connection().execute(
+            self.SQL_SELECT, (result_id, self._format_time(now))
+        ).fetchone()
+
+        if not row:
+            return None
+        return self._from_row(row)
+
+    def iter_results(self, now: Optional[datetime] = None, page_size: int = 500) -> Iterator[StoredResult]:
+        now = self._format_time(now or datetime.utcnow())
+        last_id = ''
+
+        # Keyset pagination: each page is a short read, so no transaction stays open between yields
+        while True:
+            rows = self._reader_connection().execute(self.SQL_SELECT_PAGE, (last_id, now, page_size)).fetchall()
+            for row in rows:
+                yield self._from_row(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def _from_row(self, row: tuple) -> StoredResult:
+        # The document is left serialized (and compressed) until a caller needs it
+        result_id, document, compressed, etag, raw_size, created_at, expires_at = row
+        return StoredResult(
+            result_id,
+            datetime.fromisoformat(created_at),
+            datetime.fromisoformat(expires_at),
+            etag,
+            bytes(document),
+            bool(compressed),
+            raw_size,
+            self._compression
+        )
+
+    def delete(self, result_id: str) -> bool:
+        with self._write_lock:
+            conn = self._writer_connection()
+            cursor = conn.execute(self.SQL_DELETE, (result_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def cleanup_expired(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        now = self._format_time(now or datetime.utcnow())
+        with self._write_lock:
+            conn = self._writer_connection()
+            if limit is None:
+                cursor = conn.execute(self.SQL_DELETE_EXPIRED, (now,))
+            else:
+                cursor = conn.execute(self.SQL_DELETE_EXPIRED_BATCH, (now, limit))
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __contains__(self, result_id: str) -> bool:
+        return self._reader_connection().execute(self.SQL_EXISTS, (result_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._reader_connection().execute(self.SQL_COUNT).fetchone()[0]
+
+
+class LogResultStore(ResultStore):
+    """
+    Append-only, log-structured result store.
+
+    Every ``put`` appends one record to the active segment file in
+    ``directory`` and updates an in-memory index of
+    ``result_id -> (segment, offset, length, metadata)``. Reads look the ID up
+    in the index and slice the document straight out of an mmap of the
+    segment, so a read is O(1) and never copies the payload until a caller
+    materializes it.
+
+    Record layout (little endian)::
+
+        header  magic, flags, id length, etag, created_at_us, expires_at_us,
+                raw document size, stored document length
+        id      UTF-8 result ID (at most MAX_ID_BYTES, as its length is one byte)
+        body    stored document (zlib-compressed if flagged)
+
+    Deletes append a tombstone record. On startup the index is rebuilt by
+    reading each header and ID and seeking over the body, skipping expired
+    records; a torn record at the end of the last segment is truncated.
+
+    Expired and deleted records leave dead bytes in sealed segments. Once a
+    sealed segment's live fraction drops below ``compact_ratio`` it is
+    rewritten in place with only its live records and still-needed
+    tombstones, or removed if nothing is left. This runs after each expiry
+    sweep; the copy goes to a temporary file outside the store lock, which is
+    only held to snapshot the segment and to swap the new file in, so reads
+    and writes are not stalled by it. Keeping the segment number keeps replay
+    order intact.
+
+    Only one process may write a directory; an exclusive lock file enforces
+    that, so run a single worker (or use the SQLite backend).
+    """
+
+    backend_name = 'log'
+
+    HEADER = struct.Struct('<4sBB32sqqII')
+    MAX_ID_BYTES = 255
+    MAGIC = b'RGL1'
+    FLAG_COMPRESSED = 0x01
+    FLAG_TOMBSTONE = 0x02
+
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 compression_level: int = 0, fsync: bool = False, compact_ratio: float = 0.5):
+        super().__init__(compression_level)
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        # result_id -> (segment, offset, length, flags, etag, created_us, expires_us, raw_size)
+        self._index: Dict[str, tuple] = {}
+        self._expiry_heap: List[Tuple[int, str]] = []
+        self._maps: Dict[int, mmap.mmap] = {}
+        # segment -> [total bytes, live bytes, {tombstoned id: expires_at_us}]
+        self._segments: Dict[int, list] = {}
+        self._active_segment = 0
+        self._active_file = None
+        self._compactions = 0
+        self._compact_lock = threading.Lock()  # One compaction at a time
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, 'LOCK'), 'a+')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise RuntimeError(f"Result log directory {directory} is in use by another process")
+
+        self._load()
+
+    # -- time and path helpers -------------------------------------------------
+
+    @classmethod
+    def _to_us(cls, value: datetime) -> int:
+        return (value - cls.EPOCH) // timedelta(microseconds=1)
+
+    @classmethod
+    def _from_us(cls, value: int) -> datetime:
+        return cls.EPOCH + timedelta(microseconds=value)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f'segment-{segment:06d}.log')
+
+    def _record_prefix(self, result_id: str, flags: int, etag: str, created_us: int, expires_us: int,
+                       raw_size: int, length: int) -> bytes:
+        """Header and ID of a record whose body is ``length`` bytes."""
+        id_bytes = result_id.encode('utf-8')
+        return self.HEADER.pack(self.MAGIC, flags, len(id_bytes), etag.encode('ascii'),
+                                created_us, expires_us, raw_size, length) + id_bytes
+
+    # -- startup ---------------------------------------------------------------
+
+    def _load(self) -> None:
+        """Rebuild the index from segment headers."""
+        for name in os.listdir(self.directory):
+            if name.endswith('.log.compact'):
+                os.remove(os.path.join(self.directory, name))  # Compaction interrupted before its swap
+
+        segments = sorted(
+            int(name[8:14]) for name in os.listdir(self.directory)
+            if name.startswith('segment-') and name.endswith('.log')
+        )
+        now_us = self._to_us(datetime.utcnow())
+        started = time.perf_counter()
+
+        for position, segment in enumerate(segments):
+            self._scan_segment(segment, now_us, is_last=position == len(segments) - 1)
+
+        self._expiry_heap = [(entry[6], result_id) for result_id, entry in self._index.items()]
+        heapq.heapify(self._expiry_heap)
+
+        self._open_active(segments[-1] if segments else 1)
+        logger.info(
+            f"Log result store loaded {len(self._index)} results from {len(segments)} segments "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    def _scan_segment(self, segment: int, now_us: int, is_last: bool) -> None:
+        path = self._segment_path(segment)
+        file_size = os.path.getsize(path)
+        info = self._segments.setdefault(segment, [0, 0, {}])
+        offset = 0
+
+        with open(path, 'rb') as f:
+            while offset + self.HEADER.size <= file_size:
+                header = f.read(self.HEADER.size)
+                magic, flags, id_length, etag, created_us, expires_us, raw_size, length = self.HEADER.unpack(header)
+                end = offset + self.HEADER.size + id_length + length
+                if magic != self.MAGIC or end > file_size:
+                    break
+
+                result_id = f.read(id_length).decode('utf-8')
+                f.seek(length, os.SEEK_CUR)
+                body_offset = offset + self.HEADER.size + id_length
+
+                self._drop_from_index(result_id)
+                if flags & self.FLAG_TOMBSTONE:
+                    info[2][result_id] = expires_us
+                elif expires_us > now_us:
+                    self._index[result_id] = (segment, body_offset, length, flags, etag.decode('ascii'),
+                                              created_us, expires_us, raw_size)
+                    info[1] += end - offset
+
+                offset = end
+
+        if offset < file_size:
+            if is_last:
+                logger.warning(f"Truncating torn record at {path}:{offset}")
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+            else:
+                logger.error(f"Ignoring corrupt data in {path} after offset {offset}")
+
+        info[0] = offset
+
+    # -- writing ---------------------------------------------------------------
+
+    def _open_active(self, segment: int) -> None:
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active_segment = segment
+        self._active_file = open(self._segment_path(segment), 'ab')
+        self._segments.setdefault(segment, [0, 0, {}])[0] = self._active_file.tell()
+
+    def _append(self, result_id: str, flags: int, etag: str, created_us: int, expires_us: int,
+                raw_size: int, body) -> Tuple[int, int]:
+        """Append one record and return (segment, body offset). Caller holds the lock."""
+        if self._segments[self._active_segment][0] >= self.segment_max_bytes:
+            self._open_active(self._active_segment + 1)
+
+        prefix = self._record_prefix(result_id, flags, etag, created_us, expires_us, raw_size, len(body))
+        record_offset = self._segments[self._active_segment][0]
+
+        self._active_file.write(prefix)
+        self._active_file.write(body)
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+
+        self._segments[self._active_segment][0] += len(prefix) + len(body)
+        return self._active_segment, record_offset + len(prefix)
+
+    def _drop_from_index(self, result_id: str) -> Optional[tuple]:
+        """Remove an index entry and its live-byte accounting. Caller holds the lock."""
+        entry = self._index.pop(result_id, None)
+        if entry is not None:
+            record_size = self.HEADER.size + len(result_id.encode('utf-8')) + entry[2]
+            self._segments[entry[0]][1] -= record_size
+        return entry
+
+    def put(self, record: Mapping[str, Any]) -> None:
+        if len(record['id'].encode('utf-8')) > self.MAX_ID_BYTES:
+            raise ValueError(f"Result id is longer than {self.MAX_ID_BYTES} bytes")
+
+        stored = self._prepare(record)
+        flags = self.FLAG_COMPRESSED if stored.compressed else 0
+        created_us = self._to_us(stored.created_at)
+        expires_us = self._to_us(stored.expires_at)
+
+        with self._lock:
+            segment, offset = self._append(stored.id, flags, stored.etag, created_us, expires_us,
+                                           stored.raw_size, stored.blob)
+            self._drop_from_index(stored.id)
+            self._index[stored.id] = (segment, offset, len(stored.blob), flags, stored.etag,
+                                      created_us, expires_us, stored.raw_size)
+            self._segments[segment][1] += self.HEADER.size + len(stored.id.encode('utf-8')) + len(stored.blob)
+            heapq.heappush(self._expiry_heap, (expires_us, stored.id))
+
+    def delete(self, result_id: str) -> bool:
+        with self._lock:
+            entry = self._drop_from_index(result_id)
+            if entry is None:
+                return False
+            # Tombstone lives until the deleted record would have expired anyway
+            segment, _ = self._append(result_id, self.FLAG_TOMBSTONE, entry[4], entry[5], entry[6], 0, b'')
+            self._segments[segment][2][result_id] = entry[6]
+            return True
+
+    # -- reading ---------------------------------------------------------------
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """Return an mmap of a segment covering at least ``end`` bytes. Caller holds the lock."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            # The active segment grows; remap it. Old maps close once no view references them.
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def get(self, result_id: str, now: Optional[datetime] = None) -> Optional[StoredResult]:
+        with self._lock:
+            entry = self._index.get(result_id)
+            if entry is None:
+                return None
+
+            segment, offset, length, flags, etag, created_us, expires_us, raw_size = entry
+            if self._to_us(now or datetime.utcnow()) > expires_us:
+                return None
+
+            body = memoryview(self._map(segment, offset + length))[offset:offset + length]
+
+        return StoredResult(result_id, self._from_us(created_us), self._from_us(expires_us), etag,
+                            body, bool(flags & self.FLAG_COMPRESSED), raw_size, self._compression)
+
+    def iter_results(self, now: Optional[datetime] = None) -> Iterator[StoredResult]:
+        now = now or datetime.utcnow()
+        with self._lock:
+            result_ids = list(self._index)
+
+        for result_id in result_ids:
+            record = self.get(result_id, now)
+            if record is not None:
+                yield record
+
+    # -- expiry and compaction -------------------------------------------------
+
+    def cleanup_expired(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+        now_us = self._to_us(now or datetime.utcnow())
+        removed = 0
+
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and now_us > heap[0][0] and (limit is None or removed < limit):
+                expires_us, result_id = heapq.heappop(heap)
+                entry = self._index.get(result_id)
+                if entry is None or entry[6] != expires_us:
+                    continue  # Deleted or replaced since this heap item was pushed
+                self._drop_from_index(result_id)
+                removed += 1
+
+        # Compact at most one segment per call to keep sweep slices short
+        if self._compact_lock.acquire(blocking=False):
+            try:
+                with self._lock:
+                    segment = self._compaction_candidate(now_us)
+                if segment is not None:
+                    self._compact_segment(segment, now_us)
+            finally:
+                self._compact_lock.release()
+
+        return removed
+
+    def _keeps_tombstone(self, segment: int, oldest: int, result_id: str, expires_us: int, now_us: int) -> bool:
+        # Tombstones only matter while an older segment may still hold the deleted record,
+        # and never once the ID was put again. Caller holds the lock.
+        return segment != oldest and expires_us > now_us and result_id not in self._index
+
+    def _compaction_candidate(self, now_us: int) -> Optional[int]:
+        """Oldest sealed segment worth compacting, if any. Caller holds the lock."""
+        oldest = min(self._segments)
+        for segment, (total, live, tombstones) in sorted(self._segments.items()):
+            if segment == self._active_segment or not total:
+                continue
+            kept = sum(
+                self.HEADER.size + len(result_id.encode('utf-8'))
+                for result_id, expires_us in tombstones.items()
+                if self._keeps_tombstone(segment, oldest, result_id, expires_us, now_us)
+            )
+            if (live + kept) / total < self.compact_ratio:
+                return segment
+        return None
+
+    def _compact_segment(self, segment: int, now_us: int) -> None:
+        """Rewrite a sealed segment with only its live records and needed tombstones."""
+        started = time.perf_counter()
+        path = self._segment_path(segment)
+
+        with self._lock:
+            mapped = self._map(segment, self._segments[segment][0])
+            oldest = min(self._segments)
+            # Sealed segments are never written again, so this snapshot stays valid to copy from
+            records = sorted(
+                ((result_id, entry) for result_id, entry in self._index.items() if entry[0] == segment),
+                key=lambda item: item[1][1]
+            )
+            tombstones = {
+                result_id: expires_us for result_id, expires_us in self._segments[segment][2].items()
+                if self._keeps_tombstone(segment, oldest, result_id, expires_us, now_us)
+            }
+
+            if not records and not tombstones:
+                del self._segments[segment]
+                self._maps.pop(segment, None)
+                os.remove(path)
+                self._compactions += 1
+                logger.info(f"Removed result log segment {segment}: no live records")
+                return
+
+        # Tombstones go first: a live record in this segment was always written after them
+        temp_path = path + '.compact'
+        offsets = {}
+        size = 0
+        with open(temp_path, 'wb') as f:
+            for result_id, expires_us in tombstones.items():
+                prefix = self._record_prefix(result_id, self.FLAG_TOMBSTONE, '0' * 32, 0, expires_us, 0, 0)
+                f.write(prefix)
+                size += len(prefix)
+            for result_id, entry in records:
+                _, offset, length, flags, etag, created_us, expires_us, raw_size = entry
+                prefix = self._record_prefix(result_id, flags, etag, created_us, expires_us, raw_size, length)
+                f.write(prefix)
+                f.write(mapped[offset:offset + length])
+                offsets[result_id] = size + len(prefix)
+                size += len(prefix) + length
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        with self._lock:
+            # Records put again, deleted or expired during the copy stay behind as dead bytes
+            live = 0
+            for result_id, entry in records:
+                if self._index.get(result_id) is entry:
+                    self._index[result_id] = (segment, offsets[result_id]) + entry[2:]
+                    live += self.HEADER.size + len(result_id.encode('utf-8')) + entry[2]
+            os.replace(temp_path, path)
+            self._segments[segment] = [size, live, tombstones]
+            self._maps.pop(segment, None)  # Views into the old file keep its mapping alive
+            self._compactions += 1
+
+        logger.info(
+            f"Compacted result log segment {segment}: kept {len(records)} live records "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = super().stats()
+            total = sum(info[0] for info in self._segments.values())
+            live = sum(info[1] for info in self._segments.values())
+            stats.update({
+                'segments': len(self._segments),
+                'active_segment': self._active_segment,
+                'disk_bytes': total,
+                'live_bytes': live,
+                'compactions': self._compactions
+            })
+            return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
+            self._maps.clear()
+            self._lock_file.close()
+
+    def __contains__(self, result_id: str) -> bool:
+        return result_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class ExpirySweeper:
+    """
+    Per-process background thread that removes expired results.
+
+    Every ``interval`` seconds (randomized by +/- ``jitter`` so workers do not
+    sweep in lockstep) it calls ``store.cleanup_expired`` in slices of at most
+    ``slice_size`` records, pausing between slices so request threads can get
+    at the store. A run stops once nothing more is due or after
+    ``max_run_seconds``; the remainder is picked up by the next run.
+    """
+
+    def __init__(self, store: ResultStore, interval: float = 300.0, jitter: float = 0.1,
+                 slice_size: int = 200, slice_pause: float = 0.005, max_run_seconds: float = 2.0):
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.slice_size = slice_size
+        self.slice_pause = slice_pause
+        self.max_run_seconds = max_run_seconds
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+        self.runs = 0
+        self.total_removed = 0
+        self.last_removed = 0
+        self.last_run_ms = 0.0
+        self.last_run_at: Optional[datetime] = None
+
+    def ensure_started(self) -> None:
+        """Start the sweeper thread for this process if it is not running yet."""
+        if self.interval <= 0:
+            return
+
+        # A thread started before a fork (gunicorn --preload) does not exist in the child
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='result-expiry-sweeper', daemon=True)
+            self._thread.start()
+            logger.info(f"Started result expiry sweeper (interval {self.interval}s, jitter {self.jitter:.0%})")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _next_delay(self) -> float:
+        return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._next_delay()):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Result expiry sweep failed: {str(e)}")
+
+    def run_once(self) -> int:
+        """Run one incremental sweep and return the number of results removed."""
+        started = time.perf_counter()
+        removed = 0
+
+        while True:
+            batch = self.store.cleanup_expired(limit=self.slice_size)
+            removed += batch
+
+            if batch < self.slice_size or time.perf_counter() - started >= self.max_run_seconds:
+                break
+            time.sleep(self.slice_pause)
+
+        self.runs += 1
+        self.total_removed += removed
+        self.last_removed = removed
+        self.last_run_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.last_run_at = datetime.utcnow()
+
+        if removed:
+            logger.info(f"Expiry sweep removed {removed} results in {self.last_run_ms}ms")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'total_removed': self.total_removed,
+            'last_removed': self.last_removed,
+            'last_run_ms': self.last_run_ms,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+
+def export_ndjson(store: ResultStore, now: Optional[datetime] = None) -> Iterator[bytes]:
+    """
+    Stream every unexpired result as NDJSON, one result document per line.
+
+    Lines are the stored documents themselves (decompressed if needed), so an
+    export never re-serializes results and never holds more than one at a time.
+
+    Args:
+        store: Result store to export
+        now: Reference time for the expiry check (defaults to utcnow)
+
+    Yields:
+        One UTF-8 encoded JSON line (with trailing newline) per result
+    """
+    for record in store.iter_results(now):
+        yield record.document() + b'\n'
+
+
+def _parse_utc(value: Any, field: str) -> datetime:
+    # Stores compare naive UTC datetimes, so offsets are converted and then dropped
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be an ISO 8601 string")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_result_line(line: bytes) -> Dict[str, Any]:
+    """
+    Parse one exported NDJSON line back into a plain result record.
+
+    Timestamps with a UTC offset are converted to naive UTC, like every
+    other timestamp the stores handle.
+
+    Raises:
+        ValueError: If the line is not a valid exported result
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("Result line is not a JSON object")
+
+    missing = [key for key in ('id', 'questions_answers', 'gift_ideas', 'created_at', 'expires_at')
+               if key not in data]
+    if missing:
+        raise ValueError(f"Result line is missing fields: {', '.join(missing)}")
+    if not isinstance(data['id'], str) or not data['id']:
+        raise ValueError("Result id must be a non-empty string")
+    if not isinstance(data['questions_answers'], dict):
+        raise ValueError("questions_answers must be an object")
+    if not isinstance(data['gift_ideas'], list) or not all(isinstance(gift, dict) for gift in data['gift_ideas']):
+        raise ValueError("gift_ideas must be a list of objects")
+
+    return {
+        'id': data['id'],
+        'questions_answers': data['questions_answers'],
+        'gift_ideas': data['gift_ideas'],
+        'created_at': _parse_utc(data['created_at'], 'created_at'),
+        'expires_at': _parse_utc(data['expires_at'], 'expires_at')
+    }
+
+
+def import_ndjson(store: ResultStore, lines: Iterable[bytes], batch_size: int = 500,
+                  now: Optional[datetime] = None, max_errors: int = 20) -> Dict[str, Any]:
+    """
+    Load NDJSON result lines (as written by export_ndjson) into a store.
+
+    Lines are consumed lazily and written with ``put_many`` in batches of
+    ``batch_size``, so imports of any size run in bounded memory. Invalid
+    lines are skipped and reported; already-expired results are skipped. If
+    a batch write is rejected, its records are retried one at a time so only
+    the offending lines are counted as failed.
+
+    Args:
+        store: Destination result store
+        lines: Iterable of NDJSON lines (bytes or str), e.g. an open file
+        batch_size: Records per ``put_many`` call
+        now: Reference time for the expiry check (defaults to utcnow)
+        max_errors: Maximum number of error messages to include in the summary
+
+    Returns:
+        Summary with imported, expired, failed and errors
+    """
+    now = now or datetime.utcnow()
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    summary = {'imported': 0, 'expired': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    def reject(line_number: int, error: Exception) -> None:
+        summary['failed'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append(f"line {line_number}: {error}")
+
+    def flush() -> None:
+        try:
+            summary['imported'] += store.put_many(record for _, record in batch)
+            return
+        except (ValueError, TypeError, KeyError, AttributeError):
+            pass
+        for line_number, record in batch:
+            try:
+                summary['imported'] += store.put_many([record])
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                reject(line_number, e)
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = parse_result_line(line)
+        except (ValueError, TypeError) as e:  # json.JSONDecodeError is a ValueError
+            reject(line_number, e)
+            continue
+
+        if now > record['expires_at']:
+            summary['expired'] += 1
+            continue
+
+        batch.append((line_number, record))
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+
+    return summary
+
+
+def create_result_store(config: Mapping[str, Any]) -> ResultStore:
+    """
+    Build the result store selected by the application configuration.
+
+    Args:
+        config: Flask config (or any mapping) with RESULT_STORE_* settings
+
+    Returns:
+        Configured ResultStore instance
+
+    Raises:
+        ValueError: If RESULT_STORE_BACKEND names an unknown backend
+    """
+    backend = (config.get('RESULT_STORE_BACKEND') or 'memory').lower()
+    compression_level = int(config.get('RESULT_COMPRESSION_LEVEL', 0))
+
+    if backend == 'memory':
+        return MemoryResultStore(
+            max_bytes=int(config.get('RESULT_STORE_MAX_BYTES', 0)),
+            compression_level=compression_level,
+            stripes=int(config.get('RESULT_STORE_STRIPES', 16))
+        )
+
+    if backend == 'sqlite':
+        return SQLiteResultStore(
+            config.get('RESULT_STORE_PATH', '/tmp/rubysgifts_results.db'),
+            compression_level=compression_level
+        )
+
+    if backend == 'log':
+        return LogResultStore(
+            config.get('RESULT_STORE_LOG_DIR', '/tmp/rubysgifts_results'),
+            segment_max_bytes=int(config.get('RESULT_STORE_SEGMENT_BYTES', 64 * 1024 * 1024)),
+            compression_level=compression_level,
+            fsync=bool(config.get('RESULT_STORE_FSYNC', False))
+        )
+
+    raise ValueError(f"Unknown RESULT_STORE_BACKEND: {backend}")
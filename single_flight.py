@@ -0,0 +1,231 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+Collapses concurrent identical pieces of work into one execution. The first
+caller for a key runs the work; callers arriving while it is in flight wait
+for and share its result (or its exception) instead of repeating it.
+
+- SingleFlight: coalesces across threads of one worker process
+- SQLiteFlightCoordinator: optional second level that coalesces across worker
+  processes through a lease table in a shared SQLite database; results must
+  be JSON-serializable
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight execution and the callers waiting on it."""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Per-process single-flight group.
+
+    Usage::
+
+        flights = SingleFlight()
+        value, shared = flights.do(key, lambda: expensive(key))
+
+    ``shared`` is True when the value came from another caller's execution.
+    """
+
+    def __init__(self, coordinator: Optional['SQLiteFlightCoordinator'] = None):
+        self.coordinator = coordinator
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the work (e.g. a canonical request hash)
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            Tuple of (result, shared)
+
+        Raises:
+            Whatever ``fn`` raised, for the caller that ran it and every waiter
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        shared = False
+        try:
+            if self.coordinator is not None:
+                call.result, shared = self.coordinator.run(key, fn)
+            else:
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, shared
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'coalesced': self.coalesced
+            }
+        if self.coordinator is not None:
+            stats['shared'] = self.coordinator.stats()
+        return stats
+
+
+class SQLiteFlightCoordinator:
+    """
+    Cross-process single-flight through a lease table in SQLite.
+
+    The process that inserts the lease row for a key runs the work and writes
+    the JSON result back to the row, where it stays readable for
+    ``result_ttl`` seconds. Other processes poll the row until the result
+    appears. If the leader fails, its row is deleted and a waiting process
+    takes over; if it dies, the lease expires after ``lease_seconds``.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS inflight ("
+        " key TEXT PRIMARY KEY,"
+        " owner TEXT NOT NULL,"
+        " lease_until REAL NOT NULL,"
+        " result TEXT"
+        ")"
+    )
+
+    SQL_PRUNE = "DELETE FROM inflight WHERE lease_until < ?"
+    SQL_ACQUIRE = "INSERT OR IGNORE INTO inflight (key, owner, lease_until, result) VALUES (?, ?, ?, NULL)"
+    SQL_COMPLETE = "UPDATE inflight SET result = ?, lease_until = ? WHERE key = ? AND owner = ?"
+    SQL_ABANDON = "DELETE FROM inflight WHERE key = ? AND owner = ?"
+    SQL_POLL = "SELECT result FROM inflight WHERE key = ?"
+
+    def __init__(self, path: str, lease_seconds: float = 60.0, result_ttl: float = 30.0,
+                 poll_interval: float = 0.1, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._local = threading.local()
+        self._pid = None
+
+        self.leads = 0
+        self.followed = 0
+        self.takeovers = 0
+
+        conn = self._connection()
+        conn.execute(self.SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; connections inherited across fork are dropped
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` in at most one process at a time for ``key``.
+
+        Returns:
+            Tuple of (result, shared)
+        """
+        owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        conn = self._connection()
+        deadline = time.monotonic() + self.lease_seconds
+        waited = False
+
+        while True:
+            now = time.time()
+            conn.execute(self.SQL_PRUNE, (now,))
+            acquired = conn.execute(self.SQL_ACQUIRE, (key, owner, now + self.lease_seconds)).rowcount == 1
+            conn.commit()
+
+            if acquired:
+                break
+
+            row = conn.execute(self.SQL_POLL, (key,)).fetchone()
+            if row is not None and row[0] is not None:
+                self.followed += 1
+                return json.loads(row[0]), True
+
+            if time.monotonic() > deadline:
+                # Give up waiting on a stuck leader and do the work locally
+                logger.warning(f"Timed out waiting on in-flight work for {key[:12]}; running it here")
+                return fn(), False
+
+            waited = True
+            time.sleep(self.poll_interval)
+
+        if waited:
+            self.takeovers += 1
+        self.leads += 1
+
+        try:
+            result = fn()
+        except BaseException:
+            conn.execute(self.SQL_ABANDON, (key, owner))
+            conn.commit()
+            raise
+
+        conn.execute(self.SQL_COMPLETE, (json.dumps(result), time.time() + self.result_ttl, key, owner))
+        conn.commit()
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'leads': self.leads,
+            'followed': self.followed,
+            'takeovers': self.takeovers
+        }
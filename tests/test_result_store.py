@@ -0,0 +1,171 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from result_store import LogResultStore, MemoryResultStore, import_ndjson
+
+
+def make_record(result_id, ttl_seconds=3600):
+    now = datetime.utcnow()
+    return {
+        'id': result_id,
+        'questions_answers': {'relationship': 'friend'},
+        'gift_ideas': [{'title': 'Book', 'images': []}],
+        'created_at': now,
+        'expires_at': now + timedelta(seconds=ttl_seconds)
+    }
+
+
+class LogResultStoreCompactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_store(self):
+        # A 1-byte segment limit puts every record in its own segment
+        return LogResultStore(self.directory, segment_max_bytes=1)
+
+    def test_put_after_delete_survives_compaction_and_reopen(self):
+        store = self.open_store()
+        store.put(make_record('A'))
+        store.put(make_record('X'))
+        store.delete('X')
+        store.put(make_record('X'))
+        store.put(make_record('B'))
+
+        # Compacts one dead segment per call: first X's old record, then the tombstone
+        for _ in range(3):
+            store.cleanup_expired()
+        self.assertGreaterEqual(store.stats()['compactions'], 2)
+        self.assertIsNotNone(store.get('X'))
+        store.close()
+
+        store = self.open_store()
+        try:
+            self.assertIsNotNone(store.get('X'))
+            self.assertIsNotNone(store.get('A'))
+        finally:
+            store.close()
+
+    def test_deleted_result_stays_deleted_after_compaction_and_reopen(self):
+        store = self.open_store()
+        store.put(make_record('A'))
+        store.put(make_record('X'))
+        store.delete('X')
+        store.put(make_record('B'))
+
+        for _ in range(3):
+            store.cleanup_expired()
+        store.close()
+
+        store = self.open_store()
+        try:
+            self.assertIsNone(store.get('X'))
+        finally:
+            store.close()
+
+    def test_overlong_id_is_rejected_with_value_error(self):
+        store = self.open_store()
+        try:
+            with self.assertRaises(ValueError):
+                store.put(make_record('x' * 256))
+            store.put(make_record('x' * 255))
+            self.assertIsNotNone(store.get('x' * 255))
+        finally:
+            store.close()
+
+
+class MemoryResultStoreMemoryCapTest(unittest.TestCase):
+
+    def test_cap_applies_across_shards(self):
+        store = MemoryResultStore(max_bytes=50000, stripes=16)
+        # Records large enough that keeping one per shard would be well over the cap
+        for index in range(40):
+            record = make_record(f'r{index}')
+            record['gift_ideas'] = [{'title': f'Gift {index}', 'description': f'{index} ' * 1500}]
+            store.put(record)
+
+        self.assertLessEqual(store.bytes_used, 50000)
+        self.assertGreater(store.stats()['evictions'], 0)
+        self.assertIsNotNone(store.get('r39'))
+
+    def test_least_recently_used_result_is_evicted_first(self):
+        store = MemoryResultStore(max_bytes=1, stripes=4)
+        store.put(make_record('A'))
+        store.put(make_record('B'))
+
+        self.assertNotIn('A', store)
+        self.assertIn('B', store)
+
+
+def result_line(result_id, **overrides):
+    now = datetime.utcnow()
+    data = {
+        'id': result_id,
+        'questions_answers': {'relationship': 'friend'},
+        'gift_ideas': [{'title': 'Book', 'images': []}],
+        'created_at': now.isoformat(),
+        'expires_at': (now + timedelta(hours=1)).isoformat()
+    }
+    data.update(overrides)
+    return json.dumps(data).encode('utf-8') + b'\n'
+
+
+class ImportNdjsonTest(unittest.TestCase):
+
+    def test_malformed_payloads_are_counted_as_failed(self):
+        store = MemoryResultStore()
+        lines = [
+            result_line('good1'),
+            result_line('bad1', gift_ideas=['not an object']),
+            result_line('bad2', gift_ideas={'title': 'Book'}),
+            result_line('bad3', questions_answers=['friend']),
+            result_line('bad4', expires_at=12345),
+            result_line('good2')
+        ]
+
+        summary = import_ndjson(store, lines, batch_size=2)
+
+        self.assertEqual(summary['imported'], 2)
+        self.assertEqual(summary['failed'], 4)
+        self.assertEqual(len(summary['errors']), 4)
+        self.assertIsNotNone(store.get('good1'))
+        self.assertIsNotNone(store.get('good2'))
+
+    def test_timezone_aware_timestamps_are_stored_as_naive_utc(self):
+        store = MemoryResultStore()
+        expires_at = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+        lines = [
+            result_line('offset', expires_at=(expires_at + timedelta(hours=2)).isoformat() + '+02:00'),
+            result_line('expired', expires_at='2000-01-01T00:00:00+00:00')
+        ]
+
+        summary = import_ndjson(store, lines)
+
+        self.assertEqual(summary, {'imported': 1, 'expired': 1, 'failed': 0, 'errors': []})
+        self.assertEqual(store.get('offset').expires_at, expires_at)
+
+    def test_overlong_id_fails_only_its_line_in_log_store(self):
+        directory = tempfile.mkdtemp()
+        store = LogResultStore(directory)
+        try:
+            lines = [result_line('good1'), result_line('x' * 256), result_line('good2')]
+
+            summary = import_ndjson(store, lines)
+
+            self.assertEqual(summary['imported'], 2)
+            self.assertEqual(summary['failed'], 1)
+            self.assertIn('line 2', summary['errors'][0])
+            self.assertIsNotNone(store.get('good2'))
+        finally:
+            store.close()
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+TTL Cache
+=========
+
+Thread-safe in-process cache with a time-to-live per entry and an LRU bound
+on the number of entries, used to avoid repeating slow upstream calls (OpenAI
+completions, image searches) for inputs seen recently.
+
+Entries expire ``ttl`` seconds after they were stored; a per-entry TTL can
+override the cache default. Once ``max_entries`` is reached the least
+recently used entry is evicted. Hit, miss, expiry and eviction counters are
+kept for the health endpoint.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after a TTL.
+
+    A ``ttl`` of 0 (or ``max_entries`` of 0) disables the cache: ``set`` is a
+    no-op and every ``get`` is a miss, so callers never need to special-case
+    a disabled cache.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, tuple[float, Any]]' = OrderedDict()  # key -> (expires_at, value)
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for ``key``, or ``default`` if missing or expired.
+
+        A hit marks the entry as most recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store ``value`` under ``key``.
+
+        Args:
+            key: Cache key
+            value: Value to cache (stored by reference)
+            ttl: Seconds until the entry expires (defaults to the cache TTL)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if not self.enabled or ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove an entry. Returns True if it was present."""
+        with self._lock:
+            return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters for health/monitoring endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'expirations': self.expirations,
+                'evictions': self.evictions
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and self._clock() < entry[0]
+
+    def __len__(self) -> int:
+        return len(self._entries)